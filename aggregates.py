@@ -0,0 +1,186 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+
+import pandas as pd
+
+from timings import stage
+from trends import analyze_trends
+
+# Kolom dimensi yang dipakai oleh grafik, prompt AI, laporan PDF, dan filter dashboard
+DIMENSION_COLUMNS = ['platform', 'sentiment', 'media_type', 'location', 'influencer_brand']
+BASE_KEYS = ['date'] + DIMENSION_COLUMNS
+
+# Jumlah maksimum bundle agregat yang disimpan di memo (per proses)
+MAX_MEMO_ENTRIES = 8
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class AggregateBundle:
+    """
+    Kumpulan agregat yang dihitung sekali dari output `clean_data`:
+    - `base`: tabel ringkas hasil satu kali groupby (hari x dimensi) berisi total engagement dan jumlah baris.
+      Pada hasil query RollupCube, `base` hanya memuat dimensi filter (hari x platform x sentimen, ditambah
+      brand jika filter brand aktif).
+    - Agregat turunan untuk setiap grafik, prompt AI, dan laporan PDF.
+    - `trends`: analisis tren dan lonjakan (TrendAnalysis, lihat trends.py) untuk total, platform, dan sentimen;
+      dihitung dari `base` saat pertama kali dibaca (wawasan, grafik tren, prompt AI, PDF), bukan saat bundle
+      dibuat, agar query filter yang tidak menampilkan tren tidak menanggung biayanya.
+    - `fingerprint`: sidik jari isi bundle (sidik jari dataset, ditambah parameter query untuk hasil RollupCube)
+      jika diketahui pembuatnya; kosong berarti isi bundle hanya dapat dikenali dengan meng-hash `base`.
+    """
+    total_entries: int
+    base: pd.DataFrame
+    sentiment_counts: pd.Series
+    platform_engagements: pd.Series
+    media_type_counts: pd.Series
+    location_counts: pd.Series
+    daily_engagements: pd.DataFrame
+    sketches: object = None # SketchSummary pada mode perkiraan (lihat sketches.py), None jika semua agregat eksak
+    granularity: str = "day" # Periode deteksi lonjakan pada analisis tren (sama dengan granularitas grafik tren)
+    fingerprint: str = ""
+
+    @classmethod
+    def from_base(cls, base, sketches=None, granularity="day", fingerprint=""):
+        """
+        Menurunkan semua agregat dari tabel `base` (kolom: date, dimensi, engagements, count).
+        Dengan `sketches`, jumlah per lokasi diperkirakan dari sketsa (tabel `base` tidak memuat lokasi).
+        `granularity` menentukan periode deteksi lonjakan pada analisis tren (sama dengan granularitas grafik tren).
+        """
+        return cls(
+            total_entries=int(base['count'].sum()),
+            base=base,
+            sentiment_counts=counts_by(base, 'sentiment'),
+            platform_engagements=engagements_by_platform(base),
+            media_type_counts=counts_by(base, 'media_type'),
+            location_counts=counts_by(base, 'location') if sketches is None else sketches.top_counts('location'),
+            daily_engagements=daily_engagements(base),
+            sketches=sketches,
+            granularity=granularity,
+            fingerprint=fingerprint,
+        )
+
+    @cached_property
+    def trends(self):
+        return analyze_trends(self.base, self.granularity)
+
+    @property
+    def approximate(self):
+        return self.sketches is not None
+
+    @property
+    def empty(self):
+        return self.total_entries == 0
+
+
+def counts_by(base, col):
+    """Jumlah baris per nilai `col`, terbesar lebih dulu (grafik sentimen, tipe media, dan lokasi)."""
+    counts = base.groupby(col, observed=True)['count'].sum().sort_values(ascending=False)
+    counts.name = 'count'
+    return counts
+
+
+def engagements_by_platform(base):
+    """Total engagement per platform, terbesar lebih dulu."""
+    return base.groupby('platform', observed=True)['engagements'].sum().sort_values(ascending=False)
+
+
+def daily_engagements(base):
+    """Total engagement per hari (kolom date, engagements), urut tanggal."""
+    return base.groupby('date')['engagements'].sum().sort_index().reset_index()
+
+
+def build_base_table(df, dimensions=DIMENSION_COLUMNS):
+    """Satu kali pemindaian baris: groupby hari x `dimensions` dengan jumlah engagement dan jumlah baris."""
+    if df.empty:
+        return pd.DataFrame({
+            'date': pd.Series(dtype='datetime64[ns]'),
+            **{col: pd.Series(dtype=object) for col in dimensions},
+            'engagements': pd.Series(dtype=float),
+            'count': pd.Series(dtype='int64'),
+        })
+
+    day = df['day'] if 'day' in df.columns else df['date'].dt.normalize()
+    keys = [day.rename('date')] + [df[col] for col in dimensions]
+    grouped = df.groupby(keys, sort=False, observed=True)['engagements']
+    base = grouped.agg(['sum', 'size']).rename(columns={'sum': 'engagements', 'size': 'count'})
+    return base.reset_index()
+
+
+def merge_base_tables(tables, dimensions=DIMENSION_COLUMNS):
+    """Menggabungkan beberapa tabel `base` (dari potongan data yang berbeda) menjadi satu tabel."""
+    tables = [table for table in tables if not table.empty]
+    if not tables:
+        return build_base_table(pd.DataFrame(), dimensions)
+    if len(tables) == 1:
+        return tables[0]
+
+    combined = pd.concat(tables, ignore_index=True)
+    return combined.groupby(['date'] + list(dimensions), sort=False, observed=True)[['engagements', 'count']].sum().reset_index()
+
+
+class AggregateAccumulator:
+    """
+    Melipat potongan (chunk) data bersih ke dalam tabel `base` berjalan,
+    sehingga agregat dapat dihitung tanpa pernah menyimpan semua baris.
+    """
+
+    def __init__(self, compact_every=16):
+        self.compact_every = compact_every
+        self.rows = 0
+        self._pending = []
+
+    def add(self, df):
+        """Menambahkan satu potongan data bersih."""
+        if df.empty:
+            return
+        self._pending.append(build_base_table(df))
+        self.rows += len(df)
+        if len(self._pending) >= self.compact_every:
+            self._pending = [merge_base_tables(self._pending)]
+
+    def result(self):
+        """Mengembalikan AggregateBundle dari semua potongan yang sudah ditambahkan."""
+        return AggregateBundle.from_base(merge_base_tables(self._pending))
+
+
+def build_aggregates(df, fingerprint=""):
+    """Membangun AggregateBundle dari DataFrame yang telah dibersihkan."""
+    return AggregateBundle.from_base(build_base_table(df), fingerprint=fingerprint)
+
+
+def dataset_fingerprint(df):
+    """Sidik jari konten DataFrame (nama kolom + hash nilai setiap baris)."""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(','.join(map(str, df.columns)).encode('utf-8'))
+    if not df.empty:
+        hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return hasher.hexdigest()
+
+
+def get_aggregates(df, fingerprint=None):
+    """
+    Mengembalikan AggregateBundle untuk `df`, dimemo berdasarkan sidik jari dataset.
+    Berikan `fingerprint` yang sudah dihitung sebelumnya agar tidak perlu meng-hash ulang data.
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+
+    with _memo_lock:
+        bundle = _memo.get(fingerprint)
+        if bundle is not None:
+            _memo.move_to_end(fingerprint)
+            return bundle
+
+    with stage("agregasi", rows=len(df)):
+        bundle = build_aggregates(df, fingerprint)
+    with _memo_lock:
+        _memo[fingerprint] = bundle
+        while len(_memo) > MAX_MEMO_ENTRIES:
+            _memo.popitem(last=False)
+    return bundle
@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# URL API OpenRouter; dapat diarahkan ke server stub lokal untuk pengujian
+OPENROUTER_BASE_URL = os.environ.get("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1")
+
+# Status HTTP yang dicoba ulang dengan backoff eksponensial
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Dilempar saat circuit breaker terbuka dan permintaan ditolak tanpa menghubungi server."""
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker sederhana: setelah `failure_threshold` kegagalan berturut-turut, permintaan
+    ditolak selama `reset_timeout` detik. Setelah itu satu permintaan percobaan diizinkan;
+    jika berhasil, breaker tertutup kembali.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self.opened_at is None:
+            return "closed"
+        if now - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        """True jika permintaan boleh dikirim."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state(now) == "half-open":
+                # Hanya satu permintaan percobaan; permintaan lain menunggu hasilnya
+                self.opened_at = now
+                return True
+            return self.opened_at is None
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class OpenRouterClient:
+    """
+    Klien OpenRouter yang dipakai bersama oleh semua sesi: koneksi HTTP di-pool (tanpa TLS
+    handshake ulang), setiap permintaan memiliki timeout koneksi/baca, status 429/5xx dan
+    kegagalan koneksi dicoba ulang dengan backoff eksponensial, dan circuit breaker mencegah
+    worker tertahan ketika upstream sedang bermasalah.
+    """
+
+    def __init__(self, base_url=OPENROUTER_BASE_URL, connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=3, backoff_factor=0.5, max_backoff=10.0, pool_maxsize=20, breaker=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _backoff(self, attempt, response=None):
+        """Jeda sebelum percobaan ulang: header Retry-After jika ada, selain itu backoff eksponensial."""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        return min(self.backoff_factor * (2 ** attempt), self.max_backoff)
+
+    def post(self, path, api_key, payload, stream=False):
+        """
+        Mengirim POST JSON ke `path` dengan retry, timeout, dan circuit breaker.
+        Mengembalikan objek Response yang sukses; melempar RequestException jika gagal.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("OpenRouter sedang tidak tersedia (circuit breaker terbuka). Coba lagi beberapa saat lagi.")
+
+        headers = {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        url = f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, headers=headers, json=payload, timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exc:
+                # Timeout baca tidak dicoba ulang: upstream yang macet kemungkinan besar macet lagi
+                retryable = not isinstance(exc, requests.exceptions.ReadTimeout)
+                if attempt < self.max_retries and retryable:
+                    time.sleep(self._backoff(attempt))
+                    continue
+                self.breaker.record_failure()
+                raise
+
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                delay = self._backoff(attempt, response)
+                response.close()
+                time.sleep(delay)
+                continue
+
+            # Respons non-5xx/429 (termasuk 4xx) berarti upstream dapat dijangkau
+            if response.status_code in RETRY_STATUSES:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            response.raise_for_status()
+            return response
+
+    def create_chat_completion(self, api_key, model, messages):
+        """Memanggil endpoint chat/completions dan mengembalikan JSON respons lengkap (termasuk 'usage')."""
+        return self.post("chat/completions", api_key, {"model": model, "messages": messages}).json()
+
+    def chat_completion(self, api_key, model, messages):
+        """Memanggil endpoint chat/completions dan mengembalikan teks jawaban model."""
+        return self.create_chat_completion(api_key, model, messages)["choices"][0]["message"]["content"]
+
+    def stream_chat_completion(self, api_key, model, messages):
+        """Seperti `chat_completion`, tetapi menghasilkan potongan teks jawaban segera setelah tiba (SSE)."""
+        response = self.post("chat/completions", api_key, {"model": model, "messages": messages, "stream": True}, stream=True)
+        try:
+            yield from iter_sse_content(response)
+        finally:
+            response.close()
+
+
+def iter_sse_content(response):
+    """Mengurai aliran Server-Sent Events chat/completions dan menghasilkan potongan teks jawaban."""
+    response.encoding = response.encoding or "utf-8"
+    for line in response.iter_lines(decode_unicode=True):
+        # Baris kosong memisahkan event; baris diawali ':' adalah komentar keep-alive
+        if not line or line.startswith(":") or not line.startswith("data:"):
+            continue
+        data = line[len("data:"):].strip()
+        if data == "[DONE]":
+            break
+        event = json.loads(data)
+        if "error" in event:
+            raise requests.exceptions.RequestException(event["error"].get("message", "Error dari OpenRouter"))
+        content = event["choices"][0].get("delta", {}).get("content")
+        if content:
+            yield content
+
+
+# Klien bersama untuk semua sesi di proses ini
+openrouter_client = OpenRouterClient()
@@ -0,0 +1,167 @@
+"""
+Mode batch tanpa UI: membuat laporan PDF/JSON untuk setiap klien di sebuah direktori, diproses paralel
+dengan process pool. Satu klien adalah satu file CSV (boleh .csv.gz), satu arsip .zip, atau satu subfolder
+berisi beberapa ekspor (misalnya per platform) yang digabung menjadi satu laporan.
+
+Contoh:
+    python batch.py ekspor/ laporan/ --format pdf json --workers 8
+    python batch.py ekspor/ laporan/ --ai openrouter --model openai/gpt-4o
+    python batch.py ekspor/ laporan/ --format pdf --charts
+
+Kunci API dibaca dari variabel lingkungan GOOGLE_API_KEY (Gemini) dan OPENROUTER_API_KEY (OpenRouter).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from aggregates import build_aggregates
+from fanout import GEMINI_MODEL, run_model
+from cleaning import clean_data
+from ingest import ARCHIVE_SUFFIXES, CSV_SUFFIXES, expand_sources, is_ingestible, read_sources
+from insights import build_ai_prompt
+from report import REPORT_TITLE, build_json_report, build_pdf_report_cached, dump_json_report
+from timings import SectionTimer, configure_timing_log, record_stage, stage
+
+DEFAULT_MODELS = {"gemini": GEMINI_MODEL, "openrouter": "openrouter/auto"}
+SUMMARY_FILE = "batch_summary.json"
+
+
+def find_client_files(input_dir):
+    """
+    Sumber data klien di `input_dir` (tidak rekursif), diurutkan berdasarkan nama: file .csv/.csv.gz/.zip
+    dan subfolder. Nama file tanpa ekstensi (atau nama subfolder) adalah nama klien.
+    """
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if os.path.isdir(os.path.join(input_dir, name)) or (is_ingestible(name) and os.path.isfile(os.path.join(input_dir, name)))
+    )
+
+
+def client_name(path):
+    """Nama klien dari path sumbernya: nama file tanpa .csv/.csv.gz/.zip, atau nama folder."""
+    name = os.path.basename(os.path.normpath(path))
+    for suffix in sorted(CSV_SUFFIXES + ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def _init_worker(google_api_key):
+    configure_timing_log()
+    if google_api_key:
+        import google.generativeai as genai
+        genai.configure(api_key=google_api_key)
+
+
+def process_client(path, output_dir, formats=("pdf", "json"), ai_provider=None, ai_model=None, openrouter_api_key=None,
+                   charts=False):
+    """
+    Membaca dan membersihkan data satu klien (file, arsip, atau folder), menghitung agregat dan wawasan, (opsional) meminta analisis AI,
+    lalu menulis laporan ke `output_dir`. Kegagalan dicatat di hasil, tidak dilempar.
+    Dengan `charts`, gambar grafik dirender di proses worker ini (paralelisme sudah per klien).
+    """
+    name = client_name(path)
+    result = {"client": name, "source": path, "rows": 0, "outputs": [], "error": "", "ai_error": ""}
+    started = time.perf_counter()
+    timer = SectionTimer(kind="batch").activate()
+    try:
+        with stage("muat_csv") as record:
+            raw, summary = read_sources(expand_sources([path]))
+            record.update(files=len(summary["files"]), bytes=sum(info["bytes"] for info in summary["files"]))
+            df = clean_data(raw)
+        if df.empty:
+            raise ValueError("Tidak ada data valid setelah pembersihan.")
+        with stage("agregasi", rows=len(df)):
+            aggs = build_aggregates(df)
+        result["rows"] = aggs.total_entries
+
+        ai_text = ""
+        if ai_provider:
+            prompt = build_ai_prompt(aggs)
+            model_result = run_model(ai_provider, ai_model, prompt, openrouter_api_key)
+            ai_text = model_result.text
+            result["ai_error"] = model_result.error
+            record_stage("llm", model_result.latency_s, provider=ai_provider, model=ai_model, cached=model_result.cached,
+                         prompt_bytes=len(prompt.encode("utf-8")), response_bytes=len(ai_text.encode("utf-8")),
+                         error=model_result.error or None)
+
+        if "pdf" in formats:
+            target = os.path.join(output_dir, f"{name}.pdf")
+            with open(target, "wb") as f:
+                f.write(build_pdf_report_cached(aggs, ai_text, title=f"{REPORT_TITLE} - {name}", with_charts=charts, workers=0))
+            result["outputs"].append(target)
+        if "json" in formats:
+            target = os.path.join(output_dir, f"{name}.json")
+            with open(target, "w", encoding="utf-8") as f:
+                f.write(dump_json_report(build_json_report(aggs, ai_text, name)))
+            result["outputs"].append(target)
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+    finally:
+        timer.finish(client=name, rows=result["rows"], error=result["error"] or None)
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(input_dir, output_dir, formats=("pdf", "json"), workers=None, ai_provider=None, ai_model=None,
+              google_api_key=None, openrouter_api_key=None, on_result=None, charts=False):
+    """Memproses semua klien di `input_dir` secara paralel; mengembalikan daftar hasil per klien (urut nama)."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = find_client_files(input_dir)
+    if ai_provider and not ai_model:
+        ai_model = DEFAULT_MODELS[ai_provider]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(google_api_key,)) as executor:
+        futures = [
+            executor.submit(process_client, path, output_dir, tuple(formats), ai_provider, ai_model, openrouter_api_key, charts)
+            for path in paths
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+    return sorted(results, key=lambda result: result["client"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Membuat laporan intelijen media untuk setiap klien (file CSV, arsip, atau subfolder) dalam satu direktori.")
+    parser.add_argument("input_dir", help="Direktori berisi ekspor klien (.csv, .csv.gz, .zip, atau subfolder per klien)")
+    parser.add_argument("output_dir", help="Direktori tujuan laporan")
+    parser.add_argument("--format", nargs="+", choices=["pdf", "json"], default=["pdf", "json"], dest="formats")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses paralel (default: jumlah CPU)")
+    parser.add_argument("--ai", choices=["gemini", "openrouter"], default=None, help="Sertakan analisis AI dari provider ini")
+    parser.add_argument("--model", default=None, help="Id model AI (default: gemini-2.0-flash / openrouter/auto)")
+    parser.add_argument("--charts", action="store_true", help="Sisipkan gambar kelima grafik di laporan PDF (membutuhkan kaleido)")
+    args = parser.parse_args(argv)
+
+    openrouter_api_key = os.environ.get("OPENROUTER_API_KEY")
+    google_api_key = os.environ.get("GOOGLE_API_KEY")
+    if args.ai == "openrouter" and not openrouter_api_key:
+        parser.error("OPENROUTER_API_KEY belum diatur.")
+    if args.ai == "gemini" and not google_api_key:
+        parser.error("GOOGLE_API_KEY belum diatur.")
+
+    def print_result(result):
+        status = "GAGAL: " + result["error"] if result["error"] else f"{result['rows']:,} baris"
+        if result["ai_error"]:
+            status += f" (AI gagal: {result['ai_error']})"
+        print(f"[{result['seconds']:.2f} detik] {result['client']}: {status}", flush=True)
+
+    started = time.perf_counter()
+    results = run_batch(args.input_dir, args.output_dir, args.formats, args.workers, args.ai, args.model,
+                        google_api_key, openrouter_api_key, on_result=print_result, charts=args.charts)
+    with open(os.path.join(args.output_dir, SUMMARY_FILE), "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+    failed = [result for result in results if result["error"]]
+    print(f"Selesai: {len(results) - len(failed)} dari {len(results)} klien berhasil dalam {time.perf_counter() - started:.1f} detik.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Benchmark performa pipeline dashboard pada data sintetis (lihat synthetic.py): waktu dan memori puncak
+untuk setiap tahap (baca CSV, clean_data, agregasi dasar, agregasi tiap grafik, analisis tren,
+bangun cube, filter cube, summarize_data_for_ai, sketsa mode perkiraan, dan pembuatan PDF), untuk beberapa ukuran data sekaligus.
+
+Dengan --baseline, hasil dibandingkan dengan hasil tersimpan dan proses keluar dengan kode 1 jika
+ada tahap yang lebih lambat (atau lebih boros memori) melebihi toleransi. Simpan baseline baru dengan
+--save-baseline di mesin yang sama dengan tempat benchmark dijalankan.
+
+Contoh:
+    python bench.py --rows 1000 100000 1000000 --save-baseline bench_baseline.json
+    python bench.py --rows 1000 100000 1000000 --baseline bench_baseline.json --tolerance 0.25
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import pandas as pd
+
+from aggregates import AggregateBundle, build_base_table, counts_by, daily_engagements, engagements_by_platform
+from cleaning import clean_data
+from ingest import expand_sources, read_sources
+from insights import summarize_data_for_ai
+from report import build_pdf_report
+from rollup import RollupCube
+from sketches import SketchSummary
+from synthetic import write_csv
+from trends import analyze_trends
+
+DEFAULT_ROWS = [1_000, 100_000]
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "medintel_bench")
+
+# Selisih waktu/memori di bawah batas ini dianggap derau pengukuran, bukan regresi
+MIN_SECONDS_DELTA = 0.005
+MIN_MB_DELTA = 1.0
+
+
+@dataclass
+class Stage:
+    """Satu tahap benchmark: `run(*args)` diukur; `prepare(ctx)` menyiapkan argumennya sebelum setiap eksekusi (tidak diukur)."""
+    name: str
+    run: object
+    prepare: object
+
+
+def _stages(with_charts=False):
+    stages = [
+        Stage("baca_csv", _read_csv, lambda ctx: (ctx["path"],)),
+        # clean_data mengubah DataFrame masukan; prepare dipanggil ulang sehingga setiap eksekusi memakai salinan baru
+        Stage("clean_data", clean_data, lambda ctx: (ctx["baca_csv"].copy(),)),
+        Stage("agregasi_dasar", build_base_table, lambda ctx: (ctx["clean_data"],)),
+        Stage("grafik_sentimen", lambda base: counts_by(base, "sentiment"), lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("grafik_tren", daily_engagements, lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("grafik_platform", engagements_by_platform, lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("grafik_tipe_media", lambda base: counts_by(base, "media_type"), lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("grafik_lokasi", lambda base: counts_by(base, "location").head(5), lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("analisis_tren", analyze_trends, lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("agregat_lengkap", AggregateBundle.from_base, lambda ctx: (ctx["agregasi_dasar"],)),
+        Stage("bangun_cube", RollupCube, lambda ctx: (ctx["agregasi_dasar"],)),
+        # Cube baru setiap pengulangan agar memo kueri tidak ikut terukur
+        Stage("filter_cube", _query_cube, lambda ctx: (RollupCube(ctx["agregasi_dasar"]),)),
+        Stage("summarize_data_for_ai", summarize_data_for_ai, lambda ctx: (ctx["agregat_lengkap"],)),
+        Stage("sketsa", _build_sketches, lambda ctx: (ctx["clean_data"],)),
+        Stage("pdf", build_pdf_report, lambda ctx: (ctx["agregat_lengkap"], "Ringkasan benchmark.")),
+    ]
+    if with_charts:
+        stages.append(Stage("pdf_grafik", _pdf_with_charts, lambda ctx: (ctx["agregat_lengkap"],)))
+    return stages
+
+
+def _read_csv(path):
+    """Parsing CSV dengan mesin dashboard (MEDINTEL_CSV_ENGINE), tanpa pembersihan."""
+    return read_sources(expand_sources([path]))[0]
+
+
+def _query_cube(cube):
+    """Kueri filter khas dashboard: dua platform teratas, tren mingguan."""
+    platforms = cube.base.groupby("platform", observed=True)["count"].sum().nlargest(2).index.tolist()
+    return cube.query(platforms=platforms, granularity="week")
+
+
+def _build_sketches(df):
+    """Agregat mode perkiraan (tabel base tanpa lokasi/brand dan sketsanya) dari data bersih."""
+    summary = SketchSummary()
+    summary.add(df)
+    return summary.result()
+
+
+def _pdf_with_charts(aggs):
+    """PDF dengan kelima gambar grafik, dirender dingin (direktori cache baru) di proses ini."""
+    from chart_images import render_chart_images
+    from report import report_fingerprint
+    with tempfile.TemporaryDirectory(prefix="medintel_bench_charts_") as cache_dir:
+        images = render_chart_images(aggs, report_fingerprint(aggs), workers=0, cache_dir=cache_dir)
+    return build_pdf_report(aggs, "Ringkasan benchmark.", images=images)
+
+
+def dataset_path(rows, seed, data_dir=DEFAULT_DATA_DIR):
+    """CSV sintetis untuk (rows, seed), dibangkitkan sekali lalu dipakai ulang dari `data_dir`."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        write_csv(path, rows, seed)
+    return path
+
+
+def measure(func, prepare, repeat=3):
+    """
+    (waktu terbaik dari `repeat` kali dalam detik, memori puncak Python/numpy dalam MB, hasil terakhir).
+    `prepare()` dipanggil sebelum setiap eksekusi, di luar pengukuran, sehingga tahap yang mengubah
+    masukannya (misalnya clean_data) selalu menerima masukan baru.
+    """
+    # Pemanasan (impor malas, cache internal pandas) agar tidak ikut terukur
+    result = func(*prepare())
+
+    # Memori diukur di eksekusi terpisah karena tracemalloc memperlambat eksekusi
+    del result
+    args = prepare()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(max(repeat, 1)):
+        del result, args
+        args = prepare()
+        gc.collect()
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, peak / 1024**2, result
+
+
+def run_benchmark(rows, seed=0, repeat=3, data_dir=DEFAULT_DATA_DIR, with_charts=False, on_stage=None):
+    """Menjalankan semua tahap untuk satu ukuran data; mengembalikan {tahap: {"seconds", "peak_mb"}}."""
+    ctx = {"path": dataset_path(rows, seed, data_dir)}
+    results = {}
+    for stage in _stages(with_charts):
+        seconds, peak_mb, ctx[stage.name] = measure(stage.run, lambda: stage.prepare(ctx), repeat)
+        results[stage.name] = {"seconds": round(seconds, 5), "peak_mb": round(peak_mb, 2)}
+        if on_stage is not None:
+            on_stage(rows, stage.name, results[stage.name])
+    return results
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def find_regressions(results, baseline, tolerance=0.25):
+    """
+    Daftar regresi (teks) dari `results` dibanding `baseline` (struktur sama, kunci ukuran berupa string).
+    Tahap/ukuran yang tidak ada di baseline dilewati.
+    """
+    regressions = []
+    for rows, stages in results.items():
+        for stage, current in stages.items():
+            reference = baseline.get(rows, {}).get(stage)
+            if reference is None:
+                continue
+            for metric, unit, min_delta in (("seconds", "detik", MIN_SECONDS_DELTA), ("peak_mb", "MB", MIN_MB_DELTA)):
+                limit = reference[metric] * (1 + tolerance)
+                if current[metric] > limit and current[metric] - reference[metric] > min_delta:
+                    regressions.append(
+                        f"{stage} ({int(rows):,} baris): {current[metric]:.3f} {unit} > batas {limit:.3f} {unit} "
+                        f"(baseline {reference[metric]:.3f})"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark waktu dan memori puncak pipeline dashboard pada data sintetis.")
+    parser.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="Ukuran data (default: 1000 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Pengulangan per tahap; waktu terbaik yang dipakai (default: 3)")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Direktori cache CSV sintetis")
+    parser.add_argument("--charts", action="store_true", help="Ukur juga PDF dengan gambar grafik (membutuhkan kaleido)")
+    parser.add_argument("--output", help="Tulis hasil ke file JSON ini")
+    parser.add_argument("--baseline", help="File baseline JSON; keluar dengan kode 1 jika ada regresi")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Toleransi perlambatan relatif terhadap baseline (default: 0.25)")
+    parser.add_argument("--save-baseline", help="Simpan hasil sebagai baseline baru di file ini")
+    args = parser.parse_args(argv)
+
+    def print_stage(rows, stage, result):
+        print(f"{rows:>12,} baris  {stage:<22} {result['seconds']:>9.4f} detik  {result['peak_mb']:>9.1f} MB", flush=True)
+
+    results = {
+        str(rows): run_benchmark(rows, args.seed, args.repeat, args.data_dir, args.charts, on_stage=print_stage)
+        for rows in args.rows
+    }
+    document = {"environment": environment(), "seed": args.seed, "results": results}
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(document, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != document["environment"]:
+            print("Peringatan: baseline dibuat di lingkungan yang berbeda; perbandingan waktu mungkin tidak akurat.")
+        regressions = find_regressions(results, baseline.get("results", {}), args.tolerance)
+        if regressions:
+            print(f"REGRESI ({len(regressions)}):")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"Tidak ada regresi (toleransi {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import hashlib
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from trends import SPIKE_THRESHOLD
+
+# Direktori cache gambar grafik statis (JPEG) untuk laporan PDF, dapat diubah lewat variabel lingkungan
+CHART_CACHE_DIR = os.environ.get("MEDINTEL_CHART_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".medintel", "charts"))
+
+# Jumlah proses perender gambar (kaleido); 0 atau 1 berarti dirender di proses pemanggil
+MAX_RENDER_WORKERS = int(os.environ.get("MEDINTEL_CHART_WORKERS", str(min(5, os.cpu_count() or 1))))
+
+IMAGE_WIDTH = 1000
+IMAGE_HEIGHT = 500
+IMAGE_SCALE = 2
+# JPEG disisipkan fpdf apa adanya, sedangkan PNG di-decode dan dikompresi ulang (jauh lebih lambat)
+IMAGE_FORMAT = "jpeg"
+
+# Versi tampilan grafik di kunci cache; dinaikkan jika isi grafik berubah (misalnya penanda lonjakan) agar gambar lama tidak dipakai
+CHART_STYLE_VERSION = 2
+
+# Warna latar gambar per tema (grafik dashboard berlatar transparan, PDF berlatar putih)
+THEME_BACKGROUNDS = {"light": "#ffffff", "dark": "#0e1117"}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _render_image(figure_json):
+    """Dijalankan di proses perender: figure JSON -> byte gambar."""
+    import plotly.io as pio
+    return pio.from_json(figure_json).to_image(format=IMAGE_FORMAT, width=IMAGE_WIDTH, height=IMAGE_HEIGHT, scale=IMAGE_SCALE)
+
+
+def _get_executor():
+    """Process pool perender yang dipakai bersama dan dipertahankan, sehingga Chromium kaleido hanya dimulai sekali per proses."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # 'spawn' karena server Streamlit multi-thread; fork dari proses multi-thread tidak aman
+            _executor = ProcessPoolExecutor(max_workers=MAX_RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _cache_path(fingerprint, theme, title, cache_dir=None):
+    raw = "\x1f".join([fingerprint, theme, title, f"{IMAGE_WIDTH}x{IMAGE_HEIGHT}@{IMAGE_SCALE}", f"v{CHART_STYLE_VERSION}:z{SPIKE_THRESHOLD}"])
+    name = hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+    return os.path.join(cache_dir or CHART_CACHE_DIR, f"{name}.jpg")
+
+
+def render_chart_images(aggs, fingerprint, theme="light", workers=None, cache_dir=None, stats=None):
+    """
+    Gambar JPEG kelima grafik dashboard untuk laporan (judul grafik -> byte JPEG), berurutan seperti di dashboard.
+    Gambar di-cache di disk berdasarkan sidik jari data, tema, dan judul grafik; figure hanya dibangun dan
+    dirender untuk gambar yang belum ada, paralel di process pool (`workers=0` merender di proses ini, misalnya di dalam worker batch).
+    `stats` opsional berupa dict yang diisi jumlah gambar dari cache dan yang dirender.
+    """
+    from charts import FIGURE_BUILDERS, build_figures
+
+    workers = MAX_RENDER_WORKERS if workers is None else workers
+    images = {}
+    missing = {}
+    for title in FIGURE_BUILDERS:
+        path = _cache_path(fingerprint, theme, title, cache_dir)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                images[title] = f.read()
+        else:
+            missing[title] = path
+
+    # Figure hanya dibangun untuk grafik yang gambarnya belum ada di cache
+    figures = build_figures(aggs, is_dark_mode=(theme == "dark"), allow_webgl=False, titles=missing) if missing else {}
+    background = THEME_BACKGROUNDS.get(theme, THEME_BACKGROUNDS["light"])
+    for title, figure in figures.items():
+        figure.update_layout(paper_bgcolor=background, plot_bgcolor=background)
+        missing[title] = (missing[title], figure.to_json())
+
+    if stats is not None:
+        stats["cached_images"] = len(images)
+        stats["rendered_images"] = len(missing)
+
+    if missing:
+        payloads = [figure_json for _, figure_json in missing.values()]
+        if workers > 1 and len(payloads) > 1:
+            rendered = list(_get_executor().map(_render_image, payloads))
+        else:
+            rendered = [_render_image(payload) for payload in payloads]
+
+        os.makedirs(cache_dir or CHART_CACHE_DIR, exist_ok=True)
+        for (title, (path, _)), image in zip(missing.items(), rendered):
+            images[title] = image
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(image)
+            os.replace(temp_path, path)
+
+    return {title: images[title] for title in FIGURE_BUILDERS}
@@ -0,0 +1,161 @@
+import plotly.express as px
+import plotly.graph_objects as go
+
+from downsample import downsample_trend, trend_figure
+
+
+def get_common_plotly_layout(title_text, is_dark_mode=False):
+    """Mengembalikan layout Plotly umum dengan adaptasi tema."""
+    text_color = "white" if is_dark_mode else "#2C3E50" # Warna teks untuk mode gelap/terang
+    grid_color = "#4a5568" if is_dark_mode else "#e2e8f0" # Warna grid untuk mode gelap/terang
+
+    return {
+        'title': {'text': title_text, 'font': {'size': 24, 'color': text_color}},
+        'paper_bgcolor': 'rgba(0,0,0,0)', # Latar belakang transparan
+        'plot_bgcolor': 'rgba(0,0,0,0)', # Latar belakang transparan
+        'height': 400,
+        'margin': {'t': 50, 'b': 50, 'l': 50, 'r': 50},
+        'font': {'color': text_color},
+        'xaxis': {
+            'gridcolor': grid_color,
+            'linecolor': text_color,
+            'tickfont': {'color': text_color},
+            'titlefont': {'color': text_color}
+        },
+        'yaxis': {
+            'gridcolor': grid_color,
+            'linecolor': text_color,
+            'tickfont': {'color': text_color},
+            'titlefont': {'color': text_color}
+        },
+        'legend': {
+            'font': {'color': text_color}
+        }
+    }
+
+def get_chart_colors(is_dark_mode=False):
+    """Mengembalikan daftar warna untuk grafik berdasarkan tema."""
+    if is_dark_mode:
+        return ['#66d9ef', '#a78bfa', '#ff66c4', '#66ff99', '#ffcc66'] # Biru muda, ungu muda, pink, hijau muda, oranye muda
+    else:
+        return ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd'] # Warna default Plotly
+
+
+def sentiment_figure(aggs, is_dark_mode=False):
+    """Grafik 1: Distribusi Sentimen (Pie Chart)."""
+    sentiment_counts = aggs.sentiment_counts
+    fig_sentiment = go.Figure(data=[go.Pie(
+        labels=sentiment_counts.index,
+        values=sentiment_counts.values,
+        hole=0.4,
+        marker_colors=px.colors.sequential.Bluyl if is_dark_mode else px.colors.sequential.Blues,
+        hoverinfo='label+percent+value',
+        textinfo='percent',
+        textposition='inside'
+    )])
+    fig_sentiment.update_layout(get_common_plotly_layout("Distribusi Sentimen", is_dark_mode))
+    return fig_sentiment
+
+
+def engagement_trend_figure(trend, is_dark_mode=False, allow_webgl=True, trends=None):
+    """
+    Grafik 2: Tren Engagement Seiring Waktu (Line Chart). Mengembalikan (figure, jumlah titik tren yang digambar).
+    Jika `trends` (TrendAnalysis) diberikan, rata-rata bergerak 7 hari (granularitas harian) dan penanda
+    lonjakan di dalam rentang `trend` ikut digambar.
+    """
+    colors = get_chart_colors(is_dark_mode)
+    fig_engagement_trend, points = trend_figure(trend, colors[0], allow_webgl=allow_webgl)
+    if trends is not None and not trends.empty and not trend.empty:
+        start, end = trend['date'].min(), trend['date'].max()
+        if trends.granularity == "day":
+            rolling = trends.rolling_frame()
+            rolling = downsample_trend(rolling[(rolling['date'] >= start) & (rolling['date'] <= end)])
+            fig_engagement_trend.add_trace(go.Scatter(
+                x=rolling['date'],
+                y=rolling['engagements'],
+                mode="lines",
+                line=dict(color=colors[4], dash="dash"),
+                name="rata-rata 7 hari",
+                hovertemplate="date=%{x}<br>rata-rata 7 hari=%{y:,.0f}<extra></extra>",
+            ))
+        spikes = trends.spikes_for("total")
+        spikes = spikes[(spikes['date'] >= start) & (spikes['date'] <= end)]
+        if not spikes.empty:
+            fig_engagement_trend.add_trace(go.Scatter(
+                x=spikes['date'],
+                y=spikes['engagements'],
+                mode="markers",
+                marker=dict(color=colors[3], size=11, symbol="triangle-up"),
+                name="lonjakan",
+                customdata=spikes[['expected', 'score']].to_numpy(),
+                hovertemplate="date=%{x}<br>engagements=%{y:,.0f}<br>perkiraan=%{customdata[0]:,.0f}<br>skor=%{customdata[1]:.1f}<extra></extra>",
+            ))
+    fig_engagement_trend.update_layout(get_common_plotly_layout("Tren Engagement Seiring Waktu", is_dark_mode))
+    return fig_engagement_trend, points
+
+
+def platform_figure(aggs, is_dark_mode=False):
+    """Grafik 3: Engagement Berdasarkan Platform (Bar Chart)."""
+    platform_engagements = aggs.platform_engagements.reset_index()
+    platform_engagements.columns = ['platform', 'engagements'] # Memastikan nama kolom
+    fig_platform = px.bar(
+        platform_engagements,
+        x='platform',
+        y='engagements',
+        color_discrete_sequence=[get_chart_colors(is_dark_mode)[1]]
+    )
+    fig_platform.update_layout(get_common_plotly_layout("Total Engagement per Platform", is_dark_mode))
+    return fig_platform
+
+
+def media_type_figure(aggs, is_dark_mode=False):
+    """Grafik 4: Campuran Tipe Media (Pie Chart)."""
+    media_type_counts = aggs.media_type_counts
+    fig_media_type = go.Figure(data=[go.Pie(
+        labels=media_type_counts.index,
+        values=media_type_counts.values,
+        hole=0.4,
+        marker_colors=px.colors.sequential.Aggrnyl if is_dark_mode else px.colors.sequential.Greens,
+        hoverinfo='label+percent+value',
+        textinfo='percent',
+        textposition='inside'
+    )])
+    fig_media_type.update_layout(get_common_plotly_layout("Campuran Tipe Media", is_dark_mode))
+    return fig_media_type
+
+
+def location_figure(aggs, is_dark_mode=False):
+    """Grafik 5: Top 5 Lokasi (Bar Chart)."""
+    location_counts = aggs.location_counts.head(5).reset_index()
+    location_counts.columns = ['location', 'count'] # Mengubah nama kolom untuk kejelasan
+    fig_locations = px.bar(
+        location_counts,
+        x='location',
+        y='count',
+        color_discrete_sequence=[get_chart_colors(is_dark_mode)[2]]
+    )
+    fig_locations.update_layout(get_common_plotly_layout("Top 5 Lokasi berdasarkan Jumlah Aktivitas", is_dark_mode))
+    return fig_locations
+
+
+# Pembuat figure per judul bagian, berurutan seperti di dashboard dan laporan PDF
+FIGURE_BUILDERS = {
+    "Distribusi Sentimen": lambda aggs, is_dark_mode, allow_webgl: sentiment_figure(aggs, is_dark_mode),
+    "Tren Engagement Seiring Waktu": lambda aggs, is_dark_mode, allow_webgl:
+        engagement_trend_figure(aggs.daily_engagements, is_dark_mode, allow_webgl, aggs.trends)[0],
+    "Engagement Berdasarkan Platform": lambda aggs, is_dark_mode, allow_webgl: platform_figure(aggs, is_dark_mode),
+    "Campuran Tipe Media": lambda aggs, is_dark_mode, allow_webgl: media_type_figure(aggs, is_dark_mode),
+    "Top 5 Lokasi": lambda aggs, is_dark_mode, allow_webgl: location_figure(aggs, is_dark_mode),
+}
+
+
+def build_figures(aggs, is_dark_mode=False, allow_webgl=True, titles=None):
+    """
+    Grafik dashboard berurutan (judul bagian -> figure), dipakai oleh dashboard dan laporan PDF.
+    `titles` membatasi grafik yang dibangun (default: kelimanya).
+    """
+    return {
+        title: build(aggs, is_dark_mode, allow_webgl)
+        for title, build in FIGURE_BUILDERS.items()
+        if titles is None or title in titles
+    }
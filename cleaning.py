@@ -0,0 +1,173 @@
+import numpy as np
+import pandas as pd
+
+# Kolom teks yang nilainya berulang (sedikit nilai unik untuk jutaan baris)
+CATEGORY_COLUMNS = ['platform', 'sentiment', 'location', 'media_type', 'influencer_brand', 'post_type']
+
+# Format tanggal yang dicoba berurutan pada nilai unik kolom 'date' (label, format pandas)
+DATE_FORMATS = [
+    ('ISO 8601', 'ISO8601'),
+    ('dd/mm/yyyy', '%d/%m/%Y'),
+    ('dd/mm/yyyy hh:mm', '%d/%m/%Y %H:%M'),
+    ('dd/mm/yyyy hh:mm:ss', '%d/%m/%Y %H:%M:%S'),
+    ('dd-mm-yyyy', '%d-%m-%Y'),
+]
+FALLBACK_DATE_LABEL = 'format lain'
+
+# Kolom teks hanya diubah menjadi kategori jika rasio nilai unik per baris di bawah batas ini
+MAX_CATEGORY_RATIO = 0.5
+
+
+def clean_data(df, notify=None, compact=True, stats=None):
+    """
+    Membersihkan dan memproses DataFrame:
+    - Mengkonversi 'Date' ke format datetime.
+    - Mengisi 'Engagements' yang hilang dengan 0.
+    - Menormalisasi nama kolom (huruf kecil, ganti spasi dengan underscore).
+    - Memastikan kolom 'influencer_brand' dan 'post_type' ada.
+    - Jika `compact`, mengubah kolom teks menjadi kategori, memperkecil tipe integer
+      'engagements', dan menambahkan kolom 'day' (tanggal tanpa jam).
+
+    `notify(level, message)` opsional dipanggil untuk pesan 'error' atau 'warning'
+    (di dashboard diteruskan ke st.error/st.warning).
+    `stats` opsional berupa dict yang ditambah (akumulatif, aman untuk per-potongan) dengan
+    jumlah baris per format tanggal ('date_formats') dan baris yang dibuang ('dropped_rows').
+    """
+    if notify is None:
+        notify = lambda level, message: None
+
+    if df.empty:
+        return pd.DataFrame()
+
+    df.columns = df.columns.map(normalize_column_name)
+
+    # Mengkonversi kolom 'date'
+    if 'date' in df.columns:
+        df['date'] = parse_dates(df['date'], stats)
+        valid = df['date'].notna().to_numpy()
+        if stats is not None:
+            stats['dropped_rows'] = stats.get('dropped_rows', 0) + int((~valid).sum())
+        if not valid.all():
+            df = df.take(np.flatnonzero(valid)) # Menghapus baris yang gagal dikonversi tanggal
+    else:
+        notify('error', "Error: Kolom 'Date' tidak ditemukan dalam data.")
+        return pd.DataFrame()
+
+    # Mengkonversi kolom 'engagements'
+    if 'engagements' in df.columns:
+        df['engagements'] = pd.to_numeric(df['engagements'], errors='coerce').fillna(0)
+    else:
+        notify('warning', "Peringatan: Kolom 'Engagements' tidak ditemukan. Mengatur semua engagement ke 0.")
+        df['engagements'] = 0
+
+    # Memastikan kolom-kolom lain yang diharapkan ada, isi dengan 'Unknown' jika hilang
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns:
+            df[col] = 'Unknown'
+        else:
+            df[col] = fill_unknown(df[col]) # Mengisi nilai NaN yang ada di kolom
+
+    if compact:
+        df = compact_frame(df)
+
+    return df
+
+
+def normalize_column_name(name):
+    """Nama kolom baku: huruf kecil, spasi diganti underscore ('Media Type' -> 'media_type')."""
+    return str(name).lower().replace(' ', '_')
+
+
+def parse_dates(series, stats=None):
+    """
+    Mengkonversi kolom tanggal dengan format campuran secara cepat:
+    setiap string unik hanya di-parse sekali, format pada DATE_FORMATS dicoba secara vektor
+    pada nilai yang belum berhasil, dan sisanya di-parse satu per satu sebagai jalan terakhir.
+    Tanggal bertimezone dikonversi ke UTC tanpa info timezone agar satu kolom tetap seragam.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series):
+        if getattr(series.dt, 'tz', None) is not None:
+            series = series.dt.tz_convert(None)
+        if stats is not None:
+            date_formats = stats.setdefault('date_formats', {})
+            date_formats['datetime'] = date_formats.get('datetime', 0) + int(series.notna().sum())
+        return series
+
+    codes, uniques = pd.factorize(series)
+    uniques = pd.Index(uniques).astype(str)
+    parsed = np.full(len(uniques), np.datetime64('NaT'), dtype='datetime64[ns]')
+    labels = np.full(len(uniques), None, dtype=object)
+    remaining = np.ones(len(uniques), dtype=bool)
+
+    candidates = DATE_FORMATS + [(FALLBACK_DATE_LABEL, 'mixed')]
+    for label, date_format in candidates:
+        if not remaining.any():
+            break
+        positions = np.flatnonzero(remaining)
+        extra = {'dayfirst': True} if date_format == 'mixed' else {}
+        attempt = pd.to_datetime(uniques[positions], format=date_format, errors='coerce', utc=True, **extra)
+        matched = attempt.notna()
+        if matched.any():
+            parsed[positions[matched]] = attempt[matched].tz_localize(None).to_numpy()
+            labels[positions[matched]] = label
+            remaining[positions[matched]] = False
+
+    if stats is not None and len(uniques):
+        rows_per_unique = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        date_formats = stats.setdefault('date_formats', {})
+        for label, _ in candidates:
+            rows = int(rows_per_unique[labels == label].sum())
+            if rows:
+                date_formats[label] = date_formats.get(label, 0) + rows
+
+    result = np.where(codes >= 0, parsed[codes], np.datetime64('NaT'))
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def date_parse_summary(stats):
+    """Teks ringkasan jumlah baris per format tanggal dan baris yang dibuang."""
+    date_formats = stats.get('date_formats', {})
+    matched = ", ".join(f"{label}: {rows:,}" for label, rows in sorted(date_formats.items(), key=lambda item: -item[1]))
+    return f"Format tanggal terdeteksi ({matched or 'tidak ada'}). Baris dibuang karena tanggal tidak valid: {stats.get('dropped_rows', 0):,}."
+
+
+def fill_unknown(series):
+    """Mengisi nilai kosong dengan 'Unknown', termasuk untuk kolom bertipe kategori."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and 'Unknown' not in series.cat.categories:
+        series = series.cat.add_categories(['Unknown'])
+    return series.fillna('Unknown')
+
+
+def downcast_engagements(series):
+    """Memperkecil tipe 'engagements' ke integer terkecil jika semua nilainya bulat."""
+    values = series.to_numpy()
+    if series.dtype.kind == 'f' and not np.array_equal(values, np.floor(values)):
+        return series
+    return pd.to_numeric(series, downcast='integer')
+
+
+def compact_frame(df):
+    """
+    Representasi kolumnar yang ringkas agar groupby/value_counts berjalan di atas kode, bukan string:
+    kolom teks berulang menjadi kategori, 'engagements' di-downcast, dan kolom 'day' dinormalisasi.
+    """
+    df = df.copy(deep=False)
+    row_count = max(len(df), 1)
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and df[col].dtype == object:
+            # Satu kali factorize: kode dipakai ulang untuk membentuk kategori tanpa hash ulang
+            codes, uniques = pd.factorize(df[col])
+            if len(uniques) / row_count <= MAX_CATEGORY_RATIO:
+                df[col] = pd.Categorical.from_codes(codes, categories=uniques)
+
+    if 'engagements' in df.columns:
+        df['engagements'] = downcast_engagements(df['engagements'])
+    if 'date' in df.columns:
+        df['day'] = df['date'].dt.normalize()
+    return df
+
+
+def memory_report(before_bytes, after_bytes):
+    """Teks singkat perbandingan pemakaian memori sebelum dan sesudah pembersihan."""
+    saved = 1 - after_bytes / before_bytes if before_bytes else 0.0
+    return f"Memori data: {before_bytes / 1024**2:,.1f} MB sebelum, {after_bytes / 1024**2:,.1f} MB setelah optimasi ({saved:.0%} lebih hemat)."
@@ -0,0 +1,292 @@
+import atexit
+import hashlib
+import os
+import shutil
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+# Batas memori default cache dataset (MB), dapat diubah lewat variabel lingkungan
+DEFAULT_MAX_MB = int(os.environ.get("MEDINTEL_DATASET_CACHE_MB", "1024"))
+
+# Direktori spill dataset yang dikeluarkan dari memori (kosong = tanpa spill) dan batas ukurannya di disk (MB)
+DEFAULT_SPILL_DIR = os.environ.get("MEDINTEL_DATASET_SPILL_DIR", "")
+DEFAULT_SPILL_MB = int(os.environ.get("MEDINTEL_DATASET_SPILL_MB", "4096"))
+
+
+@dataclass
+class CacheEntry:
+    """
+    Satu entri cache: DataFrame bersih beserta pesan pembersihan dan ukurannya di memori.
+    DataFrame dipakai bersama oleh semua sesi yang membuka dataset yang sama, jadi harus diperlakukan
+    hanya-baca (operasi yang mengubah data selalu bekerja pada salinan).
+    """
+    df: pd.DataFrame
+    nbytes: int
+    messages: list = field(default_factory=list)
+    source_nbytes: int = 0 # Ukuran data mentah sebelum pembersihan (0 jika tidak diukur)
+    stats: dict = field(default_factory=dict) # Statistik pembersihan (format tanggal, baris dibuang)
+    key: str = ""
+    refs: int = 0 # Jumlah lease (sesi) yang sedang memakai entri ini
+    _aggs: object = field(default=None, repr=False)
+    _aggs_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def aggregates(self):
+        """AggregateBundle dataset ini, dihitung sekali lalu dipakai bersama oleh semua sesi."""
+        with self._aggs_lock:
+            if self._aggs is None:
+                from aggregates import get_aggregates
+                self._aggs = get_aggregates(self.df, self.key or None)
+            return self._aggs
+
+
+@dataclass
+class SpillRecord:
+    """Entri yang sudah dipindahkan ke disk (Arrow IPC) beserta metadata untuk memuatnya kembali."""
+    path: str
+    file_bytes: int
+    messages: list
+    source_nbytes: int
+    stats: dict
+
+
+class DatasetLease:
+    """
+    Referensi satu sesi ke entri cache. Selama lease ada, entri tidak dikeluarkan dari memori.
+    Lease dilepas dengan `release()` atau otomatis saat objeknya dibuang (misalnya state sesi berakhir).
+    """
+
+    def __init__(self, cache, entry):
+        self.entry = entry
+        self._finalizer = weakref.finalize(self, cache._release, entry.key)
+
+    @property
+    def key(self):
+        return self.entry.key
+
+    @property
+    def df(self):
+        return self.entry.df
+
+    def aggregates(self):
+        return self.entry.aggregates()
+
+    def release(self):
+        self._finalizer()
+
+    @property
+    def released(self):
+        return not self._finalizer.alive
+
+
+def frame_nbytes(df):
+    """Perkiraan ukuran DataFrame di memori (termasuk isi string)."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+class DatasetCache:
+    """
+    Cache dataset bersih untuk seluruh proses, dialamatkan berdasarkan konten (hash file atau sidik jari data),
+    dengan batas memori dalam byte. Sesi memegang `DatasetLease`, sehingga N sesi yang membuka file yang sama
+    memakai satu DataFrame dan satu AggregateBundle. Saat batas terlampaui, entri yang tidak sedang dipakai
+    dan paling lama tidak diakses dikeluarkan lebih dulu; jika `spill_dir` diatur, entri tersebut ditulis ke
+    disk (Arrow IPC) dan dimuat kembali tanpa parsing ulang saat diminta lagi. File dibaca lewat memory-map,
+    tetapi DataFrame hasilnya tetap berada di heap (satu salinan data, lihat `_read_spill`).
+    Aman dipakai bersamaan oleh beberapa sesi Streamlit (thread).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, spill_dir=DEFAULT_SPILL_DIR, spill_max_bytes=DEFAULT_SPILL_MB * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.spill_max_bytes = spill_max_bytes
+        self.spill_bytes = 0
+        # Subdirektori per proses agar beberapa proses server tidak saling menimpa file spill
+        self.spill_dir = os.path.join(spill_dir, f"proc-{os.getpid()}") if spill_dir else ""
+        self.hits = 0
+        self.misses = 0
+        self.spills = 0
+        self.reloads = 0
+        self._entries = OrderedDict()
+        self._spilled = OrderedDict()
+        self._lock = threading.Lock()
+        if self.spill_dir:
+            atexit.register(shutil.rmtree, self.spill_dir, True)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries or key in self._spilled
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """
+        Mengembalikan CacheEntry untuk `key` (dan menandainya baru dipakai), atau None. Entri yang sudah di-spill
+        dimuat kembali dan dimasukkan lagi seperti `put`, sehingga entri lain tanpa lease dapat dikeluarkan.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            spilled = self._spilled.pop(key, None)
+            if spilled is None:
+                self.misses += 1
+                return None
+            self.spill_bytes -= spilled.file_bytes
+
+        try:
+            df = _read_spill(spilled.path)
+        except Exception:
+            with self._lock:
+                self.misses += 1
+            return None
+        finally:
+            _remove_file(spilled.path)
+        with self._lock:
+            self.reloads += 1
+        return self.put(key, df, spilled.messages, spilled.source_nbytes, spilled.stats)
+
+    def put(self, key, df, messages=None, source_nbytes=0, stats=None):
+        """
+        Menyimpan `df` dengan kunci `key` dan mengembalikan CacheEntry-nya. Karena kunci dialamatkan
+        berdasarkan konten, entri yang sudah ada dengan kunci yang sama dikembalikan apa adanya.
+        DataFrame yang lebih besar dari seluruh batas memori tidak disimpan (kecuali lewat `share`).
+        """
+        return self._insert(key, df, messages, source_nbytes, stats, acquire=False)
+
+    def share(self, key, df, messages=None, source_nbytes=0, stats=None):
+        """
+        Menyimpan `df` (jika `key` belum ada) lalu mengembalikan DatasetLease-nya. Jika dataset dengan kunci
+        yang sama sudah dibuka sesi lain, lease menunjuk ke DataFrame yang sudah ada, bukan salinan baru.
+        """
+        return DatasetLease(self, self._insert(key, df, messages, source_nbytes, stats, acquire=True))
+
+    def _insert(self, key, df, messages, source_nbytes, stats, acquire):
+        # Ukuran dihitung di luar lock (memory_usage deep memindai kolom teks)
+        nbytes = None if key in self else frame_nbytes(df)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = CacheEntry(df=df, nbytes=frame_nbytes(df) if nbytes is None else nbytes, messages=list(messages or []),
+                                   source_nbytes=source_nbytes, stats=dict(stats or {}), key=key)
+                if acquire or entry.nbytes <= self.max_bytes:
+                    self._entries[key] = entry
+                    self.current_bytes += entry.nbytes
+            else:
+                self._entries.move_to_end(key)
+            if acquire:
+                entry.refs += 1
+            # Entri yang baru dimasukkan atau dimuat kembali akan segera dipakai pemanggil; tidak ikut dikeluarkan
+            evicted = self._evict_locked(keep=key)
+        self._spill(evicted)
+        return entry
+
+    def _release(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.refs == 0:
+                return
+            entry.refs -= 1
+            evicted = self._evict_locked()
+        self._spill(evicted)
+
+    def _evict_locked(self, keep=None):
+        """
+        Mengeluarkan entri tanpa lease (selain `keep`), mulai dari yang paling lama tidak dipakai, sampai di bawah batas.
+        """
+        evicted = []
+        if self.current_bytes <= self.max_bytes:
+            return evicted
+        for key in list(self._entries):
+            if self.current_bytes <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry.refs or key == keep:
+                continue
+            del self._entries[key]
+            self.current_bytes -= entry.nbytes
+            evicted.append(entry)
+        return evicted
+
+    def _spill(self, evicted):
+        """Menulis entri yang dikeluarkan ke disk (di luar lock) jika spill diaktifkan."""
+        if not self.spill_dir or not evicted:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        for entry in evicted:
+            path = os.path.join(self.spill_dir, hashlib.blake2b(entry.key.encode("utf-8"), digest_size=16).hexdigest() + ".arrow")
+            try:
+                file_bytes = _write_spill(entry.df, path)
+            except Exception:
+                _remove_file(path)
+                continue
+            with self._lock:
+                self.spills += 1
+                self._spilled[entry.key] = SpillRecord(path, file_bytes, entry.messages, entry.source_nbytes, entry.stats)
+                self.spill_bytes += file_bytes
+                while self.spill_bytes > self.spill_max_bytes and self._spilled:
+                    _, oldest = self._spilled.popitem(last=False)
+                    self.spill_bytes -= oldest.file_bytes
+                    _remove_file(oldest.path)
+
+    def stats(self):
+        """Ringkasan cache untuk panel dashboard."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "leased_entries": sum(1 for entry in self._entries.values() if entry.refs),
+                "leases": sum(entry.refs for entry in self._entries.values()),
+                "spilled_entries": len(self._spilled),
+                "spill_bytes": self.spill_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "spills": self.spills,
+                "reloads": self.reloads,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            for spilled in self._spilled.values():
+                _remove_file(spilled.path)
+            self._spilled.clear()
+            self.spill_bytes = 0
+
+
+def _write_spill(df, path):
+    """Menulis DataFrame sebagai file Arrow IPC tanpa kompresi (dapat di-memory-map); mengembalikan ukuran file."""
+    import pyarrow as pa
+    table = pa.Table.from_pandas(df)
+    temp_path = f"{path}.tmp"
+    with pa.OSFile(temp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+def _read_spill(path):
+    """
+    Membaca file spill lewat memory-map (tanpa buffer baca tambahan). Konversi ke pandas tetap menyalin data
+    ke heap: kolom kategori dan teks tidak dapat dipakai langsung dari buffer Arrow. `split_blocks` mencegah
+    salinan kedua saat kolom digabung ke blok 2D, dan `self_destruct` melepas buffer Arrow selama konversi.
+    """
+    import pyarrow as pa
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+        return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
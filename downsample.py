@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Jumlah titik maksimum yang dikirim ke browser untuk satu grafik tren (kira-kira lebar grafik dalam piksel)
+MAX_TREND_POINTS = int(os.environ.get("MEDINTEL_TREND_MAX_POINTS", "1500"))
+
+# Di atas jumlah titik ini grafik memakai Scattergl (WebGL) dan marker disembunyikan
+WEBGL_THRESHOLD = 1000
+MARKER_THRESHOLD = 200
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Indeks titik terpilih dengan algoritma Largest-Triangle-Three-Buckets: titik pertama dan terakhir
+    selalu dipertahankan, lalu dari setiap bucket dipilih titik yang membentuk segitiga terbesar
+    dengan titik terpilih sebelumnya dan rata-rata bucket berikutnya.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+
+def minmax_indices(y, threshold):
+    """Indeks nilai minimum dan maksimum di setiap bucket (threshold // 2 bucket), berurutan."""
+    n = len(y)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(0, n, threshold // 2 + 1).astype(int)
+    selected = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            selected += [start + int(y[start:end].argmin()), start + int(y[start:end].argmax())]
+    return np.unique(selected)
+
+
+def downsample_trend(trend, max_points=MAX_TREND_POINTS, method="lttb"):
+    """
+    Memperkecil DataFrame tren ('date', 'engagements') menjadi paling banyak `max_points` titik.
+    Puncak dan titik terendah global selalu dipertahankan agar sesuai dengan wawasan teks.
+    Mengembalikan DataFrame baru (atau `trend` apa adanya jika sudah cukup kecil).
+    """
+    if len(trend) <= max_points:
+        return trend
+
+    values = trend['engagements'].to_numpy()
+    if method == "minmax":
+        selected = minmax_indices(values, max_points - 2)
+    else:
+        x = trend['date'].to_numpy().astype('datetime64[ns]').astype(np.int64)
+        selected = lttb_indices(x, values, max_points - 2)
+    selected = np.unique(np.concatenate([selected, [values.argmax(), values.argmin()]]))
+    return trend.iloc[selected]
+
+
+def trend_figure(trend, color, max_points=MAX_TREND_POINTS, allow_webgl=True):
+    """
+    Figure garis tren dengan jumlah titik dibatasi `max_points`: seri besar di-downsample dan
+    digambar dengan Scattergl, seri kecil tetap memakai Scatter dengan marker seperti sebelumnya.
+    `allow_webgl=False` selalu memakai Scatter (untuk ekspor gambar statis).
+    Mengembalikan (figure, jumlah titik yang digambar).
+    """
+    points = downsample_trend(trend, max_points)
+    trace_type = go.Scattergl if allow_webgl and len(points) > WEBGL_THRESHOLD else go.Scatter
+    figure = go.Figure(trace_type(
+        x=points['date'],
+        y=points['engagements'],
+        mode="lines+markers" if len(points) <= MARKER_THRESHOLD else "lines",
+        line=dict(color=color),
+        name="engagements",
+        hovertemplate="date=%{x}<br>engagements=%{y}<extra></extra>",
+    ))
+    figure.update_layout(xaxis_title="date", yaxis_title="engagements")
+    return figure, len(points)
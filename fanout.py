@@ -0,0 +1,113 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from ai_client import openrouter_client
+from llm_cache import response_cache
+
+# Model Gemini yang dipakai untuk analisis AI
+GEMINI_MODEL = 'gemini-2.0-flash'
+
+# Jumlah maksimum permintaan model yang berjalan bersamaan
+MAX_PARALLEL_MODELS = 4
+
+
+@dataclass
+class ModelResult:
+    """Hasil satu model dalam perbandingan: teks, latensi, jumlah token, dan status kegagalan."""
+    provider: str
+    model: str
+    text: str = ""
+    latency_s: float = 0.0
+    ttft_s: float = None # Waktu hingga potongan teks pertama (sama dengan latency_s tanpa streaming)
+    prompt_tokens: int = None
+    completion_tokens: int = None
+    error: str = ""
+    cached: bool = False
+
+    @property
+    def ok(self):
+        return not self.error
+
+
+def _call_gemini(model, prompt):
+    import google.generativeai as genai # Diimpor saat dibutuhkan: modul ini berat untuk cold start
+
+    response = genai.GenerativeModel(model).generate_content(prompt)
+    usage = getattr(response, "usage_metadata", None)
+    return (
+        response.text,
+        getattr(usage, "prompt_token_count", None),
+        getattr(usage, "candidates_token_count", None),
+    )
+
+
+def _stream_gemini(model, prompt):
+    import google.generativeai as genai
+
+    for chunk in genai.GenerativeModel(model).generate_content(prompt, stream=True):
+        yield chunk.text
+
+
+def _call_openrouter(api_key, model, prompt):
+    result = openrouter_client.create_chat_completion(api_key, model, [{"role": "user", "content": prompt}])
+    usage = result.get("usage") or {}
+    return (
+        result["choices"][0]["message"]["content"],
+        usage.get("prompt_tokens"),
+        usage.get("completion_tokens"),
+    )
+
+
+def run_model(provider, model, prompt, openrouter_api_key=None, on_chunk=None):
+    """
+    Menjalankan satu model (memakai cache respons jika ada); kegagalan dicatat di `error`, tidak dilempar.
+    Dengan `on_chunk`, jawaban diminta secara streaming dan setiap potongan teks diteruskan segera setelah tiba.
+    """
+    result = ModelResult(provider=provider, model=model)
+    started = time.perf_counter()
+    try:
+        cached_response = response_cache.get(provider, model, prompt)
+        if cached_response is not None:
+            result.text = cached_response
+            result.cached = True
+        else:
+            if provider != "gemini" and not openrouter_api_key:
+                raise ValueError("OpenRouter API Key belum diisi.")
+            if on_chunk is not None:
+                chunks = _stream_gemini(model, prompt) if provider == "gemini" else openrouter_client.stream_chat_completion(
+                    openrouter_api_key, model, [{"role": "user", "content": prompt}])
+                parts = []
+                for chunk in chunks:
+                    if result.ttft_s is None:
+                        result.ttft_s = round(time.perf_counter() - started, 3)
+                    parts.append(chunk)
+                    on_chunk(chunk)
+                text, prompt_tokens, completion_tokens = "".join(parts), None, None
+            elif provider == "gemini":
+                text, prompt_tokens, completion_tokens = _call_gemini(model, prompt)
+            else:
+                text, prompt_tokens, completion_tokens = _call_openrouter(openrouter_api_key, model, prompt)
+            result.text = text
+            result.prompt_tokens = prompt_tokens
+            result.completion_tokens = completion_tokens
+            response_cache.put(provider, model, prompt, text)
+    except Exception as e:
+        result.error = str(e) or type(e).__name__
+    result.latency_s = round(time.perf_counter() - started, 3)
+    if result.ttft_s is None:
+        result.ttft_s = result.latency_s
+    return result
+
+
+def fan_out(prompt, targets, openrouter_api_key=None, max_workers=MAX_PARALLEL_MODELS):
+    """
+    Mengirim prompt yang sama ke beberapa model secara bersamaan dengan thread pool terbatas.
+    `targets` berisi pasangan (provider, model) dengan provider 'gemini' atau 'openrouter'.
+    Hasil dikembalikan dengan urutan yang sama seperti `targets`.
+    """
+    if not targets:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as executor:
+        futures = [executor.submit(run_model, provider, model, prompt, openrouter_api_key) for provider, model in targets]
+        return [future.result() for future in futures]
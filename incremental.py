@@ -0,0 +1,128 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from aggregates import AggregateBundle, build_base_table
+from cleaning import CATEGORY_COLUMNS
+
+def key_columns(df):
+    """
+    Kolom kategori (cleaning.CATEGORY_COLUMNS) yang ada di `df`; kunci baris dibentuk dari 'date', 'engagements',
+    dan kolom-kolom ini (lihat `row_keys`). Dataset tersimpan yang dibuka dengan store.DASHBOARD_COLUMNS tidak
+    memuat semua kolom kategori (misalnya post_type), jadi hanya kolom yang tersedia yang dipakai.
+    """
+    return [col for col in CATEGORY_COLUMNS if col in df.columns]
+
+
+def row_keys(df, columns=CATEGORY_COLUMNS):
+    """
+    Hash 64-bit per baris dari 'date', 'engagements', dan kolom kategori `columns`. Nilai diseragamkan
+    lebih dulu (tanggal ke int64, engagement ke float, teks/kategori ke string) agar baris yang sama
+    menghasilkan hash yang sama meskipun tipe kolom antar batch berbeda (misalnya kategori vs object,
+    int8 vs int64). Riwayat dan setiap batch harus di-hash dengan `columns` yang sama.
+    """
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+    canonical = pd.DataFrame({
+        'date': df['date'].to_numpy().astype('datetime64[ns]').astype(np.int64),
+        'engagements': df['engagements'].to_numpy(dtype=float),
+        **{col: df[col].astype(str).to_numpy() for col in columns},
+    })
+    return pd.util.hash_pandas_object(canonical, index=False, categorize=True).to_numpy()
+
+
+def concat_frames(frames):
+    """Menggabungkan potongan data bersih; kolom kategori digabung dengan union_categoricals agar tetap kategori."""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    combined = pd.concat(frames, ignore_index=True)
+    for col in combined.columns:
+        parts = [frame[col] for frame in frames if col in frame.columns]
+        if len(parts) == len(frames) and all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+            combined[col] = union_categoricals(parts, ignore_order=True)
+    return combined
+
+
+def contains_sorted(sorted_keys, keys):
+    """Mask boolean: apakah setiap elemen `keys` ada di array terurut `sorted_keys` (pencarian biner)."""
+    if not len(sorted_keys):
+        return np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return sorted_keys[positions] == keys
+
+
+class IncrementalDataset:
+    """
+    Dataset yang tumbuh per batch (misalnya ekspor harian). Setiap batch baru dideduplikasi terhadap
+    indeks hash baris yang sudah ada (array uint64 terurut), lalu hanya baris barunya yang dilipat
+    ke tabel `base` agregat. Riwayat tidak pernah dibersihkan atau diagregasi ulang.
+    Kolom kunci baris ditetapkan dari riwayat (atau batch pertama) dan dipakai untuk semua batch berikutnya.
+    """
+
+    def __init__(self, history=None, base=None, fingerprint=""):
+        history = history if history is not None else pd.DataFrame()
+        self._frames = [history] if not history.empty else []
+        self.key_columns = key_columns(history) if not history.empty else None
+        self._keys = np.unique(row_keys(history, self.key_columns or []))
+        self.base = base if base is not None else build_base_table(history)
+        self.rows = len(history)
+        self.fingerprint = fingerprint
+        self.batches = set()
+        self._aggregates = None
+        self.last_append = (0, 0)
+
+    def append(self, batch, digest):
+        """
+        Menambahkan DataFrame bersih `batch` (sidik jari konten `digest`).
+        Mengembalikan (baris_ditambahkan, baris_duplikat), juga disimpan di `last_append`;
+        batch yang sama tidak ditambahkan dua kali.
+        """
+        if digest in self.batches:
+            return 0, 0
+        self.batches.add(digest)
+        self.last_append = (0, 0)
+        if batch.empty:
+            return self.last_append
+
+        if self.key_columns is None:
+            self.key_columns = key_columns(batch)
+        keys = row_keys(batch, self.key_columns)
+        # Duplikat terhadap riwayat (pencarian biner) maupun di dalam batch itu sendiri
+        fresh = ~contains_sorted(self._keys, keys) & ~pd.Series(keys).duplicated().to_numpy()
+        added = int(fresh.sum())
+
+        if added:
+            new_rows = batch if fresh.all() else batch.take(np.flatnonzero(fresh))
+            new_keys = np.sort(keys[fresh])
+            self._keys = np.insert(self._keys, np.searchsorted(self._keys, new_keys), new_keys)
+            self._frames.append(new_rows)
+            # Kunci base boleh berulang antar batch: semua agregat turunan menjumlahkan ulang per dimensi
+            self.base = concat_frames([self.base, build_base_table(new_rows)])
+            self.rows += added
+            self._aggregates = None
+
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"{self.fingerprint}+{digest}".encode('utf-8'))
+        self.fingerprint = hasher.hexdigest()
+        self.last_append = (added, len(batch) - added)
+        return self.last_append
+
+    def aggregates(self):
+        if self._aggregates is None:
+            self._aggregates = AggregateBundle.from_base(self.base)
+        return self._aggregates
+
+    def frame(self):
+        """Semua baris (riwayat + batch) sebagai satu DataFrame; digabung hanya saat dibutuhkan."""
+        if len(self._frames) > 1:
+            self._frames = [concat_frames(self._frames)]
+        return self._frames[0] if self._frames else pd.DataFrame()
+
+    def preview(self):
+        return self._frames[-1].head() if self._frames else pd.DataFrame()
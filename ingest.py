@@ -0,0 +1,365 @@
+import hashlib
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import pandas as pd
+
+from aggregates import AggregateAccumulator
+from cleaning import clean_data, normalize_column_name
+from dataset_cache import DatasetCache, frame_nbytes
+from timings import record_stage, stage
+
+# Jumlah baris per potongan pada mode streaming
+STREAM_CHUNK_ROWS = 250_000
+
+# Mesin parser CSV: "pyarrow" (multithread, dekompresi gzip di luar GIL) atau "c" (parser bawaan pandas, satu thread)
+CSV_ENGINE = os.environ.get("MEDINTEL_CSV_ENGINE", "pyarrow")
+
+# Jumlah file yang di-parsing bersamaan saat beberapa file diunggah (0 = sesuai jumlah CPU, maksimal 8)
+INGEST_WORKERS = int(os.environ.get("MEDINTEL_INGEST_WORKERS", "0"))
+
+# Ekstensi file CSV (boleh terkompresi gzip) dan arsip yang isinya dibaca sebagai beberapa file CSV
+CSV_SUFFIXES = (".csv", ".csv.gz")
+ARCHIVE_SUFFIXES = (".zip",)
+
+# Cache dataset bersih (hasil parsing + pembersihan CSV, data manual, dataset tersimpan), dibagi oleh semua sesi di proses ini
+shared_datasets = DatasetCache()
+
+
+def content_hash(data):
+    """Hash konten byte file yang diunggah (dipakai sebagai kunci cache dan sidik jari dataset)."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def combined_hash(digests):
+    """Sidik jari gabungan beberapa file (tidak bergantung urutan); satu file memakai hash file itu sendiri."""
+    digests = sorted(digests)
+    if len(digests) == 1:
+        return digests[0]
+    return content_hash("\n".join(digests).encode("ascii"))
+
+
+def is_ingestible(name):
+    """True jika nama file berupa CSV, CSV gzip, atau arsip zip yang dapat dibaca."""
+    return name.lower().endswith(CSV_SUFFIXES + ARCHIVE_SUFFIXES)
+
+
+@dataclass
+class CsvSource:
+    """
+    Satu file CSV yang akan di-parsing: dari path di disk atau byte unggahan, atau satu anggota arsip zip
+    (`member`, dengan `path`/`data` berisi arsipnya). Nama berakhiran .gz dibaca sebagai gzip.
+    """
+    name: str
+    path: str = None
+    data: bytes = None
+    member: str = None
+
+    @property
+    def compression(self):
+        return "gzip" if self.name.lower().endswith(".gz") else None
+
+    @property
+    def in_memory(self):
+        return self.path is None or self.member is not None
+
+    def read_bytes(self):
+        """Isi file (masih terkompresi untuk .gz); anggota zip didekompresi di sini, di thread pembaca."""
+        if self.member is not None:
+            with zipfile.ZipFile(self.path if self.path is not None else io.BytesIO(self.data)) as archive:
+                return archive.read(self.member)
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def expand_sources(items):
+    """
+    Mengurai masukan menjadi daftar CsvSource. Setiap item dapat berupa path file, path folder (dipindai tidak
+    rekursif, urut nama), atau pasangan (nama, byte) dari unggahan; arsip .zip dibuka dan setiap anggota
+    .csv/.csv.gz di dalamnya menjadi sumber tersendiri.
+    """
+    sources = []
+    for item in items:
+        if isinstance(item, (str, os.PathLike)):
+            path = os.fspath(item)
+            if os.path.isdir(path):
+                sources.extend(expand_sources(sorted(
+                    os.path.join(path, name) for name in os.listdir(path)
+                    if is_ingestible(name) and os.path.isfile(os.path.join(path, name))
+                )))
+                continue
+            name, source = os.path.basename(path), CsvSource(os.path.basename(path), path=path)
+        else:
+            name, data = item
+            source = CsvSource(name, data=data)
+        if name.lower().endswith(ARCHIVE_SUFFIXES):
+            with zipfile.ZipFile(source.path if source.path is not None else io.BytesIO(source.data)) as archive:
+                members = sorted(
+                    info.filename for info in archive.infolist()
+                    if not info.is_dir() and info.filename.lower().endswith(CSV_SUFFIXES) and not info.filename.startswith("__MACOSX/")
+                )
+            sources.extend(CsvSource(f"{name}/{member}", path=source.path, data=source.data, member=member) for member in members)
+        else:
+            sources.append(source)
+    return sources
+
+
+def _normalize_table(table):
+    """
+    Menerapkan normalisasi nama kolom `clean_data` pada tabel Arrow. Kolom 'date' yang sudah dikenali Arrow
+    sebagai tanggal dikembalikan ke teks agar format tanggal dideteksi (dan dicatat) sama seperti parser pandas.
+    """
+    import pyarrow as pa
+    names = [normalize_column_name(name) for name in table.column_names]
+    # Kolom yang namanya bentrok setelah normalisasi: hanya kemunculan pertama yang dipakai
+    keep = [i for i, name in enumerate(names) if name not in names[:i]]
+    if len(keep) < len(names):
+        table, names = table.select(keep), [names[i] for i in keep]
+    table = table.rename_columns(names)
+    if "date" in names and pa.types.is_temporal(table.schema.field("date").type):
+        table = table.set_column(names.index("date"), "date", table.column("date").cast(pa.string()))
+    return table
+
+
+def _common_type(left, right):
+    """Tipe gabungan satu kolom dari dua file: null mengikuti tipe lain, angka menjadi float64, selain itu teks."""
+    import pyarrow as pa
+    if left == right or pa.types.is_null(right):
+        return left
+    if pa.types.is_null(left):
+        return right
+    numeric = lambda t: pa.types.is_integer(t) or pa.types.is_floating(t)
+    if numeric(left) and numeric(right):
+        return pa.int64() if pa.types.is_integer(left) and pa.types.is_integer(right) else pa.float64()
+    return pa.string()
+
+
+def _concat_tables(tables):
+    """
+    Menyelaraskan skema beberapa tabel Arrow (kolom yang tidak ada diisi null, tipe yang berbeda disatukan)
+    lalu menggabungkannya. `concat_tables` hanya merangkai potongan kolom, tanpa menyalin data.
+    """
+    import pyarrow as pa
+    if len(tables) == 1:
+        return tables[0]
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            types[field.name] = _common_type(types[field.name], field.type) if field.name in types else field.type
+    aligned = []
+    for table in tables:
+        columns = []
+        for name, column_type in types.items():
+            if name not in table.column_names:
+                columns.append(pa.nulls(table.num_rows, column_type))
+            elif table.column(name).type != column_type:
+                columns.append(table.column(name).cast(column_type))
+            else:
+                columns.append(table.column(name))
+        aligned.append(pa.table(columns, names=list(types)))
+    return pa.concat_tables(aligned)
+
+
+def _read_arrow(source):
+    """Mem-parsing satu sumber dengan pyarrow (blok dibaca multithread); mengembalikan (tabel, byte masukan, baris)."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    if source.in_memory:
+        data = source.read_bytes()
+        stream, nbytes = pa.input_stream(pa.py_buffer(data), compression=source.compression), len(data)
+    else:
+        stream, nbytes = pa.input_stream(source.path, compression=source.compression), os.path.getsize(source.path)
+    with stream:
+        # Sama seperti pandas: nilai kosong/"NA"/"null" di kolom teks dibaca sebagai nilai hilang
+        table = pacsv.read_csv(stream, convert_options=pacsv.ConvertOptions(strings_can_be_null=True))
+    return _normalize_table(table), nbytes, table.num_rows
+
+
+def _read_pandas(source):
+    """Mem-parsing satu sumber dengan parser C pandas; mengembalikan (DataFrame, byte masukan, baris)."""
+    if source.in_memory:
+        data = source.read_bytes()
+        frame, nbytes = pd.read_csv(io.BytesIO(data), compression=source.compression), len(data)
+    else:
+        frame, nbytes = pd.read_csv(source.path, compression=source.compression), os.path.getsize(source.path)
+    frame.columns = frame.columns.map(normalize_column_name)
+    frame = frame.loc[:, ~frame.columns.duplicated()]
+    return frame, nbytes, len(frame)
+
+
+def read_sources(sources, workers=None, engine=None):
+    """
+    Mem-parsing beberapa CsvSource secara paralel (thread; parser pyarrow dan dekompresi gzip melepas GIL)
+    lalu menggabungkannya menjadi satu DataFrame mentah dengan nama kolom sudah dinormalisasi, siap untuk
+    `clean_data`. Skema antar file diselaraskan: kolom yang tidak ada di sebuah file bernilai kosong.
+
+    Mengembalikan (DataFrame, ringkasan) dengan ringkasan berisi mesin, jumlah thread, waktu total, dan
+    throughput per file ('files': nama, byte, baris, detik).
+    """
+    if not sources:
+        raise ValueError("Tidak ada file CSV (.csv, .csv.gz, atau di dalam .zip) yang dapat dibaca.")
+    engine = engine or CSV_ENGINE
+    read = _read_arrow if engine == "pyarrow" else _read_pandas
+    workers = max(1, min(len(sources), workers or INGEST_WORKERS or min(8, os.cpu_count() or 1)))
+
+    def timed_read(source):
+        started = time.perf_counter()
+        try:
+            part, nbytes, rows = read(source)
+        except Exception as e:
+            raise ValueError(f"{source.name}: {e}") from e
+        return part, {"name": source.name, "bytes": nbytes, "rows": rows, "seconds": time.perf_counter() - started}
+
+    started = time.perf_counter()
+    if workers == 1:
+        results = [timed_read(source) for source in sources]
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="medintel-ingest") as executor:
+            results = list(executor.map(timed_read, sources))
+    parts = [part for part, _ in results]
+    files = [info for _, info in results]
+    del results
+    for info in files:
+        record_stage("baca_file", info["seconds"], file=info["name"], bytes=info["bytes"], rows=info["rows"])
+
+    with stage("gabung_file", files=len(parts), engine=engine):
+        if engine == "pyarrow":
+            table = _concat_tables(parts)
+            del parts
+            # split_blocks + self_destruct: kolom dikonversi satu per satu dan buffer Arrow dilepas setelahnya
+            raw = table.to_pandas(split_blocks=True, self_destruct=True)
+            del table
+        else:
+            raw = parts[0] if len(parts) == 1 else pd.concat(parts, ignore_index=True, copy=False)
+    summary = {"engine": engine, "workers": workers, "seconds": time.perf_counter() - started, "files": files}
+    return raw, summary
+
+
+def throughput_frame(summary):
+    """Tabel throughput parsing per file untuk dashboard (dari ringkasan `read_sources`)."""
+    rows = [
+        {
+            "File": info["name"],
+            "Ukuran (MB)": round(info["bytes"] / 1024**2, 2),
+            "Baris": info["rows"],
+            "Waktu (detik)": round(info["seconds"], 3),
+            "MB/detik": round(info["bytes"] / 1024**2 / max(info["seconds"], 1e-9), 1),
+            "Baris/detik": round(info["rows"] / max(info["seconds"], 1e-9)),
+        }
+        for info in summary.get("files", [])
+    ]
+    return pd.DataFrame(rows, columns=["File", "Ukuran (MB)", "Baris", "Waktu (detik)", "MB/detik", "Baris/detik"])
+
+
+def read_and_clean_csv(data, notify=None, name="data.csv"):
+    """Mem-parsing byte CSV (gzip/zip dikenali dari `name`) dan membersihkannya tanpa salinan tambahan."""
+    raw, _ = read_sources(expand_sources([(name, data)]))
+    return clean_data(raw, notify)
+
+
+def load_csv_cached(data, notify=None, digest=None, name="data.csv"):
+    """
+    Mengembalikan (sidik_jari, CacheEntry) untuk byte CSV `data`; DataFrame bersih ada di `entry.df`.
+    Hasil dipakai ulang selama konten file tidak berubah; pesan pembersihan
+    diputar ulang lewat `notify` pada setiap pemanggilan.
+    """
+    return load_sources_cached([(name, data)], digest or content_hash(data), notify)
+
+
+def load_sources_cached(items, digest, notify=None):
+    """
+    Seperti `load_csv_cached` untuk beberapa file sekaligus (pasangan (nama, byte), path file, folder, atau
+    arsip zip; lihat `expand_sources`). Semua file di-parsing paralel, digabung, lalu dibersihkan sekali;
+    ringkasan throughput per file disimpan di `entry.stats['ingest']`. `digest` adalah kunci cache gabungan
+    (misalnya `combined_hash` dari hash setiap file).
+    """
+    with stage("muat_csv") as record:
+        entry = shared_datasets.get(digest)
+        record["cached"] = entry is not None
+        if entry is None:
+            messages = []
+            stats = {}
+            with stage("baca_csv") as read_record:
+                raw, summary = read_sources(expand_sources(items))
+                read_record.update(files=len(summary["files"]), engine=summary["engine"], workers=summary["workers"])
+            record["bytes"] = sum(info["bytes"] for info in summary["files"])
+            source_nbytes = frame_nbytes(raw)
+            with stage("clean_data", rows=len(raw)):
+                df = clean_data(raw, notify=lambda level, message: messages.append((level, message)), stats=stats)
+            stats["ingest"] = summary
+            entry = shared_datasets.put(digest, df, messages, source_nbytes=source_nbytes, stats=stats)
+
+    if notify is not None:
+        for level, message in entry.messages:
+            notify(level, message)
+    return digest, entry
+
+
+def stream_csv_aggregates(source, chunksize=STREAM_CHUNK_ROWS, notify=None, on_progress=None, approximate=False):
+    """
+    Membaca CSV per potongan, menerapkan aturan `clean_data` pada setiap potongan,
+    lalu melipatnya ke agregat berjalan tanpa menyimpan semua baris di memori.
+    Dengan `approximate`, lokasi dan brand diringkas dengan sketsa (lihat sketches.py) alih-alih tabel eksak.
+
+    `source` dapat berupa path file (.csv atau .csv.gz), objek file, atau daftar CsvSource yang dibaca
+    berurutan ke agregat yang sama. `on_progress(rows, rows_per_second, position)` dipanggil setelah setiap
+    potongan; `position` adalah jumlah byte yang sudah dibaca dari semua file (None jika tidak diketahui).
+    Mengembalikan (AggregateBundle, DataFrame pratinjau berisi maksimal 5 baris pertama yang bersih,
+    statistik pembersihan gabungan dari semua potongan).
+    """
+    seen_messages = set()
+
+    def notify_once(level, message):
+        if notify is not None and (level, message) not in seen_messages:
+            seen_messages.add((level, message))
+            notify(level, message)
+
+    if isinstance(source, (list, tuple)):
+        sources = source
+    elif isinstance(source, (str, os.PathLike)):
+        sources = [CsvSource(os.path.basename(source), path=os.fspath(source))]
+    else:
+        sources = [source]
+    if approximate:
+        from sketches import SketchSummary
+        accumulator = SketchSummary()
+    else:
+        accumulator = AggregateAccumulator()
+    preview = pd.DataFrame()
+    stats = {}
+    started = time.perf_counter()
+    rows_read = 0
+    bytes_done = 0
+    with stage("stream_csv", approximate=approximate, files=len(sources)) as record:
+        for item in sources:
+            if isinstance(item, CsvSource):
+                handle = open(item.path, 'rb') if not item.in_memory else io.BytesIO(item.read_bytes())
+                owns_handle, compression = True, item.compression
+            else:
+                handle, owns_handle, compression = item, False, None
+            try:
+                for chunk in pd.read_csv(handle, chunksize=chunksize, compression=compression):
+                    rows_read += len(chunk)
+                    cleaned = clean_data(chunk, notify_once, stats=stats)
+                    accumulator.add(cleaned)
+                    if preview.empty and not cleaned.empty:
+                        preview = cleaned.head()
+
+                    if on_progress is not None:
+                        elapsed = max(time.perf_counter() - started, 1e-9)
+                        position = bytes_done + handle.tell() if hasattr(handle, 'tell') else None
+                        on_progress(rows_read, rows_read / elapsed, position)
+                if hasattr(handle, 'tell'):
+                    bytes_done += handle.tell()
+            finally:
+                if owns_handle:
+                    handle.close()
+        record["rows"] = rows_read
+
+    return accumulator.result(), preview, stats
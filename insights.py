@@ -0,0 +1,286 @@
+import pandas as pd
+
+from rollup import format_period
+from timings import stage
+
+
+def sentiment_insights(aggs):
+    """Wawasan teks untuk grafik distribusi sentimen."""
+    sentiment_counts = aggs.sentiment_counts
+    return [
+        f"Sentimen '{sentiment_counts.index[0]}' paling dominan, menyumbang {sentiment_counts.iloc[0]/sentiment_counts.sum():.1%} dari total." if len(sentiment_counts) > 0 else "Tidak ada data sentimen.",
+        f"Sentimen kedua yang paling umum adalah '{sentiment_counts.index[1]}'." if len(sentiment_counts) > 1 else "",
+        f"Terdapat perbedaan mencolok antara dua sentimen teratas dengan '{sentiment_counts.index[2]}'." if len(sentiment_counts) > 2 else ""
+    ]
+
+
+def trend_insights(aggs, granularity="day"):
+    """
+    Wawasan teks untuk grafik tren engagement: arah tren (regresi linear), perubahan 7 hari terakhir,
+    periode tertinggi dan terendah, lonjakan tidak biasa, serta platform dan sentimen yang paling bergerak.
+    """
+    daily_engagements = aggs.daily_engagements
+    trends = aggs.trends
+    engagement_insights = []
+    if len(daily_engagements) > 1:
+        engagement_insights.append(overall_trend_text(trends))
+        engagement_insights.append(week_over_week_text(trends))
+
+        peak_day_row = daily_engagements.loc[daily_engagements['engagements'].idxmax()]
+        engagement_insights.append(f"Engagement tertinggi tercatat pada {format_period(peak_day_row['date'], granularity)} dengan {int(peak_day_row['engagements'])} engagement.")
+
+        lowest_day_row = daily_engagements.loc[daily_engagements['engagements'].idxmin()]
+        engagement_insights.append(f"Engagement terendah diamati pada {format_period(lowest_day_row['date'], granularity)} dengan {int(lowest_day_row['engagements'])} engagement.")
+
+        engagement_insights.append(spike_text(trends))
+        engagement_insights.append(dimension_trend_text(trends, 'platform', "platform"))
+        engagement_insights.append(dimension_trend_text(trends, 'sentiment', "sentimen"))
+    else:
+        engagement_insights.append("Tidak cukup data untuk menentukan tren engagement.")
+    return [insight for insight in engagement_insights if insight]
+
+
+def overall_trend_text(trends):
+    """Kalimat arah tren total engagement berdasarkan kemiringan garis regresi harian."""
+    overall = trends.overall
+    if overall['direction'] == "naik":
+        return (f"Secara keseluruhan, terlihat tren peningkatan engagement seiring waktu (garis regresi naik {overall['change']:.0%} "
+                f"selama periode, sekitar {overall['slope']:,.1f} engagement per hari).")
+    if overall['direction'] == "turun":
+        return (f"Secara keseluruhan, terlihat tren penurunan engagement seiring waktu (garis regresi turun {-overall['change']:.0%} "
+                f"selama periode, sekitar {-overall['slope']:,.1f} engagement per hari).")
+    return "Engagement cenderung stabil selama periode yang diamati."
+
+
+def week_over_week_text(trends):
+    """Kalimat perbandingan 7 hari terakhir dengan 7 hari sebelumnya dan rata-rata bergerak 7 hari (kosong jika data kurang)."""
+    overall = trends.overall
+    if pd.isna(overall['wow_change']):
+        return ""
+    movement = "naik" if overall['wow_change'] >= 0 else "turun"
+    return (f"Engagement 7 hari terakhir {movement} {abs(overall['wow_change']):.0%} dibanding 7 hari sebelumnya "
+            f"({overall['wow_last']:,.0f} vs {overall['wow_previous']:,.0f}); rata-rata bergerak 7 hari terakhir "
+            f"{overall['rolling_last']:,.0f} engagement per hari.")
+
+
+def spike_text(trends):
+    """Kalimat lonjakan engagement total yang tidak biasa (kosong jika tidak ada)."""
+    spikes = trends.spikes_for("total")
+    if spikes.empty:
+        return ""
+    top = spikes.iloc[0]
+    ratio = f", sekitar {top['engagements'] / top['expected']:.1f}x dari perkiraan" if top['expected'] > 0 else ""
+    return (f"Terdeteksi {len(spikes)} lonjakan engagement tidak biasa (ditandai pada grafik); lonjakan terbesar pada "
+            f"{format_period(top['date'], trends.granularity)} ({top['engagements']:,.0f} engagement{ratio}).")
+
+
+def dimension_trend_text(trends, dimension, noun, top=5):
+    """
+    Kalimat nilai `dimension` yang tumbuh paling cepat dan paling menurun di antara `top` nilai dengan
+    engagement terbesar (kosong jika semuanya stabil); nilai kecil diabaikan karena persentasenya mudah melonjak.
+    """
+    rows = trends.by(dimension).nlargest(top, 'total')
+    rising = rows[rows['direction'] == "naik"]
+    falling = rows[rows['direction'] == "turun"]
+    parts = []
+    if not rising.empty:
+        top = rising.loc[rising['change'].idxmax()]
+        parts.append(f"'{top['value']}' tumbuh paling cepat ({top['change']:+.0%} selama periode)")
+    if not falling.empty:
+        bottom = falling.loc[falling['change'].idxmin()]
+        parts.append(f"'{bottom['value']}' paling menurun ({bottom['change']:+.0%})")
+    return f"Tren per {noun}: {', sedangkan '.join(parts)}." if parts else ""
+
+
+def platform_insights(aggs):
+    """Wawasan teks untuk grafik engagement per platform."""
+    platforms = aggs.platform_engagements.index
+    return [
+        f"'{platforms[0]}' adalah platform dengan kinerja terbaik dalam hal total engagement, menunjukkan jangkauan yang kuat." if len(platforms) > 0 else "Tidak ada data platform.",
+        f"'{platforms[1]}' menyusul sebagai platform dengan engagement tertinggi kedua." if len(platforms) > 1 else "",
+        f"Terdapat penurunan engagement yang signifikan setelah dua platform teratas, dengan '{platforms[2]}' tertinggal di belakang." if len(platforms) > 2 else ""
+    ]
+
+
+def media_type_insights(aggs):
+    """Wawasan teks untuk grafik campuran tipe media."""
+    media_types = aggs.media_type_counts.index
+    return [
+        f"Tipe media yang paling sering digunakan adalah '{media_types[0]}', menunjukkan bahwa itu adalah format konten utama." if len(media_types) > 0 else "Tidak ada data tipe media.",
+        f"'{media_types[1]}' mewakili pangsa media terbesar kedua." if len(media_types) > 1 else "",
+        f"Terdapat campuran tipe media yang beragam, namun '{media_types[2]}' menunjukkan kontribusi yang moderat." if len(media_types) > 2 else ""
+    ]
+
+
+def location_insights(aggs):
+    """Wawasan teks untuk grafik 5 lokasi teratas (beserta batas galatnya pada mode perkiraan)."""
+    locations = aggs.location_counts.head(5).index
+    insights = [
+        f"'{locations[0]}' adalah lokasi paling aktif, menunjukkan konsentrasi tinggi aktivitas intelijen media di sini." if len(locations) > 0 else "Tidak ada data lokasi.",
+        f"'{locations[1]}' menempati peringkat kedua, menunjukkan area geografis kunci lain untuk aktivitas media." if len(locations) > 1 else "",
+        f"Tiga lokasi teratas, termasuk '{locations[2]}', secara kolektif mewakili porsi signifikan dari total aktivitas yang tercatat." if len(locations) > 2 else ""
+    ]
+    if aggs.approximate:
+        insights.extend(approximation_notes(aggs.sketches))
+    return insights
+
+
+def approximation_notes(sketches, top=5):
+    """Kalimat batas galat mode perkiraan: jumlah lokasi teratas, jumlah nilai berbeda, dan kuantil engagement."""
+    notes = [
+        f"Jumlah per lokasi adalah perkiraan untuk seluruh data (filter tidak berlaku): masing-masing meleset paling banyak "
+        f"{sketches.max_error('location', top):,} baris dari jumlah sebenarnya.",
+        f"Terdapat sekitar {sketches.distinct_count('location'):,} lokasi dan {sketches.distinct_count('influencer_brand'):,} "
+        f"brand berbeda (galat baku ±{sketches.distinct_error:.1%}).",
+    ]
+    quantiles = sketches.engagement_quantiles()
+    if quantiles[0.5] is not None:
+        notes.append(
+            f"Median engagement per posting sekitar {quantiles[0.5]:,.0f}, dan 10% posting teratas di atas {quantiles[0.9]:,.0f} "
+            f"(±{sketches.engagements.relative_accuracy:.0%})."
+        )
+    return notes
+
+
+def chart_insights(aggs, granularity="day"):
+    """Wawasan semua grafik dashboard (judul grafik -> daftar kalimat, tanpa kalimat kosong)."""
+    sections = {
+        "Distribusi Sentimen": sentiment_insights(aggs),
+        "Tren Engagement Seiring Waktu": trend_insights(aggs, granularity),
+        "Engagement Berdasarkan Platform": platform_insights(aggs),
+        "Campuran Tipe Media": media_type_insights(aggs),
+        "Top 5 Lokasi": location_insights(aggs),
+    }
+    return {title: [insight for insight in insights if insight] for title, insights in sections.items()}
+
+
+def key_insights(aggs):
+    """Wawasan utama singkat per grafik, dipakai pada laporan PDF."""
+    insights = []
+    if len(aggs.sentiment_counts) > 0:
+        insights.append(f"- Sentimen '{aggs.sentiment_counts.index[0]}' paling dominan.")
+
+    trends = aggs.trends
+    if len(aggs.daily_engagements) > 1:
+        overall = trends.overall
+        if overall['direction'] == "naik":
+            insights.append(f"- Secara keseluruhan, terlihat tren peningkatan engagement ({overall['change']:+.0%} selama periode).")
+        elif overall['direction'] == "turun":
+            insights.append(f"- Tren engagement menurun ({overall['change']:+.0%} selama periode).")
+        else:
+            insights.append("- Tren engagement relatif stabil.")
+        if not pd.isna(overall['wow_change']):
+            insights.append(f"- Engagement 7 hari terakhir {overall['wow_change']:+.0%} dibanding 7 hari sebelumnya.")
+        spikes = trends.spikes_for("total")
+        if not spikes.empty:
+            insights.append(f"- Terdeteksi {len(spikes)} lonjakan engagement tidak biasa, terbesar pada {format_period(spikes['date'].iloc[0], trends.granularity)}.")
+
+    if len(aggs.platform_engagements) > 0:
+        insights.append(f"- Platform '{aggs.platform_engagements.index[0]}' adalah platform dengan kinerja terbaik.")
+    if len(aggs.media_type_counts) > 0:
+        insights.append(f"- Tipe media yang paling sering digunakan adalah '{aggs.media_type_counts.index[0]}'.")
+    if len(aggs.location_counts) > 0:
+        insights.append(f"- Lokasi paling aktif adalah '{aggs.location_counts.index[0]}'" + (" (perkiraan)." if aggs.approximate else "."))
+    return insights
+
+
+def summarize_data_for_ai(aggs):
+    """Meringkas agregat data yang telah dibersihkan untuk prompt AI."""
+    if aggs.empty:
+        return "Tidak ada data yang tersedia."
+
+    summary_data = {
+        "totalEntries": aggs.total_entries,
+        "sentimentCounts": aggs.sentiment_counts.to_dict(),
+        "platformEngagements": aggs.platform_engagements.to_dict(),
+        "mediaTypeCounts": aggs.media_type_counts.to_dict(),
+        "topLocations": aggs.location_counts.head(3).to_dict(),
+    }
+
+    # Ringkasan tren engagement (regresi linear atas total engagement harian)
+    engagement_trend_summary = "Tidak ada tren engagement yang jelas."
+    if len(aggs.daily_engagements) > 1:
+        overall = aggs.trends.overall
+        if overall['direction'] == "naik":
+            engagement_trend_summary = f"Ada tren peningkatan engagement secara keseluruhan (garis regresi {overall['change']:+.0%} selama periode)."
+        elif overall['direction'] == "turun":
+            engagement_trend_summary = f"Ada tren penurunan engagement secara keseluruhan (garis regresi {overall['change']:+.0%} selama periode)."
+
+    prompt_summary = f"""
+    Total entri data: {summary_data['totalEntries']}
+    Distribusi Sentimen Teratas: {summary_data['sentimentCounts']}
+    Engagement Platform Teratas: {summary_data['platformEngagements']}
+    Distribusi Tipe Media Teratas: {summary_data['mediaTypeCounts']}
+    Lokasi Teratas: {summary_data['topLocations']}
+    Ringkasan Tren Engagement: {engagement_trend_summary}
+    """
+    if len(aggs.daily_engagements) > 1:
+        prompt_summary += trend_summary_for_ai(aggs.trends)
+    if aggs.approximate:
+        prompt_summary += approximate_summary(aggs.sketches)
+    return prompt_summary
+
+
+def trend_summary_for_ai(trends, top=5):
+    """Bagian ringkasan prompt AI: perubahan 7 hari terakhir, tren per platform dan sentimen, dan lonjakan terbesar."""
+    overall = trends.overall
+    wow_text = "data kurang dari 14 hari" if pd.isna(overall['wow_change']) else (
+        f"{overall['wow_change']:+.0%} ({overall['wow_last']:,.0f} vs {overall['wow_previous']:,.0f})")
+
+    def changes(dimension):
+        rows = trends.by(dimension).nlargest(top, 'total')
+        return {str(row['value']): "stabil" if row['direction'] == "stabil" else f"{row['change']:+.0%}" for _, row in rows.iterrows()}
+
+    spikes = [
+        f"{format_period(spike['date'], trends.granularity)} ({'total' if spike['dimension'] == 'total' else spike['value']}): "
+        f"{spike['engagements']:,.0f} vs perkiraan {spike['expected']:,.0f}"
+        for _, spike in trends.spikes.head(top).iterrows()
+    ]
+    return f"""
+    Perubahan Engagement 7 Hari Terakhir vs 7 Hari Sebelumnya: {wow_text}
+    Tren per Platform (perubahan garis regresi selama periode): {changes('platform')}
+    Tren per Sentimen (perubahan garis regresi selama periode): {changes('sentiment')}
+    Lonjakan Engagement Tidak Biasa (skor-z robust): {spikes if spikes else 'tidak ada'}
+    """
+
+
+def approximate_summary(sketches, top=3):
+    """Bagian ringkasan prompt AI untuk mode perkiraan: nilai teratas, jumlah nilai berbeda, dan kuantil, dengan batas galat."""
+    quantiles = sketches.engagement_quantiles()
+    quantile_text = ", ".join(f"p{round(q * 100)} {value:,.0f}" for q, value in quantiles.items() if value is not None)
+    return f"""
+    Catatan: lokasi dan brand diringkas dengan sketsa (angka perkiraan).
+    Lokasi Teratas (perkiraan, galat maks ±{sketches.max_error('location', top):,} baris): {sketches.top_counts('location', top).to_dict()}
+    Brand Teratas (perkiraan, galat maks ±{sketches.max_error('influencer_brand', top):,} baris): {sketches.top_counts('influencer_brand', top).to_dict()}
+    Jumlah Lokasi/Brand Berbeda (±{sketches.distinct_error:.1%}): {sketches.distinct_count('location'):,} / {sketches.distinct_count('influencer_brand'):,}
+    Distribusi Engagement per Posting (±{sketches.engagements.relative_accuracy:.0%}): {quantile_text}
+    """
+
+
+def build_ai_prompt(aggs):
+    """Menyusun prompt akhir untuk model AI dari ringkasan data dan wawasan utama grafik."""
+    with stage("summarize_data_for_ai"):
+        prompt_summary_data = summarize_data_for_ai(aggs)
+
+    # Mengumpulkan wawasan utama grafik dari agregat yang sama dengan yang dipakai grafik
+    all_chart_insights = []
+    if len(aggs.sentiment_counts) >= 1:
+        all_chart_insights.append(f"Analisis sentimen menunjukkan bahwa '{aggs.sentiment_counts.index[0]}' dominan.")
+    if len(aggs.platform_engagements) >= 1:
+        all_chart_insights.append(f"Platform '{aggs.platform_engagements.index[0]}' memiliki engagement tertinggi.")
+    if len(aggs.media_type_counts) >= 1:
+        all_chart_insights.append(f"Tipe media '{aggs.media_type_counts.index[0]}' paling sering.")
+    if len(aggs.location_counts) >= 1:
+        all_chart_insights.append(f"Lokasi '{aggs.location_counts.index[0]}' paling aktif.")
+    if len(aggs.daily_engagements) > 1:
+        all_chart_insights.append(f"Tren engagement {aggs.trends.overall['direction']} berdasarkan regresi linear harian.")
+
+    return f"""
+    Berdasarkan ringkasan data intelijen media berikut:
+    {prompt_summary_data}
+
+    Wawasan utama dari grafik:
+    - {'; '.join(all_chart_insights) if all_chart_insights else "Tidak ada wawasan spesifik dari grafik."}
+
+    Berikan ringkasan singkat data dari 5 grafik di atas (maksimal 2 paragraf) dan kemudian berikan 3 rekomendasi kampanye yang dapat ditindaklanjuti untuk mengoptimalkan strategi di masa depan.
+    """
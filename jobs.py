@@ -0,0 +1,188 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from timings import SectionTimer
+
+# Jumlah tugas latar belakang (analisis AI, laporan PDF) yang berjalan bersamaan di proses ini
+JOB_WORKERS = int(os.environ.get("MEDINTEL_JOB_WORKERS", "4"))
+
+# Jumlah tugas selesai yang tetap disimpan agar hasilnya dapat diambil pada rerun berikutnya
+MAX_FINISHED_JOBS = int(os.environ.get("MEDINTEL_JOB_HISTORY", "200"))
+
+FINAL_STATUSES = {"done", "failed", "cancelled"}
+
+STATUS_LABELS = {
+    "queued": "menunggu",
+    "running": "berjalan",
+    "done": "selesai",
+    "failed": "gagal",
+    "cancelled": "dibatalkan",
+}
+
+
+class JobCancelled(Exception):
+    """Dilempar di dalam tugas (lewat `Job.check_cancelled`/`Job.emit`) setelah pembatalan diminta."""
+
+
+@dataclass
+class Job:
+    """
+    Satu tugas latar belakang: status, hasil atau pesan error, dan teks parsial (misalnya token AI yang
+    sudah diterima). Fungsi tugas menerima objek ini sebagai argumen pertama.
+    """
+    id: str
+    kind: str
+    label: str = ""
+    owner: str = "" # Pemilik tugas (ID sesi); tugas sesi lain tidak ditampilkan
+    meta: dict = field(default_factory=dict) # Data tambahan untuk pemrosesan hasil (misalnya prompt)
+    status: str = "queued"
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    result: object = None
+    error: str = ""
+    timing: dict = None # Catatan instrumentasi tugas (lihat SectionTimer.finish)
+    partial: list = field(default_factory=list)
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _future: object = field(default=None, repr=False)
+
+    @property
+    def done(self):
+        return self.status in FINAL_STATUSES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    @property
+    def elapsed_s(self):
+        """Lama tugas berjalan (atau menunggu, jika belum dimulai) dalam detik."""
+        started = self.started_at or self.submitted_at
+        return (self.finished_at or time.time()) - started
+
+    @property
+    def partial_text(self):
+        return "".join(self.partial)
+
+    @property
+    def status_label(self):
+        if self.cancel_requested and not self.done:
+            return "membatalkan"
+        return STATUS_LABELS.get(self.status, self.status)
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def emit(self, chunk):
+        """Menambahkan potongan teks parsial; sekaligus titik pembatalan bagi tugas yang mengalirkan hasil."""
+        self.check_cancelled()
+        self.partial.append(chunk)
+
+
+class JobQueue:
+    """
+    Eksekutor tugas latar belakang untuk seluruh proses dengan registri tugas. Sesi Streamlit mengirim
+    tugas lalu hanya menyimpan ID-nya; status dan hasil diambil pada rerun berikutnya, sehingga skrip
+    tidak tertahan selama tugas berjalan dan hasil tidak hilang saat pengguna berpindah bagian.
+
+    Pembatalan bersifat kooperatif: tugas yang belum dimulai langsung dibatalkan, tugas yang sedang
+    berjalan berhenti di titik pembatalan berikutnya (`emit`/`check_cancelled`), dan hasil tugas yang
+    tetap selesai setelah dibatalkan dibuang.
+    """
+
+    def __init__(self, max_workers=JOB_WORKERS, max_finished=MAX_FINISHED_JOBS):
+        self.max_workers = max(1, max_workers)
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def _get_executor(self):
+        # Thread pool dibuat saat tugas pertama dikirim agar proses tanpa tugas tidak menanggungnya
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="medintel-job")
+            return self._executor
+
+    def submit(self, kind, func, *args, label="", owner="", meta=None, **kwargs):
+        """Menjadwalkan `func(job, *args, **kwargs)` dan langsung mengembalikan Job-nya."""
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, label=label, owner=owner, meta=dict(meta or {}))
+        with self._lock:
+            self._jobs[job.id] = job
+        job._future = self._get_executor().submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancel_requested:
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        job.started_at = time.time()
+        # Tahap di dalam tugas (llm, pdf, render_grafik) dicatat pada timer milik tugas ini
+        timer = SectionTimer(kind="job").activate()
+        try:
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            self._finish(job, "cancelled", timer)
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            self._finish(job, "cancelled" if job.cancel_requested else "failed", timer)
+        else:
+            if job.cancel_requested:
+                self._finish(job, "cancelled", timer)
+            else:
+                job.result = result
+                self._finish(job, "done", timer)
+
+    def _finish(self, job, status, timer=None):
+        if timer is not None:
+            job.timing = timer.finish(job_id=job.id, job_kind=job.kind, status=status)
+        job.finished_at = time.time()
+        job.status = status
+        with self._lock:
+            self._prune_locked()
+
+    def _prune_locked(self):
+        """Membuang tugas selesai yang paling lama jika jumlahnya melebihi batas riwayat."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Job dengan ID tersebut, atau None jika tidak dikenal (atau sudah dibuang dari riwayat)."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Meminta pembatalan tugas; True jika tugas masih ada dan belum selesai."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            # Belum sempat dimulai: tidak akan pernah dijalankan
+            self._finish(job, "cancelled")
+        return True
+
+    def jobs(self, owner=None):
+        """Daftar tugas (terbaru lebih dulu), opsional hanya milik `owner`."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job for job in reversed(jobs) if owner is None or job.owner == owner]
+
+    def stats(self):
+        with self._lock:
+            counts = {status: 0 for status in STATUS_LABELS}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+
+# Antrean bersama untuk semua sesi di proses ini
+job_queue = JobQueue()
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Lokasi dan batas cache respons AI, dapat diubah lewat variabel lingkungan
+DEFAULT_PATH = os.environ.get("MEDINTEL_LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".medintel", "llm_cache.sqlite3"))
+DEFAULT_TTL_HOURS = float(os.environ.get("MEDINTEL_LLM_CACHE_TTL_HOURS", "24"))
+DEFAULT_MAX_MB = float(os.environ.get("MEDINTEL_LLM_CACHE_MB", "50"))
+
+
+def normalize_prompt(prompt):
+    """Menyeragamkan spasi/indentasi prompt agar prompt yang sama menghasilkan kunci yang sama."""
+    return " ".join(prompt.split())
+
+
+def cache_key(provider, model, prompt):
+    """Kunci cache dari provider, id model, dan teks prompt yang dinormalisasi."""
+    raw = "\x1f".join([provider, model, normalize_prompt(prompt)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Cache respons model AI di disk (SQLite) dengan masa berlaku (TTL) dan batas ukuran total.
+    Saat batas ukuran terlampaui, respons yang paling lama tidak dipakai dihapus lebih dulu.
+    Menyimpan penghitung hit/miss untuk proses ini. `clock` (default `time.time`) dapat diganti, misalnya di tes.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, ttl_seconds=DEFAULT_TTL_HOURS * 3600, max_bytes=DEFAULT_MAX_MB * 1024 * 1024, clock=time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        if not self._initialized:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT, "
+                "size INTEGER, created REAL, last_used REAL)"
+            )
+            connection.commit()
+            self._initialized = True
+        return connection
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, provider, model, prompt):
+        """Respons tersimpan untuk prompt ini, atau None jika tidak ada/kedaluwarsa."""
+        key = cache_key(provider, model, prompt)
+        now = self.clock()
+        connection = self._connect()
+        try:
+            row = connection.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                self._count(hit=False)
+                return None
+            connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            connection.commit()
+        finally:
+            connection.close()
+        self._count(hit=True)
+        return row[0]
+
+    def put(self, provider, model, prompt, response):
+        """Menyimpan respons lalu menjalankan eviksi TTL dan batas ukuran."""
+        key = cache_key(provider, model, prompt)
+        now = self.clock()
+        connection = self._connect()
+        try:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, provider, model, response, size, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, provider, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(connection, now)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _evict(self, connection, now):
+        connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for key, size in connection.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+
+    def stats(self):
+        """Jumlah hit/miss proses ini serta jumlah entri dan ukuran cache di disk."""
+        connection = self._connect()
+        try:
+            entries, total = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        finally:
+            connection.close()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total}
+
+    def clear(self):
+        connection = self._connect()
+        try:
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+        finally:
+            connection.close()
+
+
+# Cache bersama untuk semua sesi di proses ini
+response_cache = LLMResponseCache()
@@ -1,10 +1,28 @@
+import functools
+import uuid
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import google.generativeai as genai
-import requests
-from fpdf import FPDF # Menggunakan fpdf2 untuk pembuatan PDF
+from datetime import date
+
+# Dependensi berat (plotly.express, google.generativeai, requests, fpdf) diimpor di dalam bagian
+# yang memakainya, sehingga cold start dan rerun tanpa bagian tersebut tidak menanggung biayanya.
+from aggregates import dataset_fingerprint, get_aggregates
+from cleaning import clean_data, date_parse_summary, memory_report
+from downsample import MAX_TREND_POINTS
+from incremental import IncrementalDataset
+from ingest import combined_hash, content_hash, expand_sources, load_sources_cached, shared_datasets, stream_csv_aggregates, throughput_frame
+from insights import build_ai_prompt, location_insights, media_type_insights, platform_insights, sentiment_insights, trend_insights
+from jobs import job_queue
+from llm_cache import response_cache
+from rollup import GRANULARITIES, get_cube
+from timings import DEBUG_PANEL_DEFAULT, SectionTimer, configure_timing_log, record_stage, stage, stages_frame
+
+# Bagian dashboard yang dipilih lewat navigasi; hanya bagian aktif yang dihitung dan dirender
+DASHBOARD_SECTIONS = ["Grafik & Wawasan", "Analisis AI", "Unduh Laporan"]
+
+# Selang (detik) bagian dashboard memeriksa tugas latar belakangnya selama tugas masih berjalan
+JOB_POLL_SECONDS = 1.0
 
 # --- Konfigurasi Halaman Streamlit ---
 st.set_page_config(
@@ -18,8 +36,47 @@ st.set_page_config(
 # Variabel-variabel ini akan mempertahankan nilainya di seluruh interaksi pengguna
 if 'cleaned_data' not in st.session_state:
     st.session_state.cleaned_data = pd.DataFrame()
+if 'data_fingerprint' not in st.session_state:
+    # Sidik jari data bersih, dipakai sebagai kunci memo agregat
+    st.session_state.data_fingerprint = ""
+if 'streamed_aggregates' not in st.session_state:
+    # Agregat hasil mode streaming (baris mentah tidak disimpan)
+    st.session_state.streamed_aggregates = None
+    st.session_state.data_preview = pd.DataFrame()
+if 'dataset_lease' not in st.session_state:
+    # Lease sesi ini pada dataset bersih di cache bersama (satu DataFrame untuk semua sesi yang membuka data yang sama)
+    st.session_state.dataset_lease = None
+if 'appended_dataset' not in st.session_state:
+    # Dataset gabungan mode append (riwayat + batch CSV baru yang sudah dideduplikasi)
+    st.session_state.appended_dataset = None
+if 'cleaning_stats' not in st.session_state:
+    # Statistik pembersihan terakhir (jumlah baris per format tanggal, baris dibuang)
+    st.session_state.cleaning_stats = {}
+if 'uploaded_file_digests' not in st.session_state:
+    # Hash konten per file_id unggahan, agar byte file tidak di-hash ulang di setiap rerun
+    st.session_state.uploaded_file_digests = {}
 if 'ai_recommendations' not in st.session_state:
     st.session_state.ai_recommendations = ""
+if 'ai_comparison' not in st.session_state:
+    # Hasil perbandingan beberapa model (daftar ModelResult)
+    st.session_state.ai_comparison = []
+if 'ai_timings' not in st.session_state:
+    # Riwayat latensi permintaan AI (waktu token pertama dan total) untuk sesi ini
+    st.session_state.ai_timings = []
+if 'session_id' not in st.session_state:
+    # ID sesi untuk log instrumentasi dan pemilik tugas latar belakang
+    st.session_state.session_id = uuid.uuid4().hex[:12]
+if 'jobs' not in st.session_state:
+    # Tugas latar belakang yang belum diambil hasilnya, per slot ('ai', 'compare', 'pdf') -> ID tugas
+    st.session_state.jobs = {}
+    # Pesan hasil tugas terakhir per slot (level, teks), misalnya error atau pembatalan
+    st.session_state.job_notices = {}
+if 'pdf_report' not in st.session_state:
+    # PDF terakhir yang selesai dibuat beserta kunci isinya (data, teks AI, tema, grafik)
+    st.session_state.pdf_report = None
+if 'instrumentation_runs' not in st.session_state:
+    # Catatan instrumentasi rerun dan fragmen terakhir (lihat panel debug di sidebar)
+    st.session_state.instrumentation_runs = []
 if 'openrouter_api_key' not in st.session_state:
     st.session_state.openrouter_api_key = ""
 if 'selected_openrouter_model' not in st.session_state:
@@ -33,79 +90,6 @@ if 'manual_rows' not in st.session_state:
 
 # --- Fungsi Pembantu ---
 
-def clean_data(df):
-    """
-    Membersihkan dan memproses DataFrame:
-    - Mengkonversi 'Date' ke format datetime.
-    - Mengisi 'Engagements' yang hilang dengan 0.
-    - Menormalisasi nama kolom (huruf kecil, ganti spasi dengan underscore).
-    - Memastikan kolom 'influencer_brand' dan 'post_type' ada.
-    """
-    if df.empty:
-        return pd.DataFrame()
-
-    df.columns = df.columns.str.lower().str.replace(' ', '_')
-
-    # Mengkonversi kolom 'date'
-    if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
-        df = df.dropna(subset=['date']) # Menghapus baris yang gagal dikonversi tanggal
-    else:
-        st.error("Error: Kolom 'Date' tidak ditemukan dalam data.")
-        return pd.DataFrame()
-
-    # Mengkonversi kolom 'engagements'
-    if 'engagements' in df.columns:
-        df['engagements'] = pd.to_numeric(df['engagements'], errors='coerce').fillna(0)
-    else:
-        st.warning("Peringatan: Kolom 'Engagements' tidak ditemukan. Mengatur semua engagement ke 0.")
-        df['engagements'] = 0
-
-    # Memastikan kolom-kolom lain yang diharapkan ada, isi dengan 'Unknown' jika hilang
-    for col in ['platform', 'sentiment', 'location', 'media_type', 'influencer_brand', 'post_type']:
-        if col not in df.columns:
-            df[col] = 'Unknown'
-        else:
-            df[col] = df[col].fillna('Unknown') # Mengisi nilai NaN yang ada di kolom
-
-    return df
-
-def get_common_plotly_layout(title_text, is_dark_mode=False):
-    """Mengembalikan layout Plotly umum dengan adaptasi tema."""
-    text_color = "white" if is_dark_mode else "#2C3E50" # Warna teks untuk mode gelap/terang
-    grid_color = "#4a5568" if is_dark_mode else "#e2e8f0" # Warna grid untuk mode gelap/terang
-    
-    return {
-        'title': {'text': title_text, 'font': {'size': 24, 'color': text_color}},
-        'paper_bgcolor': 'rgba(0,0,0,0)', # Latar belakang transparan
-        'plot_bgcolor': 'rgba(0,0,0,0)', # Latar belakang transparan
-        'height': 400,
-        'margin': {'t': 50, 'b': 50, 'l': 50, 'r': 50},
-        'font': {'color': text_color},
-        'xaxis': {
-            'gridcolor': grid_color,
-            'linecolor': text_color,
-            'tickfont': {'color': text_color},
-            'titlefont': {'color': text_color}
-        },
-        'yaxis': {
-            'gridcolor': grid_color,
-            'linecolor': text_color,
-            'tickfont': {'color': text_color},
-            'titlefont': {'color': text_color}
-        },
-        'legend': {
-            'font': {'color': text_color}
-        }
-    }
-
-def get_chart_colors(is_dark_mode=False):
-    """Mengembalikan daftar warna untuk grafik berdasarkan tema."""
-    if is_dark_mode:
-        return ['#66d9ef', '#a78bfa', '#ff66c4', '#66ff99', '#ffcc66'] # Biru muda, ungu muda, pink, hijau muda, oranye muda
-    else:
-        return ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd'] # Warna default Plotly
-
 def display_insights_text(insights_data):
     """Menampilkan wawasan dalam bentuk daftar."""
     if insights_data:
@@ -114,41 +98,244 @@ def display_insights_text(insights_data):
     else:
         st.markdown(f"- Tidak ada wawasan yang tersedia untuk grafik ini.")
 
-def summarize_data_for_ai(df):
-    """Meringkas data yang telah dibersihkan untuk prompt AI."""
+def notify_streamlit(level, message):
+    """Meneruskan pesan pembersihan data ('error'/'warning') ke elemen Streamlit yang sesuai."""
+    getattr(st, level)(message)
+
+def release_dataset_lease():
+    """Melepas lease sesi ini pada dataset di cache bersama (dataset boleh dikeluarkan jika tidak ada sesi lain yang memakainya)."""
+    if st.session_state.dataset_lease is not None:
+        st.session_state.dataset_lease.release()
+        st.session_state.dataset_lease = None
+
+def store_cleaned_data(df, fingerprint=None, stats=None):
+    """
+    Menyimpan data bersih ke state sesi beserta sidik jarinya. DataFrame disimpan di cache bersama per proses,
+    sehingga sesi lain yang membuka data yang sama memakai objek yang sama (hanya-baca), bukan salinan.
+    """
+    fingerprint = fingerprint or ("" if df.empty else dataset_fingerprint(df))
+    lease = st.session_state.dataset_lease
+    if lease is None or lease.key != fingerprint:
+        # Rerun dengan dataset yang sama mempertahankan lease-nya
+        release_dataset_lease()
+    st.session_state.cleaning_stats = stats or {}
+    st.session_state.streamed_aggregates = None
+    st.session_state.appended_dataset = None
     if df.empty:
-        return "Tidak ada data yang tersedia."
-
-    summary_data = {
-        "totalEntries": len(df),
-        "sentimentCounts": df['sentiment'].value_counts().to_dict(),
-        "platformEngagements": df.groupby('platform')['engagements'].sum().to_dict(),
-        "mediaTypeCounts": df['media_type'].value_counts().to_dict(),
-        "topLocations": df['location'].value_counts().head(3).to_dict(),
-    }
+        st.session_state.cleaned_data = df
+        st.session_state.data_fingerprint = ""
+    else:
+        if st.session_state.dataset_lease is None:
+            st.session_state.dataset_lease = shared_datasets.share(fingerprint, df, stats=stats)
+        st.session_state.cleaned_data = st.session_state.dataset_lease.df
+        st.session_state.data_fingerprint = fingerprint
+    st.session_state.data_preview = st.session_state.cleaned_data.head()
+
+def store_streamed_aggregates(aggs, preview, fingerprint, stats=None):
+    """Menyimpan agregat hasil mode streaming ke state sesi (tanpa baris mentah)."""
+    release_dataset_lease()
+    st.session_state.cleaned_data = pd.DataFrame()
+    st.session_state.cleaning_stats = stats or {}
+    st.session_state.streamed_aggregates = aggs
+    st.session_state.appended_dataset = None
+    st.session_state.data_preview = preview
+    st.session_state.data_fingerprint = "" if aggs.empty else fingerprint
+
+def store_appended_dataset(dataset, stats=None):
+    """Menjadikan dataset gabungan mode append sebagai dataset aktif (baris disimpan di dalam `dataset`)."""
+    release_dataset_lease()
+    st.session_state.cleaned_data = pd.DataFrame()
+    st.session_state.cleaning_stats = stats or {}
+    st.session_state.streamed_aggregates = None
+    st.session_state.appended_dataset = dataset
+    st.session_state.data_preview = dataset.preview()
+    st.session_state.data_fingerprint = dataset.fingerprint if dataset.rows else ""
+
+def has_data():
+    """True jika ada dataset aktif (data bersih atau agregat streaming)."""
+    return bool(st.session_state.data_fingerprint)
+
+def current_aggregates():
+    """Agregat dataset aktif; grafik, prompt AI, dan PDF membaca dari sini."""
+    if st.session_state.streamed_aggregates is not None:
+        return st.session_state.streamed_aggregates
+    if st.session_state.appended_dataset is not None:
+        return st.session_state.appended_dataset.aggregates()
+    if st.session_state.dataset_lease is not None:
+        return st.session_state.dataset_lease.aggregates()
+    return get_aggregates(st.session_state.cleaned_data, st.session_state.data_fingerprint)
+
+def active_rows():
+    """Baris data bersih dataset aktif (kosong untuk mode streaming)."""
+    if st.session_state.appended_dataset is not None:
+        return st.session_state.appended_dataset.frame()
+    return st.session_state.cleaned_data
+
+def record_ai_timing(result, max_entries=20):
+    """Menyimpan latensi satu permintaan AI (ModelResult) ke riwayat sesi (maksimal `max_entries` terakhir)."""
+    timing_entry = {"provider": result.provider, "model": result.model, "ttft_s": result.ttft_s, "total_s": result.latency_s}
+    st.session_state.ai_timings = (st.session_state.ai_timings + [timing_entry])[-max_entries:]
+
+def record_llm_stage(provider, model, seconds, prompt, response, **extra):
+    """Mencatat satu permintaan AI sebagai tahap instrumentasi: latensi dan ukuran payload (byte UTF-8)."""
+    record_stage("llm", seconds, provider=provider, model=model, prompt_bytes=len(prompt.encode("utf-8")),
+                 response_bytes=len((response or "").encode("utf-8")), **extra)
+
+def store_instrumentation(entry, max_entries=20):
+    """Menyimpan satu catatan instrumentasi (rerun, fragmen, atau tugas latar belakang) untuk panel debug."""
+    st.session_state.instrumentation_runs = (st.session_state.instrumentation_runs + [entry])[-max_entries:]
+
+def finish_instrumentation(timer):
+    """Menutup timer rerun/fragmen, mengirim log JSON-nya, dan menyimpannya untuk panel debug."""
+    store_instrumentation(timer.finish(session=st.session_state.session_id))
+
+def timed_fragment(func=None, run_every=None):
+    """
+    `st.experimental_fragment` yang tetap terukur: saat fragmen dijalankan ulang sendiri (rerun penuh
+    sudah selesai), bagian dan tahapnya dicatat dengan timer baru dan dikirim sebagai log terpisah.
+    Dengan `run_every`, fragmen juga dijalankan ulang secara berkala (misalnya selama tugas latar belakang berjalan).
+    """
+    if func is None:
+        return functools.partial(timed_fragment, run_every=run_every)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        global section_timer
+        if not section_timer.finished:
+            return func(*args, **kwargs)
+        section_timer = SectionTimer(kind="fragment").activate()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            finish_instrumentation(section_timer)
+    return st.experimental_fragment(wrapper, run_every=run_every)
+
+# --- Tugas Latar Belakang ---
+# Analisis AI dan pembuatan PDF berjalan di antrean tugas (jobs.py), bukan di dalam skrip: sesi tetap
+# responsif, dan hasil diambil pada rerun berikutnya meskipun pengguna sudah berpindah bagian.
+
+def ai_analysis_job(job, provider, model, prompt, openrouter_api_key=None, stream=True):
+    """Tugas analisis AI satu model; dengan `stream`, token yang sudah diterima tersedia di `job.partial`."""
+    from fanout import run_model
+    result = run_model(provider, model, prompt, openrouter_api_key, on_chunk=job.emit if stream else None)
+    record_llm_stage(provider, model, result.latency_s, prompt, result.text, cached=result.cached,
+                     ttft_ms=round(result.ttft_s * 1000, 2), error=result.error or None)
+    return result
+
+def ai_comparison_job(job, prompt, targets, openrouter_api_key=None):
+    """Tugas perbandingan beberapa model sekaligus (lihat `fan_out`)."""
+    from fanout import fan_out
+    with stage("llm_fan_out", models=len(targets)):
+        results = fan_out(prompt, targets, openrouter_api_key)
+    for result in results:
+        record_llm_stage(result.provider, result.model, result.latency_s, prompt, result.text, cached=result.cached,
+                         prompt_tokens=result.prompt_tokens, completion_tokens=result.completion_tokens, error=result.error or None)
+    return results
+
+def pdf_report_job(job, aggs, ai_text, theme, granularity, include_charts, report_key):
+    """Tugas penyusunan laporan PDF; jika gambar grafik gagal dibuat, laporan teks tetap dihasilkan."""
+    from report import build_pdf_report_cached
+    warning = ""
+    try:
+        pdf_bytes = build_pdf_report_cached(aggs, ai_text, theme=theme, granularity=granularity, with_charts=include_charts)
+    except Exception as e:
+        if not include_charts:
+            raise
+        # Misalnya kaleido belum terpasang
+        warning = f"Gambar grafik tidak dapat dibuat ({e}). Laporan dibuat tanpa grafik."
+        job.check_cancelled()
+        pdf_bytes = build_pdf_report_cached(aggs, ai_text, theme=theme, granularity=granularity, with_charts=False)
+    return {"key": report_key, "bytes": pdf_bytes, "warning": warning}
+
+def apply_ai_result(job):
+    result = job.result
+    if not result.cached:
+        record_ai_timing(result)
+    if result.ok:
+        st.session_state.ai_recommendations = result.text
+    else:
+        st.session_state.ai_recommendations = ""
+        provider_name = "Gemini" if result.provider == "gemini" else "OpenRouter"
+        st.session_state.job_notices["ai"] = ("error", f"Error menghasilkan rekomendasi AI {provider_name}: {result.error}")
+
+def apply_comparison_result(job):
+    st.session_state.ai_comparison = job.result
+
+def apply_pdf_result(job):
+    st.session_state.pdf_report = job.result
+    if job.result["warning"]:
+        st.session_state.job_notices["pdf"] = ("warning", job.result["warning"])
+
+# Penerap hasil tugas yang selesai per slot
+JOB_RESULT_HANDLERS = {"ai": apply_ai_result, "compare": apply_comparison_result, "pdf": apply_pdf_result}
+
+def submit_job(slot, label, func, *args, **kwargs):
+    """Mengirim tugas latar belakang untuk `slot` (menggantikan pesan hasil sebelumnya) dan menyimpan ID-nya di sesi."""
+    st.session_state.job_notices.pop(slot, None)
+    job = job_queue.submit(slot, func, *args, label=label, owner=st.session_state.session_id, **kwargs)
+    st.session_state.jobs[slot] = job.id
+    return job
+
+def active_job(slot):
+    """Tugas `slot` yang belum diambil hasilnya (masih berjalan atau baru selesai), atau None."""
+    job_id = st.session_state.jobs.get(slot)
+    return job_queue.get(job_id) if job_id else None
+
+def job_running(*slots):
+    return any(job is not None and not job.done for job in map(active_job, slots))
+
+def job_poll_interval(*slots):
+    """Selang rerun berkala untuk fragmen yang menampilkan tugas `slots` (None jika tidak ada yang berjalan)."""
+    return JOB_POLL_SECONDS if job_running(*slots) else None
+
+def collect_jobs():
+    """Mengambil hasil tugas latar belakang sesi ini yang sudah selesai dan menerapkannya ke state sesi."""
+    for slot, job_id in list(st.session_state.jobs.items()):
+        job = job_queue.get(job_id)
+        if job is not None and not job.done:
+            continue
+        del st.session_state.jobs[slot]
+        if job is None:
+            # Sudah dibuang dari riwayat antrean
+            continue
+        if job.timing is not None:
+            store_instrumentation(job.timing)
+        if job.status == "cancelled":
+            st.session_state.job_notices[slot] = ("info", f"{job.label} dibatalkan.")
+        elif job.status == "failed":
+            st.session_state.job_notices[slot] = ("error", f"{job.label} gagal: {job.error}")
+        else:
+            JOB_RESULT_HANDLERS[slot](job)
 
-    # Ringkasan tren engagement
-    df_sorted = df.sort_values('date')
-    engagement_trend_summary = "Tidak ada tren engagement yang jelas."
-    if len(df_sorted) > 1:
-        first_engagement = df_sorted['engagements'].iloc[0]
-        last_engagement = df_sorted['engagements'].iloc[-1]
-        if last_engagement > first_engagement:
-            engagement_trend_summary = "Ada tren peningkatan engagement secara keseluruhan."
-        elif last_engagement < first_engagement:
-            engagement_trend_summary = "Ada tren penurunan engagement secara keseluruhan."
-
-    prompt_summary = f"""
-    Total entri data: {summary_data['totalEntries']}
-    Distribusi Sentimen Teratas: {summary_data['sentimentCounts']}
-    Engagement Platform Teratas: {summary_data['platformEngagements']}
-    Distribusi Tipe Media Teratas: {summary_data['mediaTypeCounts']}
-    Lokasi Teratas: {summary_data['topLocations']}
-    Ringkasan Tren Engagement: {engagement_trend_summary}
+def render_job_status(slot, partial_title=None):
+    """
+    Status tugas `slot` yang sedang berjalan beserta tombol batal (dan teks parsialnya), atau pesan hasil
+    tugas terakhir. Saat tugas selesai, rerun penuh dipicu agar hasilnya diterapkan ke seluruh dashboard.
     """
-    return prompt_summary
+    job = active_job(slot)
+    if job is not None and job.done:
+        st.rerun()
+    if job is None:
+        notice = st.session_state.job_notices.get(slot)
+        if notice:
+            getattr(st, notice[0])(notice[1])
+        return
+
+    col_status, col_cancel = st.columns([4, 1])
+    with col_status:
+        st.info(f"{job.label}: {job.status_label} ({job.elapsed_s:.0f} detik). Anda tetap dapat membuka bagian lain; hasilnya tersimpan setelah selesai.")
+    with col_cancel:
+        if st.button("Batalkan", key=f"cancel_job_{slot}", disabled=job.cancel_requested):
+            job_queue.cancel(job.id)
+            st.rerun()
+    if partial_title and job.partial:
+        st.subheader(partial_title)
+        st.write(job.partial_text)
 
 # --- Layout Dashboard Utama ---
+configure_timing_log()
+section_timer = SectionTimer().activate()
+collect_jobs()
 
 st.title("☁️ Interactive Media Intelligence Dashboard ☁️")
 
@@ -158,13 +345,16 @@ Dashboard ini memungkinkan Anda menganalisis data intelijen media melalui grafik
 
 # --- Sidebar untuk Bantuan ---
 with st.sidebar:
+    # Filter data diisi setelah data diproses (lihat bagian Filter Data di bawah)
+    filter_sidebar = st.container()
+
     st.header("Panduan Penggunaan Dashboard")
     st.markdown("""
     ### Cara Menggunakan
     1.  **Masukkan Data Manual:** Isi kolom input untuk setiap entri data di bawah "Manual Data Entry". Klik "Add New Row" untuk entri tambahan. Klik "Process Manual Data & Generate Charts" untuk menggunakan data ini.
-    2.  **Unggah File CSV:** Atau, unggah file CSV di bawah "Upload CSV File". Sistem akan secara otomatis memprosesnya dan menghasilkan grafik.
+    2.  **Unggah File CSV:** Atau, unggah satu atau beberapa file CSV (termasuk .csv.gz dan arsip .zip) di bawah "Upload CSV File". Sistem akan secara otomatis menggabungkan dan memprosesnya, lalu menghasilkan grafik. Untuk file yang sangat besar, aktifkan "Mode streaming" agar file dibaca per potongan. Untuk ekspor harian, aktifkan "mode append" agar file baru ditambahkan ke data yang sudah ada tanpa baris duplikat.
     3.  **Pembersihan Data Otomatis:** Data yang Anda masukkan/unggah akan secara otomatis dibersihkan (konversi tanggal, mengisi nilai yang hilang, menormalisasi nama kolom).
-    4.  **Lihat Grafik Interaktif:** Setelah data bersih, lima grafik akan muncul. Anda dapat mengarahkan kursor ke elemen grafik untuk melihat detailnya.
+    4.  **Lihat Grafik Interaktif:** Setelah data bersih, lima grafik akan muncul. Anda dapat mengarahkan kursor ke elemen grafik untuk melihat detailnya. Gunakan "Filter Data" di sidebar untuk mempersempit rentang tanggal, platform, sentimen, atau brand, dan mengubah granularitas tren. Pilih "Tampilkan bagian" untuk berpindah antara grafik, analisis AI, dan unduh laporan; hanya bagian yang dipilih yang dihitung.
     5.  **Hasilkan Analisis AI:** Klik salah satu tombol "Generate AI Analysis" untuk mendapatkan ringkasan dan rekomendasi dari model AI berdasarkan data yang diproses. Untuk OpenRouter AI, pastikan Anda telah memasukkan API Key dan memilih model.
     6.  **Unduh Laporan:** Gunakan tombol "Download Report as PDF" untuk menyimpan seluruh dashboard sebagai dokumen PDF (laporan berbasis teks).
     7.  **Toggle Mode:** Gunakan ikon bulan/matahari di kanan atas aplikasi Streamlit untuk beralih antara mode terang dan gelap (tema asli Streamlit).
@@ -189,18 +379,19 @@ with st.sidebar:
     -   **Q: Bisakah saya mengunduh grafik secara langsung?**
         -   A: Grafik Plotly Streamlit memungkinkan pengunduhan langsung sebagai PNG/SVG dari modebar grafik.
     -   **Q: Apakah data saya disimpan?**
-        -   A: Tidak, data Anda hanya diproses di browser/sesi Streamlit Anda dan tidak disimpan di server mana pun.
+        -   A: Tidak, kecuali Anda menekan "Simpan Dataset". Tanpa itu, data hanya diproses di sesi Streamlit Anda dan tidak disimpan di server mana pun.
     -   **Q: Bagaimana cara menggunakan OpenRouter AI?**
         -   A: Anda perlu memasukkan API Key OpenRouter Anda di kolom yang tersedia dan memilih model AI dari dropdown.
     """)
 
 # --- Bagian Input Data ---
+section_timer.mark("Input Data")
 st.header("1. Masukkan Data Anda")
 st.write("Pilih bagaimana Anda ingin memasukkan data Anda: secara manual atau dengan mengunggah file CSV.")
 
 data_input_method = st.radio(
     "Pilih metode input data:",
-    ("Input Data Manual", "Unggah File CSV"),
+    ("Input Data Manual", "Unggah File CSV", "Buka Dataset Tersimpan"),
     key="data_input_method_radio"
 )
 
@@ -220,8 +411,9 @@ if data_input_method == "Input Data Manual":
 
     if st.button("Proses Data Manual & Hasilkan Grafik", key="process_manual_button"):
         if not edited_df.empty:
-            st.session_state.cleaned_data = clean_data(edited_df.copy())
-            if st.session_state.cleaned_data.empty:
+            manual_stats = {}
+            store_cleaned_data(clean_data(edited_df.copy(), notify_streamlit, stats=manual_stats), stats=manual_stats)
+            if not has_data():
                 data_status_container.error("Tidak ada data valid yang ditemukan setelah pembersihan. Harap periksa entri manual Anda.")
                 st.session_state.ai_recommendations = "" # Bersihkan rekomendasi AI
             else:
@@ -232,164 +424,299 @@ if data_input_method == "Input Data Manual":
 
 elif data_input_method == "Unggah File CSV":
     st.subheader("Unggah File CSV")
-    uploaded_file = st.file_uploader(
-        "Unggah file CSV dengan kolom: Date, Platform, Sentiment, Location, Engagements, Media Type, Influencer Brand, Post Type",
-        type=["csv"],
+    uploaded_files = st.file_uploader(
+        "Unggah satu atau beberapa file CSV (boleh .csv.gz atau arsip .zip) dengan kolom: Date, Platform, Sentiment, Location, Engagements, Media Type, Influencer Brand, Post Type",
+        type=["csv", "gz", "zip"],
+        accept_multiple_files=True,
         key="csv_uploader" # Key unik
     )
+    streaming_mode = st.checkbox(
+        "Mode streaming untuk file CSV sangat besar",
+        key="csv_streaming_mode",
+        help="File dibaca per potongan dan hanya agregatnya yang disimpan, sehingga baris mentah tidak ditahan di memori."
+    )
+    approximate_mode = st.checkbox(
+        "Mode perkiraan (sketsa) untuk arsip sangat besar",
+        key="csv_approximate_mode",
+        disabled=not streaming_mode,
+        help="Lokasi dan brand teratas, jumlah lokasi/brand berbeda, dan distribusi engagement diperkirakan dengan sketsa yang ringkas; batas galatnya ditampilkan di wawasan. Sentimen, platform, tipe media, dan tren tetap eksak."
+    )
+    append_mode = st.checkbox(
+        "Tambahkan ke data yang sedang aktif (mode append)",
+        key="csv_append_mode",
+        disabled=streaming_mode,
+        help="Hanya batch baru yang dibersihkan; baris yang sudah ada dilewati, dan agregat serta grafik diperbarui tanpa menghitung ulang seluruh riwayat."
+    )
 
-    if uploaded_file is not None:
+    if uploaded_files:
         try:
-            df_uploaded = pd.read_csv(uploaded_file)
-            st.session_state.cleaned_data = clean_data(df_uploaded.copy())
-            if st.session_state.cleaned_data.empty:
+            # Parsing dan pembersihan hanya diulang jika konten salah satu file berubah
+            known_digests = st.session_state.uploaded_file_digests
+            file_digests = {
+                uploaded.file_id: known_digests.get(uploaded.file_id) or content_hash(uploaded.getvalue())
+                for uploaded in uploaded_files
+            }
+            st.session_state.uploaded_file_digests = file_digests
+            digest = combined_hash(file_digests.values())
+            if streaming_mode:
+                fingerprint = f"{digest}:approx" if approximate_mode else f"{digest}:stream"
+                is_new_file = fingerprint != st.session_state.data_fingerprint
+                if is_new_file:
+                    progress_bar = st.progress(0.0, text="Membaca CSV per potongan...")
+                    total_size = sum(uploaded.size for uploaded in uploaded_files)
+
+                    def show_stream_progress(rows, rows_per_second, position):
+                        fraction = min(position / total_size, 1.0) if position and total_size else 0.0
+                        progress_bar.progress(fraction, text=f"{rows:,} baris diproses ({rows_per_second:,.0f} baris/detik)")
+
+                    sources = expand_sources([(uploaded.name, uploaded.getvalue()) for uploaded in uploaded_files])
+                    aggs, preview, stream_stats = stream_csv_aggregates(sources, notify=notify_streamlit,
+                                                                        on_progress=show_stream_progress, approximate=approximate_mode)
+                    store_streamed_aggregates(aggs, preview, fingerprint, stream_stats)
+                    progress_bar.empty()
+            elif append_mode:
+                dataset = st.session_state.appended_dataset
+                if dataset is None and st.session_state.streamed_aggregates is not None:
+                    # Data streaming hanya berupa agregat (mungkin sketsa) tanpa baris mentah: batch tidak dapat
+                    # dideduplikasi terhadapnya, jadi append dimulai dari dataset kosong
+                    st.warning("Data aktif berasal dari mode streaming (tanpa baris mentah) sehingga tidak dapat menjadi riwayat. Batch yang diunggah dimulai sebagai dataset baru.")
+                    dataset = IncrementalDataset()
+                elif dataset is None:
+                    # Data aktif menjadi riwayat; tabel agregatnya dipakai ulang tanpa dihitung ulang
+                    history_base = current_aggregates().base if has_data() else None
+                    dataset = IncrementalDataset(st.session_state.cleaned_data, history_base, st.session_state.data_fingerprint)
+                # Setiap file adalah satu batch; file yang sudah pernah ditambahkan dilewati
+                new_files = [(uploaded, file_digests[uploaded.file_id]) for uploaded in uploaded_files
+                             if file_digests[uploaded.file_id] not in dataset.batches]
+                is_new_file = bool(new_files)
+                for uploaded, file_digest in new_files:
+                    _, cache_entry = load_sources_cached([(uploaded.name, uploaded.getvalue())], file_digest, notify_streamlit)
+                    dataset.append(cache_entry.df, file_digest)
+                    store_appended_dataset(dataset, cache_entry.stats)
+                added, duplicates = dataset.last_append
+                st.caption(f"Batch terakhir: {added:,} baris baru ditambahkan, {duplicates:,} baris duplikat dilewati. Total {dataset.rows:,} baris dari {len(dataset.batches)} batch.")
+            else:
+                is_new_file = digest != st.session_state.data_fingerprint
+                fingerprint, cache_entry = load_sources_cached([(uploaded.name, uploaded.getvalue()) for uploaded in uploaded_files],
+                                                                digest, notify_streamlit)
+                store_cleaned_data(cache_entry.df, fingerprint, cache_entry.stats)
+                if cache_entry.source_nbytes and not cache_entry.df.empty:
+                    st.caption(memory_report(cache_entry.source_nbytes, cache_entry.nbytes))
+                ingest_summary = cache_entry.stats.get('ingest')
+                if ingest_summary:
+                    with st.expander(f"Throughput parsing: {len(ingest_summary['files'])} file, mesin {ingest_summary['engine']}, "
+                                     f"{ingest_summary['workers']} thread, {ingest_summary['seconds']:.2f} detik"):
+                        st.dataframe(throughput_frame(ingest_summary), hide_index=True, use_container_width=True)
+            if not has_data():
                 data_status_container.error("Tidak ada data valid yang ditemukan dalam CSV setelah pembersihan. Harap periksa format dan konten file CSV Anda.")
                 st.session_state.ai_recommendations = "" # Bersihkan rekomendasi AI
             else:
                 data_status_container.success("File CSV berhasil diproses! Grafik dan analisis AI siap.")
                 st.write("5 baris pertama data yang diproses:")
-                st.dataframe(st.session_state.cleaned_data.head())
-                st.session_state.ai_recommendations = "" # Bersihkan rekomendasi AI lama jika ada
+                st.dataframe(st.session_state.data_preview)
+                if is_new_file:
+                    st.session_state.ai_recommendations = "" # Bersihkan rekomendasi AI lama jika file berubah
         except Exception as e:
             data_status_container.error(f"Error membaca file CSV: {e}")
-            st.session_state.cleaned_data = pd.DataFrame() # Bersihkan data saat terjadi kesalahan
-            st.session_state.ai_recommendations = "" # Bersihkan rekomendasi AI
+            if not append_mode:
+                # Pada mode append data yang sudah aktif tetap dipertahankan; batch yang gagal tidak ditambahkan
+                store_cleaned_data(pd.DataFrame()) # Bersihkan data saat terjadi kesalahan
+                st.session_state.ai_recommendations = "" # Bersihkan rekomendasi AI
+
+elif data_input_method == "Buka Dataset Tersimpan":
+    st.subheader("Buka Dataset Tersimpan")
+    with section_timer.imports():
+        # pyarrow.dataset hanya dimuat saat penyimpanan dataset dipakai
+        from store import DASHBOARD_COLUMNS, list_datasets, load_dataset
+    saved_datasets = list_datasets()
+    if not saved_datasets:
+        st.info("Belum ada dataset tersimpan. Proses data manual atau CSV terlebih dahulu, lalu simpan dari bagian Pembersihan Data.")
+    else:
+        selected_dataset = st.selectbox(
+            "Pilih dataset:",
+            options=saved_datasets,
+            format_func=lambda manifest: f"{manifest['name']} ({manifest['rows']:,} baris, {manifest['start']} s.d. {manifest['end']})",
+            key="saved_dataset_select"
+        )
+        dataset_start = date.fromisoformat(selected_dataset['start'])
+        dataset_end = date.fromisoformat(selected_dataset['end'])
+        selected_range = st.date_input(
+            "Rentang tanggal yang dibuka:",
+            value=(dataset_start, dataset_end),
+            min_value=dataset_start,
+            max_value=dataset_end,
+            key=f"saved_dataset_range_{selected_dataset['fingerprint']}"
+        )
+
+        if st.button("Buka Dataset", key="open_saved_dataset_button"):
+            # Hanya kolom dan partisi bulan yang dibutuhkan dashboard yang dibaca dari disk
+            range_start, range_end = (selected_range[0], selected_range[-1]) if selected_range else (dataset_start, dataset_end)
+            try:
+                reopened_key = f"{selected_dataset['fingerprint']}:{range_start}:{range_end}"
+                # Jika sesi lain sudah membuka dataset dan rentang yang sama, pakai DataFrame yang sudah ada di memori
+                shared_entry = shared_datasets.get(reopened_key)
+                if shared_entry is not None:
+                    reopened = shared_entry.df
+                else:
+                    reopened = load_dataset(selected_dataset['fingerprint'], columns=DASHBOARD_COLUMNS, start=range_start, end=range_end)
+                store_cleaned_data(reopened, reopened_key)
+                st.session_state.ai_recommendations = ""
+                if has_data():
+                    data_status_container.success(f"Dataset '{selected_dataset['name']}' dibuka ({len(reopened):,} baris).")
+                else:
+                    data_status_container.error("Tidak ada data pada rentang tanggal yang dipilih.")
+            except Exception as e:
+                data_status_container.error(f"Error membuka dataset tersimpan: {e}")
+
+# --- Filter Data (Sidebar) ---
+section_timer.mark("Filter & Pembersihan")
+# Semua grafik dan wawasan membaca potongan cube agregat, bukan memindai ulang baris mentah
+if has_data():
+    cube = get_cube(current_aggregates(), st.session_state.data_fingerprint)
+    first_day, last_day = cube.date_range
+    filter_key = st.session_state.data_fingerprint
+    with filter_sidebar:
+        st.header("Filter Data")
+        filter_range = st.date_input(
+            "Rentang tanggal:",
+            value=(first_day, last_day),
+            min_value=first_day,
+            max_value=last_day,
+            key=f"filter_date_range_{filter_key}"
+        )
+        filter_platforms = st.multiselect("Platform:", cube.options('platform'), key=f"filter_platform_{filter_key}")
+        filter_sentiments = st.multiselect("Sentimen:", cube.options('sentiment'), key=f"filter_sentiment_{filter_key}")
+        filter_brands = st.multiselect("Influencer Brand:", cube.options('influencer_brand'), key=f"filter_brand_{filter_key}",
+                                       disabled=cube.sketches is not None)
+        if cube.sketches is not None:
+            st.caption("Mode perkiraan: lokasi dan brand diringkas dengan sketsa untuk seluruh data, sehingga filter brand tidak tersedia dan filter lain tidak memengaruhi grafik lokasi.")
+        granularity_label = st.radio("Granularitas tren:", list(GRANULARITIES), horizontal=True, key="filter_granularity")
+
+    granularity = GRANULARITIES[granularity_label]
+    range_start, range_end = (filter_range[0], filter_range[-1]) if filter_range else (first_day, last_day)
+    aggs = cube.query(range_start, range_end, filter_platforms, filter_sentiments, filter_brands, granularity)
 
 # --- Status Pembersihan Data ---
-if not st.session_state.cleaned_data.empty:
+if has_data():
     st.header("2. Pembersihan Data")
     st.info("Pembersihan data selesai. Melanjutkan untuk menghasilkan grafik.")
+    if st.session_state.cleaning_stats:
+        st.caption(date_parse_summary(st.session_state.cleaning_stats))
+
+    # Simpan data bersih ke disk agar dapat dibuka ulang tanpa parsing CSV
+    if st.session_state.streamed_aggregates is None:
+        with st.expander("Simpan dataset ke penyimpanan lokal"):
+            dataset_name = st.text_input("Nama dataset:", value=f"Dataset {date.today():%Y-%m-%d}", key="save_dataset_name")
+            if st.button("Simpan Dataset", key="save_dataset_button"):
+                with section_timer.imports():
+                    from store import save_dataset
+                try:
+                    manifest = save_dataset(active_rows(), st.session_state.data_fingerprint, dataset_name)
+                    st.success(f"Dataset '{manifest['name']}' disimpan ({manifest['rows']:,} baris). Buka kembali melalui opsi \"Buka Dataset Tersimpan\".")
+                except Exception as e:
+                    st.error(f"Error menyimpan dataset: {e}")
+
+
+# --- Navigasi Bagian ---
+if has_data():
+    active_section = st.radio(
+        "Tampilkan bagian:",
+        DASHBOARD_SECTIONS,
+        horizontal=True,
+        key="dashboard_section",
+        help="Hanya bagian yang dipilih yang dihitung dan ditampilkan, sehingga mengedit data atau filter tidak merender ulang semua bagian."
+    )
 
+def is_dark_theme():
+    """Mendeteksi tema Streamlit saat ini (dipakai grafik dashboard dan gambar grafik laporan)."""
+    # Gunakan st.query_params untuk mendeteksi tema jika theme.base tidak langsung berubah untuk beberapa elemen
+    current_theme_query = st.query_params.get("theme")
+    return (st.get_option("theme.base") == "dark") or (current_theme_query == "dark")
 
 # --- Bagian Grafik ---
-if not st.session_state.cleaned_data.empty:
+@timed_fragment
+def render_charts_section(aggs, granularity):
+    """Bagian grafik dan wawasan; interaksi di dalamnya hanya menjalankan ulang fragmen ini."""
+    section_timer.mark("Grafik & Wawasan")
+    with section_timer.imports():
+        from charts import engagement_trend_figure, location_figure, media_type_figure, platform_figure, sentiment_figure
+
     st.header("3. Grafik & Wawasan Interaktif")
-    df = st.session_state.cleaned_data
+    if aggs.empty:
+        st.info("Tidak ada data yang cocok dengan filter yang dipilih.")
     
     # Mendapatkan tema Streamlit saat ini
-    # Gunakan st.query_params untuk mendeteksi tema jika theme.base tidak langsung berubah untuk beberapa elemen
-    current_theme_query = st.query_params.get("theme")
-    is_dark_mode = (st.get_option("theme.base") == "dark") or (current_theme_query == "dark")
-
-    chart_colors = get_chart_colors(is_dark_mode)
+    is_dark_mode = is_dark_theme()
 
     # Grafik 1: Distribusi Sentimen (Pie Chart)
     st.subheader("Distribusi Sentimen")
-    sentiment_counts = df['sentiment'].value_counts()
-    fig_sentiment = go.Figure(data=[go.Pie(
-        labels=sentiment_counts.index,
-        values=sentiment_counts.values,
-        hole=0.4,
-        marker_colors=px.colors.sequential.Bluyl if is_dark_mode else px.colors.sequential.Blues,
-        hoverinfo='label+percent+value',
-        textinfo='percent',
-        textposition='inside'
-    )])
-    fig_sentiment.update_layout(get_common_plotly_layout("Distribusi Sentimen", is_dark_mode))
-    st.plotly_chart(fig_sentiment, use_container_width=True)
-    display_insights_text([
-        f"Sentimen '{sentiment_counts.index[0]}' paling dominan, menyumbang {sentiment_counts.iloc[0]/sentiment_counts.sum():.1%} dari total." if len(sentiment_counts) > 0 else "Tidak ada data sentimen.",
-        f"Sentimen kedua yang paling umum adalah '{sentiment_counts.index[1]}'." if len(sentiment_counts) > 1 else "",
-        f"Terdapat perbedaan mencolok antara dua sentimen teratas dengan '{sentiment_counts.index[2]}'." if len(sentiment_counts) > 2 else ""
-    ])
+    with stage("grafik: Distribusi Sentimen"):
+        st.plotly_chart(sentiment_figure(aggs, is_dark_mode), use_container_width=True)
+    display_insights_text(sentiment_insights(aggs))
 
 
     # Grafik 2: Tren Engagement Seiring Waktu (Line Chart)
     st.subheader("Tren Engagement Seiring Waktu")
-    daily_engagements = df.groupby(df['date'].dt.date)['engagements'].sum().reset_index()
-    daily_engagements['date'] = pd.to_datetime(daily_engagements['date']) # Konversi kembali ke datetime untuk plotly
-    fig_engagement_trend = px.line(
-        daily_engagements,
-        x='date',
-        y='engagements',
-        markers=True,
-        color_discrete_sequence=[chart_colors[0]]
-    )
-    fig_engagement_trend.update_layout(get_common_plotly_layout("Tren Engagement Seiring Waktu", is_dark_mode))
-    st.plotly_chart(fig_engagement_trend, use_container_width=True)
+    daily_engagements = aggs.daily_engagements
+    trend_window = daily_engagements
+    if len(daily_engagements) > MAX_TREND_POINTS:
+        # Seri panjang dikirim dalam bentuk ringkas; perbesar rentang untuk melihat resolusi penuh.
+        # Slider hanya mengirim batas tanggal ke browser; potongan diambil dan di-downsample di server.
+        trend_dates = daily_engagements['date']
+        first_date, last_date = trend_dates.iloc[0].date(), trend_dates.iloc[-1].date()
+        zoom_start, zoom_end = st.slider(
+            "Perbesar rentang tren:",
+            min_value=first_date,
+            max_value=last_date,
+            value=(first_date, last_date),
+            format="YYYY-MM-DD",
+            key=f"trend_zoom_{st.session_state.data_fingerprint}_{granularity}"
+        )
+        trend_window = daily_engagements[trend_dates.between(pd.Timestamp(zoom_start), pd.Timestamp(zoom_end)).to_numpy()]
+    with stage("grafik: Tren Engagement", points=len(trend_window)):
+        fig_engagement_trend, trend_points = engagement_trend_figure(trend_window, is_dark_mode, trends=aggs.trends)
+        st.plotly_chart(fig_engagement_trend, use_container_width=True)
+    if trend_points < len(trend_window):
+        st.caption(f"Menampilkan {trend_points:,} dari {len(trend_window):,} titik (puncak dan titik terendah dipertahankan). Perbesar rentang untuk resolusi penuh.")
     
-    engagement_insights = []
-    if len(daily_engagements) > 1:
-        first_engagement = daily_engagements['engagements'].iloc[0]
-        last_engagement = daily_engagements['engagements'].iloc[-1]
-        if last_engagement > first_engagement:
-            engagement_insights.append("Secara keseluruhan, terlihat tren peningkatan engagement seiring waktu.")
-        elif last_engagement < first_engagement:
-            engagement_insights.append("Secara keseluruhan, terlihat tren penurunan engagement seiring waktu.")
-        else:
-            engagement_insights.append("Engagement cenderung stabil selama periode yang diamati.")
-
-        peak_day_row = daily_engagements.loc[daily_engagements['engagements'].idxmax()]
-        engagement_insights.append(f"Engagement tertinggi tercatat pada tanggal {peak_day_row['date'].strftime('%Y-%m-%d')} dengan {int(peak_day_row['engagements'])} engagement.")
-
-        lowest_day_row = daily_engagements.loc[daily_engagements['engagements'].idxmin()]
-        engagement_insights.append(f"Engagement terendah diamati pada tanggal {lowest_day_row['date'].strftime('%Y-%m-%d')} dengan {int(lowest_day_row['engagements'])} engagement.")
-    else:
-        engagement_insights.append("Tidak cukup data untuk menentukan tren engagement.")
-    display_insights_text(engagement_insights)
+    display_insights_text(trend_insights(aggs, granularity))
 
 
     # Grafik 3: Engagement Berdasarkan Platform (Bar Chart)
     st.subheader("Engagement Berdasarkan Platform")
-    platform_engagements = df.groupby('platform')['engagements'].sum().sort_values(ascending=False).reset_index()
-    platform_engagements.columns = ['platform', 'engagements'] # Memastikan nama kolom
-    fig_platform = px.bar(
-        platform_engagements,
-        x='platform',
-        y='engagements',
-        color_discrete_sequence=[chart_colors[1]]
-    )
-    fig_platform.update_layout(get_common_plotly_layout("Total Engagement per Platform", is_dark_mode))
-    st.plotly_chart(fig_platform, use_container_width=True)
-    display_insights_text([
-        f"'{platform_engagements['platform'].iloc[0]}' adalah platform dengan kinerja terbaik dalam hal total engagement, menunjukkan jangkauan yang kuat." if len(platform_engagements) > 0 else "Tidak ada data platform.",
-        f"'{platform_engagements['platform'].iloc[1]}' menyusul sebagai platform dengan engagement tertinggi kedua." if len(platform_engagements) > 1 else "",
-        f"Terdapat penurunan engagement yang signifikan setelah dua platform teratas, dengan '{platform_engagements['platform'].iloc[2]}' tertinggal di belakang." if len(platform_engagements) > 2 else ""
-    ])
+    with stage("grafik: Engagement per Platform"):
+        st.plotly_chart(platform_figure(aggs, is_dark_mode), use_container_width=True)
+    display_insights_text(platform_insights(aggs))
 
 
     # Grafik 4: Campuran Tipe Media (Pie Chart)
     st.subheader("Campuran Tipe Media")
-    media_type_counts = df['media_type'].value_counts()
-    fig_media_type = go.Figure(data=[go.Pie(
-        labels=media_type_counts.index,
-        values=media_type_counts.values,
-        hole=0.4,
-        marker_colors=px.colors.sequential.Aggrnyl if is_dark_mode else px.colors.sequential.Greens,
-        hoverinfo='label+percent+value',
-        textinfo='percent',
-        textposition='inside'
-    )])
-    fig_media_type.update_layout(get_common_plotly_layout("Campuran Tipe Media", is_dark_mode))
-    st.plotly_chart(fig_media_type, use_container_width=True)
-    display_insights_text([
-        f"Tipe media yang paling sering digunakan adalah '{media_type_counts.index[0]}', menunjukkan bahwa itu adalah format konten utama." if len(media_type_counts) > 0 else "Tidak ada data tipe media.",
-        f"'{media_type_counts.index[1]}' mewakili pangsa media terbesar kedua." if len(media_type_counts) > 1 else "",
-        f"Terdapat campuran tipe media yang beragam, namun '{media_type_counts.index[2]}' menunjukkan kontribusi yang moderat." if len(media_type_counts) > 2 else ""
-    ])
+    with stage("grafik: Campuran Tipe Media"):
+        st.plotly_chart(media_type_figure(aggs, is_dark_mode), use_container_width=True)
+    display_insights_text(media_type_insights(aggs))
 
 
     # Grafik 5: Top 5 Lokasi (Bar Chart)
     st.subheader("Top 5 Lokasi")
-    location_counts = df['location'].value_counts().head(5).reset_index()
-    location_counts.columns = ['location', 'count'] # Mengubah nama kolom untuk kejelasan
-    fig_locations = px.bar(
-        location_counts,
-        x='location',
-        y='count',
-        color_discrete_sequence=[chart_colors[2]]
-    )
-    fig_locations.update_layout(get_common_plotly_layout("Top 5 Lokasi berdasarkan Jumlah Aktivitas", is_dark_mode))
-    st.plotly_chart(fig_locations, use_container_width=True)
-    display_insights_text([
-        f"'{location_counts['location'].iloc[0]}' adalah lokasi paling aktif, menunjukkan konsentrasi tinggi aktivitas intelijen media di sini." if len(location_counts) > 0 else "Tidak ada data lokasi.",
-        f"'{location_counts['location'].iloc[1]}' menempati peringkat kedua, menunjukkan area geografis kunci lain untuk aktivitas media." if len(location_counts) > 1 else "",
-        f"Tiga lokasi teratas, termasuk '{location_counts['location'].iloc[2]}', secara kolektif mewakili porsi signifikan dari total aktivitas yang tercatat." if len(location_counts) > 2 else ""
-    ])
+    with stage("grafik: Top 5 Lokasi"):
+        st.plotly_chart(location_figure(aggs, is_dark_mode), use_container_width=True)
+    display_insights_text(location_insights(aggs))
+
+if has_data() and active_section == "Grafik & Wawasan":
+    render_charts_section(aggs, granularity)
 
 
 # --- Bagian Analisis & Rekomendasi AI ---
-if not st.session_state.cleaned_data.empty:
+@timed_fragment(run_every=job_poll_interval("ai", "compare"))
+def render_ai_section(aggs):
+    """
+    Bagian analisis AI; mengetik API key atau memilih model hanya menjalankan ulang fragmen ini.
+    Permintaan model dikirim sebagai tugas latar belakang; selama tugas berjalan fragmen ini memeriksanya berkala.
+    """
+    section_timer.mark("Analisis AI")
+    with section_timer.imports():
+        from fanout import GEMINI_MODEL
+
     st.header("4. Analisis & Rekomendasi AI")
     st.write("Pilih model AI untuk mendapatkan ringkasan strategis dan rekomendasi berdasarkan data Anda.")
 
@@ -417,203 +744,208 @@ if not st.session_state.cleaned_data.empty:
     selected_openrouter_model_name = st.selectbox(
         "Pilih Model AI:",
         options=list(openrouter_models.keys()),
-        index=list(openrouter_models.keys()).index(st.session_state.selected_openrouter_model) if st.session_state.selected_openrouter_model in openrouter_models.values() else 0,
+        index=list(openrouter_models.values()).index(st.session_state.selected_openrouter_model) if st.session_state.selected_openrouter_model in openrouter_models.values() else 0,
         key="openrouter_model_select_ai"
     )
     st.session_state.selected_openrouter_model = openrouter_models[selected_openrouter_model_name] # Perbarui state sesi
 
+    stream_ai_output = st.toggle(
+        "Tampilkan jawaban AI secara streaming",
+        value=True,
+        key="ai_streaming_toggle",
+        help="Jawaban parsial ditampilkan selama model masih menjawab, tanpa menunggu jawaban lengkap."
+    )
+
+    ai_job_running = job_running("ai")
     col_gemini_btn, col_openrouter_btn = st.columns(2)
 
     with col_gemini_btn:
         gemini_button = st.button(
             "Hasilkan Analisis AI (Gemini Flash)",
             key="gemini_analysis_button_ai",
-            disabled=st.session_state.cleaned_data.empty # Nonaktifkan jika tidak ada data
+            disabled=not has_data() or ai_job_running # Nonaktifkan jika tidak ada data atau analisis sedang berjalan
         )
     with col_openrouter_btn:
         openrouter_button = st.button(
             "Hasilkan Analisis AI (OpenRouter)",
             key="openrouter_analysis_button_ai",
-            disabled=st.session_state.cleaned_data.empty or not st.session_state.openrouter_api_key # Nonaktifkan jika tidak ada data atau API key tidak ada
+            disabled=not has_data() or not st.session_state.openrouter_api_key or ai_job_running # Nonaktifkan jika tidak ada data, API key tidak ada, atau analisis sedang berjalan
         )
 
+    # Cache respons diperiksa sekali di dalam tugas (`run_model`): data dan model yang sama menghasilkan
+    # prompt yang sama, sehingga tugas langsung selesai dengan respons tersimpan jika ada
     if gemini_button:
+        final_prompt = build_ai_prompt(aggs)
+        with section_timer.imports():
+            import google.generativeai as genai
         try:
-            with st.spinner("Menghasilkan wawasan dengan Gemini Flash..."):
-                prompt_summary_data = summarize_data_for_ai(df)
-                
-                # Mengumpulkan semua wawasan grafik yang sudah ditampilkan
-                all_chart_insights = []
-                # Ini adalah contoh cara mengumpulkan wawasan. Dalam aplikasi nyata,
-                # Anda akan menyimpan wawasan ini di session_state setelah grafik dibuat.
-                # Untuk demo, ini akan mengambil wawasan sederhana.
-                if not df['sentiment'].empty and len(df['sentiment'].value_counts()) >= 1:
-                    all_chart_insights.append(f"Analisis sentimen menunjukkan bahwa '{df['sentiment'].value_counts().index[0]}' dominan.")
-                if not df.empty and len(df.groupby('platform')['engagements'].sum()) >= 1:
-                    all_chart_insights.append(f"Platform '{df.groupby('platform')['engagements'].sum().idxmax()}' memiliki engagement tertinggi.")
-                if not df['media_type'].empty and len(df['media_type'].value_counts()) >= 1:
-                    all_chart_insights.append(f"Tipe media '{df['media_type'].value_counts().index[0]}' paling sering.")
-                if not df['location'].empty and len(df['location'].value_counts()) >= 1:
-                    all_chart_insights.append(f"Lokasi '{df['location'].value_counts().index[0]}' paling aktif.")
-                
-                final_prompt = f"""
-                Berdasarkan ringkasan data intelijen media berikut:
-                {prompt_summary_data}
-
-                Wawasan utama dari grafik:
-                - {'; '.join(all_chart_insights) if all_chart_insights else "Tidak ada wawasan spesifik dari grafik."}
-
-                Berikan ringkasan singkat data dari 5 grafik di atas (maksimal 2 paragraf) dan kemudian berikan 3 rekomendasi kampanye yang dapat ditindaklanjuti untuk mengoptimalkan strategi di masa depan.
-                """
-                
-                try:
-                    # Mengakses GOOGLE_API_KEY dari Streamlit Secrets
-                    gemini_api_key = st.secrets["GOOGLE_API_KEY"]
-                    genai.configure(api_key=gemini_api_key)
-                except KeyError:
-                    st.error("GOOGLE_API_KEY tidak ditemukan di st.secrets. Harap konfigurasikan.")
-                    st.stop()
-                    
-                model = genai.GenerativeModel('gemini-2.0-flash')
-                response = model.generate_content(final_prompt)
-                st.session_state.ai_recommendations = response.text
-        except Exception as e:
-            st.error(f"Error menghasilkan rekomendasi AI Gemini: {e}")
-            st.session_state.ai_recommendations = ""
+            # Mengakses GOOGLE_API_KEY dari Streamlit Secrets
+            gemini_api_key = st.secrets["GOOGLE_API_KEY"]
+            genai.configure(api_key=gemini_api_key)
+        except (KeyError, FileNotFoundError):
+            st.error("GOOGLE_API_KEY tidak ditemukan di st.secrets. Harap konfigurasikan.")
+            st.stop()
+
+        submit_job("ai", "Analisis AI Gemini Flash", ai_analysis_job, "gemini", GEMINI_MODEL, final_prompt, stream=stream_ai_output)
+        # Rerun penuh agar fragmen ini didaftarkan ulang dengan pemeriksaan berkala
+        st.rerun()
 
     if openrouter_button:
         if not st.session_state.openrouter_api_key:
             st.error("Harap masukkan OpenRouter API Key Anda di bagian konfigurasi.")
             st.session_state.ai_recommendations = ""
         else:
-            try:
-                with st.spinner(f"Menghasilkan wawasan dengan OpenRouter ({st.session_state.selected_openrouter_model})..."):
-                    prompt_summary_data = summarize_data_for_ai(df)
-                    
-                    # Mengumpulkan semua wawasan grafik yang sudah ditampilkan
-                    all_chart_insights = []
-                    # Sama seperti Gemini, Anda akan menarik wawasan aktual jika disimpan atau dihasilkan sebelumnya
-                    if not df['sentiment'].empty and len(df['sentiment'].value_counts()) >= 1:
-                        all_chart_insights.append(f"Analisis sentimen menunjukkan bahwa '{df['sentiment'].value_counts().index[0]}' dominan.")
-                    if not df.empty and len(df.groupby('platform')['engagements'].sum()) >= 1:
-                        all_chart_insights.append(f"Platform '{df.groupby('platform')['engagements'].sum().idxmax()}' memiliki engagement tertinggi.")
-                    if not df['media_type'].empty and len(df['media_type'].value_counts()) >= 1:
-                        all_chart_insights.append(f"Tipe media '{df['media_type'].value_counts().index[0]}' paling sering.")
-                    if not df['location'].empty and len(df['location'].value_counts()) >= 1:
-                        all_chart_insights.append(f"Lokasi '{df['location'].value_counts().index[0]}' paling aktif.")
-                    
-                    final_prompt = f"""
-                    Berdasarkan ringkasan data intelijen media berikut:
-                    {prompt_summary_data}
-
-                    Wawasan utama dari grafik:
-                    - {'; '.join(all_chart_insights) if all_chart_insights else "Tidak ada wawasan spesifik dari grafik."}
-
-                    Berikan ringkasan singkat data dari 5 grafik di atas (maksimal 2 paragraf) dan kemudian berikan 3 rekomendasi kampanye yang dapat ditindaklanjutkan untuk mengoptimalkan strategi di masa depan.
-                    """
-
-                    headers = {
-                        "Authorization": f"Bearer {st.session_state.openrouter_api_key}",
-                        "Content-Type": "application/json",
-                        # 'HTTP-Referer': 'https://your-streamlit-app.streamlit.app', # Opsional: ganti dengan URL aplikasi Anda untuk peringkat OpenRouter
-                        # 'X-Title': 'Media Dashboard Streamlit' # Opsional: ganti dengan judul aplikasi Anda
-                    }
-                    payload = {
-                        "model": st.session_state.selected_openrouter_model,
-                        "messages": [{"role": "user", "content": final_prompt}]
-                    }
-                    response = requests.post("https://openrouter.ai/api/v1/chat/completions", headers=headers, json=payload)
-                    response.raise_for_status() # Menimbulkan pengecualian untuk kesalahan HTTP
-                    result = response.json()
-                    st.session_state.ai_recommendations = result["choices"][0]["message"]["content"]
-            except requests.exceptions.RequestException as e:
-                st.error(f"Error koneksi ke OpenRouter: {e}")
-                st.session_state.ai_recommendations = ""
-            except Exception as e:
-                st.error(f"Error menghasilkan rekomendasi AI OpenRouter: {e}")
-                st.session_state.ai_recommendations = ""
+            final_prompt = build_ai_prompt(aggs)
+            openrouter_model = st.session_state.selected_openrouter_model
+            submit_job("ai", f"Analisis AI OpenRouter ({openrouter_model})", ai_analysis_job, "openrouter", openrouter_model,
+                       final_prompt, st.session_state.openrouter_api_key, stream=stream_ai_output)
+            st.rerun()
+
+    render_job_status("ai", partial_title="Ringkasan dan Rekomendasi yang Dihasilkan AI")
 
-    if st.session_state.ai_recommendations:
+    if st.session_state.ai_recommendations and not job_running("ai"):
         st.subheader("Ringkasan dan Rekomendasi yang Dihasilkan AI")
         st.write(st.session_state.ai_recommendations)
 
+    if st.session_state.ai_timings:
+        last_timing = st.session_state.ai_timings[-1]
+        st.caption(f"Latensi AI terakhir ({last_timing['provider']}/{last_timing['model']}): token pertama {last_timing['ttft_s']:.2f} detik, total {last_timing['total_s']:.2f} detik.")
+    # Perbandingan beberapa model: prompt yang sama dikirim bersamaan, hasil ditampilkan berdampingan
+    with st.expander("Bandingkan Beberapa Model Sekaligus", expanded=job_running("compare")):
+        compare_model_names = st.multiselect(
+            "Model OpenRouter yang dibandingkan:",
+            options=list(openrouter_models.keys()),
+            key="compare_models_select"
+        )
+        compare_include_gemini = st.checkbox("Sertakan Gemini Flash", value=True, key="compare_include_gemini")
+
+        compare_disabled = not (compare_model_names or compare_include_gemini) or job_running("compare")
+        if st.button("Bandingkan Model", key="compare_models_button", disabled=compare_disabled):
+            compare_targets = [("openrouter", openrouter_models[name]) for name in compare_model_names]
+            if compare_include_gemini:
+                with section_timer.imports():
+                    import google.generativeai as genai
+                try:
+                    genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
+                    compare_targets.insert(0, ("gemini", GEMINI_MODEL))
+                except (KeyError, FileNotFoundError):
+                    st.warning("GOOGLE_API_KEY tidak ditemukan di st.secrets, Gemini tidak disertakan dalam perbandingan.")
+            if compare_targets:
+                submit_job("compare", f"Perbandingan {len(compare_targets)} model", ai_comparison_job, build_ai_prompt(aggs),
+                           compare_targets, st.session_state.openrouter_api_key)
+                st.rerun()
+
+        render_job_status("compare")
+
+        comparison = st.session_state.ai_comparison
+        for row_start in range(0, len(comparison), 3):
+            for offset, (col, result) in enumerate(zip(st.columns(3), comparison[row_start:row_start + 3])):
+                with col:
+                    st.markdown(f"**{result.model}** ({result.provider})")
+                    if not result.ok:
+                        st.error(f"Gagal setelah {result.latency_s:.2f} detik: {result.error}")
+                        continue
+                    token_text = f"{result.prompt_tokens or '-'} token prompt, {result.completion_tokens or '-'} token jawaban"
+                    st.caption(f"{result.latency_s:.2f} detik, {token_text}" + (" (dari cache)" if result.cached else ""))
+                    st.write(result.text)
+                    if st.button("Pakai untuk laporan", key=f"use_comparison_result_{row_start + offset}"):
+                        st.session_state.ai_recommendations = result.text
+                        st.rerun()
+
+    cache_stats = response_cache.stats()
+    st.caption(f"Cache respons AI: {cache_stats['hits']} hit, {cache_stats['misses']} miss, {cache_stats['entries']} respons tersimpan ({cache_stats['bytes'] / 1024:,.1f} KB).")
+
+if has_data() and active_section == "Analisis AI":
+    render_ai_section(aggs)
+
 
 # --- Bagian Unduh Laporan ---
-if not st.session_state.cleaned_data.empty:
+@timed_fragment(run_every=job_poll_interval("pdf"))
+def render_report_section(aggs, granularity):
+    """
+    Bagian unduh laporan PDF, dijalankan ulang secara terpisah dari grafik dan analisis AI. PDF disusun
+    sebagai tugas latar belakang; hasil terakhir tetap tersedia selama data dan teks AI tidak berubah.
+    """
+    section_timer.mark("Unduh Laporan")
+    with section_timer.imports():
+        from report import report_fingerprint
     st.header("5. Unduh Laporan")
     
     # Aktifkan tombol unduh hanya jika analisis AI juga ada
     download_pdf_disabled = not bool(st.session_state.ai_recommendations)
 
-    if st.button("Unduh Laporan sebagai PDF", disabled=download_pdf_disabled, key="download_pdf_button_streamlit"):
-        # Buat laporan PDF dasar
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-
-        pdf.cell(200, 10, txt="Laporan Intelijen Media", ln=True, align="C")
-        pdf.ln(10)
-
-        # Tambahkan Rekomendasi AI
-        pdf.set_font("Arial", 'B', 12)
-        pdf.multi_cell(0, 10, txt="Ringkasan dan Rekomendasi yang Dihasilkan AI:")
-        pdf.set_font("Arial", size=10)
-        # Handle karakter non-latin1 dengan encode/decode
-        pdf.multi_cell(0, 5, st.session_state.ai_recommendations.encode('latin-1', 'replace').decode('latin-1'))
-        pdf.ln(10)
-
-        # Tambahkan ringkasan data (dari wawasan saat ini)
-        pdf.set_font("Arial", 'B', 12)
-        pdf.multi_cell(0, 10, txt="Wawasan Utama dari Grafik:")
-        pdf.set_font("Arial", size=10)
-        
-        # Mengumpulkan kembali wawasan untuk PDF
-        all_chart_insights_for_pdf = []
-        sentiment_counts_pdf = df['sentiment'].value_counts()
-        if len(sentiment_counts_pdf) > 0:
-            all_chart_insights_for_pdf.append(f"- Sentimen '{sentiment_counts_pdf.index[0]}' paling dominan.")
-        
-        daily_engagements_pdf = df.groupby(df['date'].dt.date)['engagements'].sum().reset_index()
-        if len(daily_engagements_pdf) > 1:
-            first_engagement_pdf = daily_engagements_pdf['engagements'].iloc[0]
-            last_engagement_pdf = daily_engagements_pdf['engagements'].iloc[-1]
-            if last_engagement_pdf > first_engagement_pdf:
-                all_chart_insights_for_pdf.append("- Secara keseluruhan, terlihat tren peningkatan engagement.")
-            else:
-                all_chart_insights_for_pdf.append("- Tren engagement relatif stabil atau menurun.")
-
-        platform_engagements_pdf = df.groupby('platform')['engagements'].sum().sort_values(ascending=False).reset_index()
-        if not platform_engagements_pdf.empty:
-            all_chart_insights_for_pdf.append(f"- Platform '{platform_engagements_pdf['platform'].iloc[0]}' adalah platform dengan kinerja terbaik.")
-
-        media_type_counts_pdf = df['media_type'].value_counts()
-        if not media_type_counts_pdf.empty:
-            all_chart_insights_for_pdf.append(f"- Tipe media yang paling sering digunakan adalah '{media_type_counts_pdf.index[0]}'.")
+    include_charts = st.checkbox(
+        "Sertakan gambar grafik",
+        value=True,
+        key="pdf_include_charts",
+        help="Kelima grafik disisipkan sebagai gambar beserta wawasannya. Gambar di-cache per data dan tema, sehingga unduhan berikutnya jauh lebih cepat."
+    )
 
-        location_counts_pdf = df['location'].value_counts().head(5).reset_index()
-        if not location_counts_pdf.empty:
-            all_chart_insights_for_pdf.append(f"- Lokasi paling aktif adalah '{location_counts_pdf['location'].iloc[0]}'.")
+    theme = "dark" if is_dark_theme() else "light"
+    report_key = (report_fingerprint(aggs, granularity), st.session_state.ai_recommendations, theme, include_charts)
 
-        for insight in all_chart_insights_for_pdf:
-            pdf.multi_cell(0, 5, insight.encode('latin-1', 'replace').decode('latin-1'))
-        pdf.ln(10)
+    if st.button("Unduh Laporan sebagai PDF", disabled=download_pdf_disabled or job_running("pdf"), key="download_pdf_button_streamlit"):
+        submit_job("pdf", "Laporan PDF", pdf_report_job, aggs, st.session_state.ai_recommendations, theme, granularity,
+                   include_charts, report_key)
+        # Rerun penuh agar fragmen ini didaftarkan ulang dengan pemeriksaan berkala
+        st.rerun()
 
-        # Footer
-        pdf.set_font("Arial", size=8)
-        pdf.cell(200, 10, txt="Powered by Gemini AI", ln=True, align="C")
-        pdf.cell(200, 5, txt="© Copyright Media Intelligence Vokasi UI @LARASDTH", ln=True, align="C")
+    render_job_status("pdf")
 
+    pdf_report = st.session_state.pdf_report
+    if pdf_report is not None and pdf_report["key"] == report_key and not job_running("pdf"):
         # Menyediakan PDF untuk diunduh
         st.download_button(
             label="Klik untuk mengunduh PDF",
-            data=pdf.output(dest='S').encode('latin1'),
+            data=pdf_report["bytes"],
             file_name="Laporan_Intelijen_Media.pdf",
             mime="application/pdf",
             key="download_pdf_button_final_streamlit"
         )
         st.success("Laporan PDF berhasil dibuat dan siap diunduh!")
 
+if has_data() and active_section == "Unduh Laporan":
+    render_report_section(aggs, granularity)
+
+
 # --- Branding Footer (Streamlit apps typically don't have a direct HTML footer, so placed at the bottom) ---
 st.markdown("---")
 st.markdown("<p style='text-align: center; color: grey;'>Powered by Gemini AI</p>", unsafe_allow_html=True)
 st.markdown("<p style='text-align: center; color: grey;'>&copy; Copyright Media Intelligence Vokasi UI @LARASDTH</p>", unsafe_allow_html=True)
+
+# --- Tugas Latar Belakang Sesi Ini ---
+session_jobs = job_queue.jobs(owner=st.session_state.session_id)
+if session_jobs:
+    with st.sidebar.expander("Tugas Latar Belakang", expanded=any(not job.done for job in session_jobs)):
+        for job in session_jobs[:10]:
+            st.caption(f"{job.label}: {job.status_label} ({job.elapsed_s:.1f} detik)")
+
+# --- Laporan Waktu Muat ---
+section_timer.stop()
+with st.sidebar.expander("Waktu Muat Dashboard"):
+    st.caption(f"Rerun terakhir: {section_timer.total_seconds:.2f} detik. \"Impor pertama\" adalah waktu memuat dependensi saat bagian tersebut pertama kali dibuka di proses ini.")
+    st.dataframe(section_timer.report(), hide_index=True, use_container_width=True)
+finish_instrumentation(section_timer)
+
+# --- Panel Debug Instrumentasi ---
+if st.sidebar.toggle("Panel debug instrumentasi", value=DEBUG_PANEL_DEFAULT, key="debug_panel",
+                     help="Waktu dinding, waktu CPU, dan perubahan memori setiap tahap, termasuk latensi dan ukuran payload AI."):
+    with st.sidebar.expander("Instrumentasi Tahap", expanded=True):
+        # Terbaru lebih dulu; pilihan disimpan berdasarkan run_id agar tidak bergeser saat rerun baru masuk
+        runs = {entry["run_id"]: entry for entry in reversed(st.session_state.instrumentation_runs)}
+        selected_run = st.selectbox(
+            "Rerun:",
+            list(runs),
+            format_func=lambda run_id: f"{runs[run_id]['kind']} {run_id} ({runs[run_id]['total_ms']:,.0f} ms)",
+            key="debug_panel_run"
+        )
+        entry = runs[selected_run]
+        st.caption(f"Rerun {entry['run_id']}: {entry['total_ms']:,.0f} ms, {len(entry['stages'])} tahap tercatat. Fragmen yang dijalankan ulang sendiri muncul sebagai entri 'fragment'.")
+        st.dataframe(stages_frame(entry["stages"]), hide_index=True, use_container_width=True)
+        cache_stats = shared_datasets.stats()
+        st.caption(
+            f"Cache dataset bersama: {cache_stats['entries']} dataset di memori ({cache_stats['bytes'] / 1024**2:,.1f} / {cache_stats['max_bytes'] / 1024**2:,.0f} MB), "
+            f"{cache_stats['leased_entries']} dipakai oleh {cache_stats['leases']} sesi, {cache_stats['spilled_entries']} di disk "
+            f"({cache_stats['spill_bytes'] / 1024**2:,.1f} MB); {cache_stats['hits']} hit, {cache_stats['misses']} miss, "
+            f"{cache_stats['spills']} spill, {cache_stats['reloads']} dimuat ulang."
+        )
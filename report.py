@@ -0,0 +1,152 @@
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from aggregates import dataset_fingerprint
+from insights import chart_insights, key_insights
+from timings import stage
+
+REPORT_TITLE = "Laporan Intelijen Media"
+FOOTER_LINES = ["Powered by Gemini AI", "© Copyright Media Intelligence Vokasi UI @LARASDTH"]
+
+# Jumlah PDF jadi yang disimpan di memori (per proses)
+MAX_CACHED_REPORTS = 16
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+
+
+def latin1(text):
+    """Font bawaan FPDF hanya mendukung latin-1; karakter lain diganti '?'."""
+    return text.encode('latin-1', 'replace').decode('latin-1')
+
+
+def report_fingerprint(aggs, granularity="day"):
+    """
+    Sidik jari isi laporan dan granularitas tren. Memakai sidik jari bundle (dataset + parameter query) jika ada;
+    jika tidak, tabel agregat (sudah termasuk filter) di-hash.
+    """
+    if aggs.fingerprint:
+        return f"{aggs.fingerprint}:{granularity}"
+    fingerprint = dataset_fingerprint(aggs.base)
+    if aggs.approximate:
+        # Tabel base mode perkiraan tidak memuat lokasi; jumlah per lokasi berasal dari sketsa
+        fingerprint += dataset_fingerprint(aggs.location_counts.reset_index())[:8]
+    return f"{fingerprint}:{granularity}"
+
+
+def build_pdf_report(aggs, ai_text="", title=REPORT_TITLE, images=None, granularity="day"):
+    """
+    Membangun laporan PDF (rekomendasi AI + wawasan grafik) dari AggregateBundle dan mengembalikan byte PDF.
+    Jika `images` (judul grafik -> byte gambar) diberikan, setiap grafik disisipkan beserta wawasannya;
+    tanpa gambar hanya wawasan utama yang ditulis.
+    fpdf diimpor saat dibutuhkan agar tidak membebani cold start dashboard.
+    """
+    with stage("pdf", images=len(images or {})) as record:
+        pdf_bytes = _render_pdf(aggs, ai_text, title, images, granularity)
+        record["pdf_bytes"] = len(pdf_bytes)
+    return pdf_bytes
+
+
+def _render_pdf(aggs, ai_text, title, images, granularity):
+    from fpdf import FPDF
+    from fpdf.enums import XPos, YPos
+
+    # Setiap blok teks kembali ke margin kiri di baris berikutnya
+    next_line = dict(new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Helvetica", size=12)
+    pdf.cell(0, 10, text=latin1(title), align="C", **next_line)
+    pdf.ln(10)
+
+    if ai_text:
+        pdf.set_font("Helvetica", 'B', 12)
+        pdf.multi_cell(0, 10, text="Ringkasan dan Rekomendasi yang Dihasilkan AI:", **next_line)
+        pdf.set_font("Helvetica", size=10)
+        pdf.multi_cell(0, 5, text=latin1(ai_text), **next_line)
+        pdf.ln(10)
+
+    pdf.set_font("Helvetica", 'B', 12)
+    pdf.multi_cell(0, 10, text="Wawasan Utama dari Grafik:", **next_line)
+    pdf.set_font("Helvetica", size=10)
+    for insight in key_insights(aggs):
+        pdf.multi_cell(0, 5, text=latin1(insight), **next_line)
+    pdf.ln(10)
+
+    if images:
+        insights_by_chart = chart_insights(aggs, granularity)
+        for chart_title, image in images.items():
+            pdf.add_page()
+            pdf.set_font("Helvetica", 'B', 12)
+            pdf.multi_cell(0, 10, text=latin1(chart_title), **next_line)
+            pdf.image(io.BytesIO(image), w=pdf.epw)
+            pdf.ln(5)
+            pdf.set_font("Helvetica", size=10)
+            for insight in insights_by_chart.get(chart_title, []):
+                pdf.multi_cell(0, 5, text=latin1(f"- {insight}"), **next_line)
+        pdf.ln(10)
+
+    pdf.set_font("Helvetica", size=8)
+    for line in FOOTER_LINES:
+        pdf.cell(0, 5, text=latin1(line), align="C", **next_line)
+    return bytes(pdf.output())
+
+
+def build_pdf_report_cached(aggs, ai_text="", title=REPORT_TITLE, theme="light", granularity="day", with_charts=True, workers=None):
+    """
+    Seperti `build_pdf_report`, dengan grafik sebagai gambar (dirender paralel dan di-cache per sidik jari
+    data dan tema) dan byte PDF jadi yang di-cache di memori, sehingga unduhan berulang langsung tersedia.
+    """
+    fingerprint = report_fingerprint(aggs, granularity)
+    ai_digest = hashlib.blake2b(ai_text.encode("utf-8"), digest_size=16).hexdigest()
+    key = (fingerprint, theme, ai_digest, title, with_charts)
+    with _pdf_cache_lock:
+        pdf_bytes = _pdf_cache.get(key)
+        if pdf_bytes is not None:
+            _pdf_cache.move_to_end(key)
+            return pdf_bytes
+
+    images = None
+    if with_charts:
+        from chart_images import render_chart_images
+        with stage("render_grafik", theme=theme) as record:
+            images = render_chart_images(aggs, fingerprint, theme, workers, stats=record)
+    pdf_bytes = build_pdf_report(aggs, ai_text, title, images, granularity)
+
+    with _pdf_cache_lock:
+        _pdf_cache[key] = pdf_bytes
+        while len(_pdf_cache) > MAX_CACHED_REPORTS:
+            _pdf_cache.popitem(last=False)
+    return pdf_bytes
+
+
+def build_json_report(aggs, ai_text="", name="", granularity="day"):
+    """
+    Laporan dalam bentuk dict yang dapat diserialisasi JSON: ringkasan agregat, wawasan, dan teks AI.
+    Pada mode perkiraan, `approximate` memuat ringkasan sketsa beserta batas galatnya.
+    """
+    if aggs.approximate:
+        from sketches import describe_summary
+    daily = aggs.daily_engagements
+    return {
+        "name": name,
+        "total_entries": aggs.total_entries,
+        "start": daily['date'].min().strftime('%Y-%m-%d') if not daily.empty else None,
+        "end": daily['date'].max().strftime('%Y-%m-%d') if not daily.empty else None,
+        "sentiment_counts": {str(k): int(v) for k, v in aggs.sentiment_counts.items()},
+        "platform_engagements": {str(k): float(v) for k, v in aggs.platform_engagements.items()},
+        "media_type_counts": {str(k): int(v) for k, v in aggs.media_type_counts.items()},
+        "top_locations": {str(k): int(v) for k, v in aggs.location_counts.head(5).items()},
+        "insights": chart_insights(aggs, granularity),
+        "key_insights": key_insights(aggs),
+        "ai_recommendations": ai_text,
+        "approximate": describe_summary(aggs.sketches) if aggs.approximate else None,
+    }
+
+
+def dump_json_report(report):
+    return json.dumps(report, ensure_ascii=False, indent=2)
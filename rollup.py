@@ -0,0 +1,358 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from aggregates import AggregateBundle
+from timings import stage
+from trends import period_codes
+
+# Pilihan granularitas waktu untuk grafik tren (label -> kode)
+GRANULARITIES = {"Harian": "day", "Mingguan": "week", "Bulanan": "month"}
+
+# Kolom yang dapat difilter dari sidebar
+FILTER_COLUMNS = ['platform', 'sentiment', 'influencer_brand']
+
+# Kolom yang hanya ditampilkan per nilai (tidak difilter); masing-masing punya tabel marginal sendiri
+MARGINAL_COLUMNS = ['media_type', 'location']
+
+# Resolusi tabel rollup selain harian, dari yang terbesar; rentang tanggal dijawab dari periode utuh
+# di dalam rentang ditambah hari di tepinya
+ROLLUP_LEVELS = ['month', 'week']
+
+# Jumlah hari dari awal sebuah periode yang pasti jatuh di periode berikutnya
+PERIOD_STEP_DAYS = {"week": 7, "month": 31}
+
+# Tabel rollup dijumlahkan langsung per kunci (tanpa pengurutan) jika ruang kuncinya paling banyak
+# sekian kali jumlah baris masukan
+DENSE_GROUP_FACTOR = 8
+
+# Jumlah hasil query yang disimpan per cube (kombinasi filter yang baru dipakai)
+MAX_QUERY_MEMO = 32
+
+
+def format_period(timestamp, granularity):
+    """Teks periode untuk wawasan grafik tren sesuai granularitas."""
+    if granularity == "week":
+        return f"minggu yang dimulai {timestamp.strftime('%Y-%m-%d')}"
+    if granularity == "month":
+        return f"bulan {timestamp.strftime('%Y-%m')}"
+    return f"tanggal {timestamp.strftime('%Y-%m-%d')}"
+
+
+def period_start(days, level):
+    """Nomor hari (sejak 1970-01-01) -> nomor hari awal periode `level` yang memuatnya."""
+    return period_codes(np.asarray(days, dtype=np.int64).astype('datetime64[D]'), level).astype(np.int64)
+
+
+def _first_full_period(day, level):
+    """Nomor hari awal periode `level` pertama yang dimulai pada atau setelah `day`."""
+    start = int(period_start(day, level))
+    return start if start == day else int(period_start(start + PERIOD_STEP_DAYS[level], level))
+
+
+def _cover(start, stop, levels):
+    """
+    Memecah hari [start, stop) menjadi potongan (level, awal, akhir) yang tidak saling tumpang tindih:
+    periode level terbesar yang utuh di dalam rentang, lalu sisa di kedua tepinya dengan level berikutnya,
+    dan hari yang tersisa dengan tabel harian.
+    """
+    if start >= stop:
+        return []
+    if not levels:
+        return [("day", start, stop)]
+    level, rest = levels[0], levels[1:]
+    first, last = _first_full_period(start, level), int(period_start(stop, level))
+    if first >= last:
+        return _cover(start, stop, rest)
+    return _cover(start, first, rest) + [(level, first, last)] + _cover(last, stop, rest)
+
+
+@dataclass
+class _Rollup:
+    """
+    Satu tabel rollup: baris unik (periode x kode dimensi) terurut menurut periode, berisi total engagement
+    dan jumlah baris. Periode disimpan sebagai nomor hari awal periode; kode 0 berarti nilai kosong.
+    """
+    periods: np.ndarray
+    codes: dict
+    engagements: np.ndarray
+    count: np.ndarray
+
+    @classmethod
+    def group(cls, periods, codes, sizes, engagements, count):
+        """Menjumlahkan engagement dan jumlah baris per (periode, kode `codes`)."""
+        first = int(periods.min())
+        dims = [int(periods.max()) - first + 1] + [sizes[col] for col in codes]
+        keys = np.ravel_multi_index([periods - first] + [col_codes.astype(np.intp) for col_codes in codes.values()], dims)
+        if math.prod(dims) <= DENSE_GROUP_FACTOR * len(keys):
+            # Ruang kunci kecil: langsung dijumlahkan per kunci tanpa pengurutan
+            dense_count = np.bincount(keys, weights=count, minlength=math.prod(dims))
+            unique_keys = np.flatnonzero(dense_count)
+            group_engagements = np.bincount(keys, weights=engagements, minlength=len(dense_count))[unique_keys]
+            group_count = dense_count[unique_keys]
+        else:
+            # Satu pengurutan kunci gabungan; setiap kelompok adalah rentang berurutan yang dijumlahkan dengan reduceat
+            order = np.argsort(keys)
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+            unique_keys = sorted_keys[starts]
+            group_engagements = np.add.reduceat(engagements[order], starts)
+            group_count = np.add.reduceat(count[order], starts)
+        parts = np.unravel_index(unique_keys, dims)
+        return cls(
+            periods=(parts[0] + first).astype(np.int32),
+            codes={col: part.astype(codes[col].dtype) for col, part in zip(codes, parts[1:])},
+            engagements=group_engagements,
+            count=group_count.astype(np.int64),
+        )
+
+    def regroup(self, level, columns, sizes):
+        """Tabel ini dijumlahkan ulang ke periode `level` dan hanya kolom `columns`."""
+        periods = self.periods if level == "day" else period_start(self.periods, level)
+        return _Rollup.group(periods, {col: self.codes[col] for col in columns}, sizes, self.engagements, self.count)
+
+    def __len__(self):
+        return len(self.periods)
+
+
+class RollupCube:
+    """
+    Cube agregat yang dibangun sekali dari tabel `base` AggregateBundle (hari x platform x sentimen x
+    tipe media x lokasi x brand). Dimensi dikodekan menjadi bilangan bulat, lalu dihitung di muka:
+    - tabel inti (periode x platform x sentimen x brand) untuk total, sentimen, platform, dan tren;
+    - tabel marginal per tipe media dan per lokasi (periode x dimensi filter x kolom tersebut);
+    masing-masing pada resolusi harian, mingguan, dan bulanan, serta varian tanpa brand yang jauh lebih
+    kecil untuk query tanpa filter brand. Ukuran tabel dibatasi kardinalitas dimensi, bukan jumlah baris.
+
+    Query membaca periode bulanan/mingguan yang utuh di dalam rentang tanggal ditambah hari di tepinya,
+    memfilter dengan tabel lookup per kode, dan menjumlahkan dengan `np.bincount`, tanpa memindai
+    ulang tabel `base`.
+
+    Pada mode perkiraan, cube tidak memuat lokasi dan brand; sketsanya (`sketches`) berlaku untuk
+    seluruh dataset dan diteruskan apa adanya ke setiap hasil query.
+
+    Jika `fingerprint` (sidik jari dataset) diberikan, setiap hasil query membawa sidik jari dataset
+    ditambah parameter query, sehingga laporan dapat dikenali tanpa meng-hash tabel hasil query.
+    """
+
+    def __init__(self, base, sketches=None, fingerprint=""):
+        self.base = base
+        self.sketches = sketches
+        self.fingerprint = fingerprint
+        self.filter_columns = [col for col in FILTER_COLUMNS if col in base.columns]
+        self.marginal_columns = [col for col in MARGINAL_COLUMNS if col in base.columns]
+        self._labels = {}
+        self._positions = {}
+        self._tables = {}
+        self._engagement_dtype = np.int64 if pd.api.types.is_integer_dtype(base['engagements'].dtype) else np.float64
+        self._queries = OrderedDict()
+        self._lock = threading.Lock()
+        if not base.empty:
+            with stage("bangun_cube", rows=len(base)) as record:
+                self._build()
+                tables = {id(table): table for table in self._tables.values()}
+                record["table_rows"] = sum(len(table) for table in tables.values())
+
+    @classmethod
+    def from_aggregates(cls, aggs, fingerprint=""):
+        return cls(aggs.base, aggs.sketches, fingerprint or aggs.fingerprint)
+
+    def _encode(self, col):
+        """Kode bilangan bulat per baris `base` (1.. urut alfabetis label, 0 untuk nilai kosong)."""
+        codes, uniques = pd.factorize(self.base[col])
+        labels = np.asarray(uniques, dtype=object)
+        order = np.argsort(labels.astype(str), kind='stable')
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(1, len(order) + 1)
+        self._labels[col] = labels[order]
+        self._positions[col] = {label: position for position, label in enumerate(self._labels[col], start=1)}
+        dtype = np.int16 if len(labels) < np.iinfo(np.int16).max else np.int32
+        return np.concatenate([[0], rank])[codes + 1].astype(dtype)
+
+    def _build(self):
+        days = period_codes(self.base['date'].to_numpy(), "day").astype(np.int64)
+        self._first_day, self._last_day = int(days.min()), int(days.max())
+        codes = {col: self._encode(col) for col in self.filter_columns + self.marginal_columns}
+        sizes = {col: len(labels) + 1 for col, labels in self._labels.items()}
+        engagements = self.base['engagements'].to_numpy(dtype=np.float64)
+        count = self.base['count'].to_numpy(dtype=np.float64)
+
+        lean_columns = [col for col in self.filter_columns if col != 'influencer_brand']
+        for output in [None] + self.marginal_columns:
+            extra = [output] if output else []
+            full = _Rollup.group(days, {col: codes[col] for col in self.filter_columns + extra}, sizes, engagements, count)
+            lean = full.regroup("day", lean_columns + extra, sizes) if lean_columns != self.filter_columns else full
+            for variant, daily in (("full", full), ("lean", lean)):
+                if variant == "lean" and lean is full:
+                    # Tanpa kolom brand (mode perkiraan) kedua varian sama
+                    self._tables.update({(output, "lean", level): self._tables[(output, "full", level)] for level in ["day"] + ROLLUP_LEVELS})
+                    continue
+                self._tables[(output, variant, "day")] = daily
+                for level in ROLLUP_LEVELS:
+                    self._tables[(output, variant, level)] = daily.regroup(level, list(daily.codes), sizes)
+
+    @property
+    def date_range(self):
+        """Tanggal pertama dan terakhir di cube (datetime.date), atau (None, None) jika kosong."""
+        if self.base.empty:
+            return None, None
+        return self._day(self._first_day).date(), self._day(self._last_day).date()
+
+    @staticmethod
+    def _day(number):
+        return pd.Timestamp(np.datetime64(int(number), 'D'))
+
+    def options(self, col):
+        """Nilai yang tersedia untuk kolom filter, diurutkan alfabetis."""
+        return self._labels[col].tolist() if col in self._labels else []
+
+    def query(self, start=None, end=None, platforms=(), sentiments=(), brands=(), granularity="day"):
+        """
+        Mengembalikan AggregateBundle untuk potongan cube yang difilter.
+        Filter kosong berarti semua nilai; `daily_engagements` dikelompokkan sesuai `granularity`.
+        """
+        key = (start, end, tuple(platforms), tuple(sentiments), tuple(brands), granularity)
+        with self._lock:
+            result = self._queries.get(key)
+            if result is not None:
+                self._queries.move_to_end(key)
+                return result
+
+        with stage("filter_cube", granularity=granularity):
+            result = self._compute(start, end, platforms, sentiments, brands, granularity, self._query_fingerprint(key))
+
+        with self._lock:
+            self._queries[key] = result
+            while len(self._queries) > MAX_QUERY_MEMO:
+                self._queries.popitem(last=False)
+        return result
+
+    def _query_fingerprint(self, key):
+        """Sidik jari hasil query: sidik jari dataset ditambah hash parameter query (kosong jika dataset tanpa sidik jari)."""
+        if not self.fingerprint:
+            return ""
+        digest = hashlib.blake2b(repr(key).encode("utf-8"), digest_size=8).hexdigest()
+        return f"{self.fingerprint}:{digest}"
+
+    def _compute(self, start, end, platforms, sentiments, brands, granularity, fingerprint=""):
+        """Membaca potongan tabel rollup yang cocok dengan filter dan menurunkan agregatnya (tanpa memo)."""
+        if self.base.empty:
+            return self._empty(granularity, fingerprint)
+        first = self._first_day if start is None else max(self._first_day, self._day_number(start))
+        stop = self._last_day + 1 if end is None else min(self._last_day, self._day_number(end)) + 1
+        if first >= stop:
+            return self._empty(granularity, fingerprint)
+
+        allowed = {}
+        for col, values in zip(FILTER_COLUMNS, (platforms, sentiments, brands)):
+            if values and col in self._positions:
+                lookup = np.zeros(len(self._labels[col]) + 1, dtype=bool)
+                lookup[[self._positions[col][value] for value in values if value in self._positions[col]]] = True
+                allowed[col] = lookup
+        variant = "full" if 'influencer_brand' in allowed else "lean"
+
+        # Hari demi hari dari tabel inti: sumber tren dan tabel `base` hasil query
+        daily = self._gather(None, variant, first, stop, allowed, levels=[])
+        if not daily['count'].sum():
+            return self._empty(granularity, fingerprint)
+        core = self._gather(None, variant, first, stop, allowed)
+        marginals = {col: self._gather(col, variant, first, stop, allowed) for col in self.marginal_columns}
+
+        base = self._frame(daily)
+        return AggregateBundle(
+            total_entries=int(core['count'].sum()),
+            base=base,
+            sentiment_counts=self._series('sentiment', core, 'count'),
+            platform_engagements=self._series('platform', core, 'engagements'),
+            media_type_counts=self._series('media_type', marginals['media_type'], 'count'),
+            location_counts=self._series('location', marginals['location'], 'count') if self.sketches is None
+            else self.sketches.top_counts('location'),
+            daily_engagements=self._trend(daily, first, stop, granularity),
+            sketches=self.sketches,
+            granularity=granularity,
+            fingerprint=fingerprint,
+        )
+
+    @staticmethod
+    def _day_number(value):
+        return int(np.datetime64(pd.Timestamp(value), 'D').astype(np.int64))
+
+    def _gather(self, output, variant, start, stop, allowed, levels=ROLLUP_LEVELS):
+        """
+        Baris tabel rollup `output` yang lolos filter `allowed` untuk hari [start, stop), dari periode
+        `levels` yang utuh di dalam rentang ditambah hari di tepinya. Mengembalikan dict kolom -> array.
+        """
+        parts = []
+        for level, first, last in _cover(start, stop, levels):
+            table = self._tables[(output, variant, level)]
+            lo, hi = np.searchsorted(table.periods, [first, last])
+            mask = None
+            for col, lookup in allowed.items():
+                selected = lookup[table.codes[col][lo:hi]]
+                mask = selected if mask is None else mask & selected
+            columns = {'periods': table.periods, 'engagements': table.engagements, 'count': table.count, **table.codes}
+            parts.append({name: values[lo:hi] if mask is None else values[lo:hi][mask] for name, values in columns.items()})
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+    def _series(self, col, rows, value):
+        """Jumlah `value` ('count' atau 'engagements') per nilai `col`, terbesar lebih dulu (seperti aggregates.counts_by)."""
+        size = len(self._labels[col]) + 1
+        counts = np.bincount(rows[col], weights=rows['count'], minlength=size)[1:]
+        totals = counts if value == 'count' else np.bincount(rows[col], weights=rows['engagements'], minlength=size)[1:]
+        present = np.flatnonzero(counts > 0)
+        order = present[np.argsort(-totals[present], kind='stable')]
+        dtype = np.int64 if value == 'count' else self._engagement_dtype
+        return pd.Series(totals[order].astype(dtype), index=pd.Index(self._labels[col][order], name=col), name=value)
+
+    def _trend(self, daily, first, stop, granularity):
+        """Total engagement per hari (atau per awal minggu/bulan) yang memiliki data, urut tanggal."""
+        offsets = daily['periods'] - first
+        counts = np.bincount(offsets, weights=daily['count'], minlength=stop - first)
+        engagements = np.bincount(offsets, weights=daily['engagements'], minlength=stop - first)
+        days = np.flatnonzero(counts > 0)
+        periods, engagements = days + first, engagements[days]
+        if granularity != "day":
+            periods, inverse = np.unique(period_start(periods, granularity), return_inverse=True)
+            engagements = np.bincount(inverse, weights=engagements)
+        return pd.DataFrame({
+            'date': periods.astype('datetime64[D]').astype('datetime64[ns]'),
+            'engagements': engagements.astype(self._engagement_dtype),
+        })
+
+    def _frame(self, daily):
+        """Baris harian tabel inti yang lolos filter sebagai DataFrame berbentuk tabel `base`."""
+        columns = [col for col in self.filter_columns if col in daily]
+        return pd.DataFrame({
+            'date': daily['periods'].astype(np.int64).astype('datetime64[D]').astype('datetime64[ns]'),
+            **{col: pd.Categorical.from_codes(daily[col].astype(np.int64) - 1, categories=self._labels[col]) for col in columns},
+            'engagements': daily['engagements'].astype(self._engagement_dtype),
+            'count': daily['count'],
+        })
+
+    def _empty(self, granularity, fingerprint=""):
+        return AggregateBundle.from_base(self.base.iloc[:0], self.sketches, granularity, fingerprint)
+
+
+_cubes = OrderedDict()
+_cubes_lock = threading.Lock()
+
+
+def get_cube(aggs, fingerprint, max_entries=8):
+    """RollupCube untuk dataset `fingerprint`, dibangun sekali lalu dipakai ulang di setiap rerun."""
+    with _cubes_lock:
+        cube = _cubes.get(fingerprint)
+        if cube is None:
+            cube = RollupCube.from_aggregates(aggs, fingerprint)
+            _cubes[fingerprint] = cube
+            while len(_cubes) > max_entries:
+                _cubes.popitem(last=False)
+        else:
+            _cubes.move_to_end(fingerprint)
+        return cube
@@ -0,0 +1,402 @@
+"""
+Sketsa yang dapat digabung (mergeable) untuk mode perkiraan pada arsip yang sangat besar:
+Space-Saving untuk lokasi/brand teratas, HyperLogLog untuk jumlah nilai berbeda, dan sketsa kuantil
+(gaya DDSketch) untuk distribusi engagement per posting. Setiap sketsa dihitung per potongan atau per
+file lalu digabung, sehingga ringkasan seluruh arsip tidak perlu memindai ulang file yang sudah pernah dibaca.
+
+Sentimen, platform, tipe media, dan tren harian tetap eksak: kardinalitasnya kecil, sehingga tabel
+`base` tanpa lokasi dan brand tetap ringkas berapa pun jumlah barisnya.
+
+Contoh (ringkasan arsip; sketsa per file di-cache di MEDINTEL_SKETCH_CACHE_DIR):
+    python sketches.py arsip/ --workers 4
+    python sketches.py arsip/2023-*.csv --json ringkasan.json
+"""
+import argparse
+import glob
+import hashlib
+import json
+import math
+import os
+import pickle
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from aggregates import DIMENSION_COLUMNS, AggregateBundle, build_base_table, merge_base_tables
+
+# Dimensi yang diperkirakan dengan sketsa (kardinalitas tinggi); dimensi lain tetap dihitung eksak
+SKETCHED_DIMENSIONS = ['location', 'influencer_brand']
+EXACT_DIMENSIONS = [col for col in DIMENSION_COLUMNS if col not in SKETCHED_DIMENSIONS]
+
+# Jumlah nilai yang dilacak Space-Saving per dimensi; jumlah yang meleset maksimal sekitar total_baris / kapasitas
+TOP_K_CAPACITY = 256
+
+# Presisi HyperLogLog: 2^p register, galat baku relatif 1,04 / sqrt(2^p) (p=14: sekitar 0,8%)
+HLL_PRECISION = 14
+
+# Akurasi relatif sketsa kuantil: nilai kuantil yang dilaporkan meleset maksimal 1% dari nilai sebenarnya
+QUANTILE_ACCURACY = 0.01
+
+# Direktori cache sketsa per file untuk ringkasan arsip
+DEFAULT_CACHE_DIR = os.environ.get("MEDINTEL_SKETCH_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".medintel", "sketches"))
+
+# Menaikkan versi ini membuat sketsa lama di cache diabaikan
+SKETCH_VERSION = 1
+
+
+def hash_values(values):
+    """Hash 64-bit yang stabil antar proses untuk setiap nilai (dipakai HyperLogLog)."""
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+class HyperLogLog:
+    """Perkiraan jumlah nilai berbeda; dua sketsa dengan presisi sama digabung dengan maksimum per register."""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        """Galat baku relatif perkiraan."""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, series):
+        # Setiap nilai cukup di-hash sekali per potongan
+        uniques = series.dropna().unique()
+        if not len(uniques):
+            return
+        hashes = hash_values(uniques)
+        remaining_bits = 64 - self.precision
+        index = (hashes >> np.uint64(remaining_bits)).astype(np.intp)
+        rest = hashes & np.uint64((1 << remaining_bits) - 1)
+        # Posisi bit 1 pertama pada sisa bit; frexp eksak karena sisa bit < 53
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (remaining_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Presisi HyperLogLog berbeda, sketsa tidak dapat digabung.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Koreksi rentang kecil (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class SpaceSaving:
+    """
+    Nilai teratas dengan Space-Saving yang dapat digabung: untuk setiap nilai yang dilacak, jumlah
+    sebenarnya berada di antara `count - error` dan `count`; nilai yang tidak dilacak berjumlah paling
+    banyak `floor`. Selama jumlah nilai berbeda tidak melebihi kapasitas, hasilnya eksak.
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = pd.Series(dtype='int64')
+        self.errors = pd.Series(dtype='int64')
+        self.floor = 0
+        self.total = 0
+
+    def update(self, series):
+        chunk = series.value_counts(sort=False, dropna=True)
+        chunk = chunk[chunk > 0]
+        chunk.index = chunk.index.astype(object)
+        self._merge(chunk.astype('int64'), pd.Series(0, index=chunk.index, dtype='int64'), 0, int(chunk.sum()))
+
+    def merge(self, other):
+        self._merge(other.counts, other.errors, other.floor, other.total)
+        return self
+
+    def _merge(self, counts, errors, floor, total):
+        # Nilai yang tidak dilacak salah satu sisi dianggap berjumlah `floor` sisi tersebut (batas atasnya)
+        index = self.counts.index.union(counts.index)
+        merged_counts = self.counts.reindex(index, fill_value=self.floor) + counts.reindex(index, fill_value=floor)
+        merged_errors = self.errors.reindex(index, fill_value=self.floor) + errors.reindex(index, fill_value=floor)
+        new_floor = self.floor + floor
+        if len(index) > self.capacity:
+            merged_counts = merged_counts.sort_values(ascending=False, kind='stable')
+            new_floor = max(new_floor, int(merged_counts.iloc[self.capacity]))
+            merged_counts = merged_counts.iloc[:self.capacity]
+            merged_errors = merged_errors.reindex(merged_counts.index)
+        self.counts = merged_counts.astype('int64')
+        self.errors = merged_errors.astype('int64')
+        self.floor = new_floor
+        self.total += total
+
+    def top(self, n=None):
+        """(jumlah perkiraan, galat maksimum) untuk `n` nilai teratas, terbesar lebih dulu."""
+        counts = self.counts.sort_values(ascending=False, kind='stable')
+        if n is not None:
+            counts = counts.head(n)
+        return counts, self.errors.reindex(counts.index)
+
+
+class QuantileSketch:
+    """
+    Sketsa kuantil dengan galat relatif terjamin (gaya DDSketch): nilai dikelompokkan ke bin logaritmik
+    dengan rasio `gamma`, sehingga kuantil yang dilaporkan meleset maksimal `relative_accuracy` dari nilai
+    sebenarnya. Bin dari beberapa sketsa digabung dengan menjumlahkannya. Nilai <= 0 dihitung sebagai 0.
+    """
+
+    def __init__(self, relative_accuracy=QUANTILE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.bins = pd.Series(dtype='int64')
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > 0]
+        self.zero_count += len(values) - len(positive)
+        if len(positive):
+            keys = np.ceil(np.log(positive) / math.log(self.gamma)).astype(np.int64)
+            offset = int(keys.min())
+            counts = np.bincount(keys - offset)
+            nonzero = np.flatnonzero(counts)
+            self._add_bins(pd.Series(counts[nonzero], index=nonzero + offset, dtype='int64'))
+
+    def _add_bins(self, bins):
+        self.bins = bins if self.bins.empty else self.bins.add(bins, fill_value=0).astype('int64')
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Akurasi sketsa kuantil berbeda, sketsa tidak dapat digabung.")
+        if other.count:
+            self._add_bins(other.bins)
+            self.zero_count += other.zero_count
+            self.count += other.count
+            self.sum += other.sum
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """Perkiraan kuantil ke-`q` (0..1), atau None jika sketsa kosong."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+        bins = self.bins.sort_index()
+        position = int(np.searchsorted(bins.cumsum().to_numpy(), rank - self.zero_count, side='right'))
+        key = bins.index[min(position, len(bins) - 1)]
+        value = 2 * self.gamma ** key / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+
+class SketchSummary:
+    """
+    Agregat mode perkiraan yang dapat digabung: tabel `base` eksak tanpa lokasi dan brand, ditambah
+    sketsa nilai teratas dan jumlah nilai berbeda untuk lokasi dan brand serta sketsa kuantil engagement.
+    Antarmukanya sama dengan AggregateAccumulator (`add` per potongan, `result` menjadi AggregateBundle).
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY, precision=HLL_PRECISION, relative_accuracy=QUANTILE_ACCURACY, compact_every=16):
+        self.compact_every = compact_every
+        self.rows = 0
+        self.top_values = {col: SpaceSaving(capacity) for col in SKETCHED_DIMENSIONS}
+        self.distinct = {col: HyperLogLog(precision) for col in SKETCHED_DIMENSIONS}
+        self.engagements = QuantileSketch(relative_accuracy)
+        self._bases = []
+
+    def add(self, df):
+        """Menambahkan satu potongan data bersih."""
+        if df.empty:
+            return
+        self._bases.append(build_base_table(df, EXACT_DIMENSIONS))
+        if len(self._bases) >= self.compact_every:
+            self._compact()
+        for col in SKETCHED_DIMENSIONS:
+            self.top_values[col].update(df[col])
+            self.distinct[col].update(df[col])
+        self.engagements.update(df['engagements'])
+        self.rows += len(df)
+
+    def merge(self, other):
+        """Menggabungkan ringkasan lain (misalnya dari file atau proses lain) ke ringkasan ini."""
+        self._bases.extend(other._bases)
+        self._compact()
+        for col in SKETCHED_DIMENSIONS:
+            self.top_values[col].merge(other.top_values[col])
+            self.distinct[col].merge(other.distinct[col])
+        self.engagements.merge(other.engagements)
+        self.rows += other.rows
+        return self
+
+    def _compact(self):
+        self._bases = [merge_base_tables(self._bases, EXACT_DIMENSIONS)]
+
+    def __getstate__(self):
+        self._compact()
+        return self.__dict__
+
+    @property
+    def base(self):
+        """Tabel `base` untuk dashboard: dimensi eksak, dengan kolom lokasi dan brand kosong."""
+        self._compact()
+        base = self._bases[0].copy()
+        for col in SKETCHED_DIMENSIONS:
+            base[col] = None
+        return base[['date'] + DIMENSION_COLUMNS + ['engagements', 'count']]
+
+    def result(self):
+        """AggregateBundle dari semua potongan; jumlah per lokasi berasal dari sketsa."""
+        return AggregateBundle.from_base(self.base, sketches=self)
+
+    def top_counts(self, col, n=None):
+        """Jumlah baris perkiraan per nilai `col` (terbesar lebih dulu), dalam format agregat `counts_by`."""
+        counts, _ = self.top_values[col].top(n)
+        counts = counts.rename('count')
+        counts.index.name = col
+        return counts
+
+    def max_error(self, col, n=None):
+        """Selisih maksimum (baris) antara jumlah perkiraan dan jumlah sebenarnya untuk `n` nilai teratas `col`."""
+        _, errors = self.top_values[col].top(n)
+        return int(errors.max()) if len(errors) else 0
+
+    def distinct_count(self, col):
+        return self.distinct[col].estimate()
+
+    @property
+    def distinct_error(self):
+        """Galat baku relatif jumlah nilai berbeda (sama untuk semua dimensi)."""
+        return next(iter(self.distinct.values())).relative_error
+
+    def engagement_quantiles(self, quantiles=(0.5, 0.9, 0.99)):
+        return {q: self.engagements.quantile(q) for q in quantiles}
+
+
+def _cache_path(path, cache_dir):
+    """Path sketsa cache untuk file `path`; kunci berubah jika isi file (ukuran atau waktu ubah) berubah."""
+    status = os.stat(path)
+    key = f"{SKETCH_VERSION}:{os.path.abspath(path)}:{status.st_size}:{status.st_mtime_ns}"
+    return os.path.join(cache_dir, hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".pickle")
+
+
+def sketch_file(path, cache_dir=DEFAULT_CACHE_DIR):
+    """SketchSummary untuk satu CSV, dibaca per potongan; hasil disimpan di `cache_dir` (kosong = tanpa cache)."""
+    from ingest import stream_csv_aggregates
+
+    target = _cache_path(path, cache_dir) if cache_dir else None
+    if target and os.path.exists(target):
+        try:
+            with open(target, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            pass
+
+    aggs, _, _ = stream_csv_aggregates(path, approximate=True)
+    summary = aggs.sketches
+    if target:
+        os.makedirs(cache_dir, exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(summary, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, target)
+    return summary
+
+
+def summarize_files(paths, cache_dir=DEFAULT_CACHE_DIR, workers=None):
+    """Menggabungkan sketsa semua file (dihitung paralel per file, atau diambil dari cache) menjadi satu SketchSummary."""
+    summary = SketchSummary()
+    if not paths:
+        return summary
+    if workers == 0 or len(paths) == 1:
+        parts = (sketch_file(path, cache_dir) for path in paths)
+        for part in parts:
+            summary.merge(part)
+        return summary
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for part in executor.map(sketch_file, paths, [cache_dir] * len(paths)):
+            summary.merge(part)
+    return summary
+
+
+def describe_summary(summary, top=5):
+    """Ringkasan arsip (dict yang dapat diserialisasi JSON) beserta batas galatnya."""
+    quantiles = summary.engagement_quantiles()
+    return {
+        "rows": summary.rows,
+        "distinct": {col: summary.distinct_count(col) for col in SKETCHED_DIMENSIONS},
+        "distinct_relative_error": round(summary.distinct_error, 4),
+        "top": {
+            col: {str(value): int(count) for value, count in summary.top_counts(col, top).items()}
+            for col in SKETCHED_DIMENSIONS
+        },
+        "top_max_error": {col: summary.max_error(col, top) for col in SKETCHED_DIMENSIONS},
+        "engagement_quantiles": {f"p{round(q * 100)}": value for q, value in quantiles.items()},
+        "quantile_relative_error": summary.engagements.relative_accuracy,
+    }
+
+
+def _expand_paths(sources):
+    from ingest import CSV_SUFFIXES
+
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(sorted(os.path.join(source, name) for name in os.listdir(source) if name.lower().endswith(CSV_SUFFIXES)))
+        else:
+            paths.extend(sorted(glob.glob(source)) or [source])
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ringkasan perkiraan (sketsa) untuk arsip CSV intelijen media yang sangat besar.")
+    parser.add_argument("sources", nargs="+", help="File CSV (boleh .csv.gz), pola glob, atau direktori berisi CSV")
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses paralel (default: jumlah CPU; 0 = tanpa process pool)")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="Direktori cache sketsa per file (kosong = tanpa cache)")
+    parser.add_argument("--top", type=int, default=5, help="Jumlah lokasi dan brand teratas yang ditampilkan (default: 5)")
+    parser.add_argument("--json", help="Tulis ringkasan ke file JSON ini")
+    args = parser.parse_args(argv)
+
+    paths = _expand_paths(args.sources)
+    started = time.perf_counter()
+    summary = summarize_files(paths, args.cache_dir, args.workers)
+    description = describe_summary(summary, args.top)
+    elapsed = time.perf_counter() - started
+
+    print(f"{len(paths)} file, {summary.rows:,} baris dalam {elapsed:.1f} detik.")
+    for col in SKETCHED_DIMENSIONS:
+        print(f"{col}: sekitar {description['distinct'][col]:,} nilai berbeda (±{summary.distinct_error:.1%}); "
+              f"teratas (galat maks ±{description['top_max_error'][col]:,} baris):")
+        for value, count in description["top"][col].items():
+            print(f"  {value}: {count:,}")
+    quantile_text = ", ".join(f"{name} {value:,.0f}" for name, value in description["engagement_quantiles"].items() if value is not None)
+    print(f"Engagement per posting (±{summary.engagements.relative_accuracy:.0%}): {quantile_text}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(description, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
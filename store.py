@@ -0,0 +1,107 @@
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+
+# Direktori penyimpanan dataset bersih, dapat diubah lewat variabel lingkungan
+STORE_DIR = os.environ.get("MEDINTEL_STORE_DIR", os.path.join(os.path.expanduser("~"), ".medintel", "datasets"))
+
+# Kolom yang dibutuhkan agregat dashboard (grafik, prompt AI, PDF, filter)
+DASHBOARD_COLUMNS = ['date', 'day', 'platform', 'sentiment', 'media_type', 'location', 'influencer_brand', 'engagements']
+
+MANIFEST_FILE = "manifest.json"
+PARTITION_COLUMN = "month"
+
+
+def _dataset_dir(fingerprint, store_dir=None):
+    return os.path.join(store_dir or STORE_DIR, fingerprint.replace(":", "_"))
+
+
+def save_dataset(df, fingerprint, name, store_dir=None):
+    """
+    Menyimpan DataFrame bersih sebagai dataset Arrow IPC yang dipartisi per bulan ('month=YYYY-MM').
+    File IPC tanpa kompresi dapat di-memory-map saat dibuka ulang (tanpa buffer baca tambahan).
+    Mengembalikan manifest dataset.
+    """
+    target = _dataset_dir(fingerprint, store_dir)
+    data_dir = os.path.join(target, "data")
+    if os.path.exists(target):
+        shutil.rmtree(target)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    months = pa.array(df['date'].dt.strftime('%Y-%m'), type=pa.string())
+    table = table.append_column(PARTITION_COLUMN, months)
+    ds.write_dataset(
+        table,
+        data_dir,
+        format="ipc",
+        partitioning=ds.partitioning(pa.schema([(PARTITION_COLUMN, pa.string())]), flavor="hive"),
+    )
+
+    manifest = {
+        "fingerprint": fingerprint,
+        "name": name,
+        "rows": len(df),
+        "columns": list(df.columns),
+        "start": df['date'].min().strftime('%Y-%m-%d'),
+        "end": df['date'].max().strftime('%Y-%m-%d'),
+        "saved_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    with open(os.path.join(target, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def list_datasets(store_dir=None):
+    """Daftar manifest dataset yang tersimpan, terbaru lebih dulu."""
+    root = store_dir or STORE_DIR
+    if not os.path.isdir(root):
+        return []
+
+    manifests = []
+    for entry in os.listdir(root):
+        path = os.path.join(root, entry, MANIFEST_FILE)
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                manifests.append(json.load(f))
+    return sorted(manifests, key=lambda manifest: manifest["saved_at"], reverse=True)
+
+
+def load_dataset(fingerprint, columns=None, start=None, end=None, store_dir=None):
+    """
+    Membuka dataset tersimpan dengan memory-map dan hanya membaca kolom serta rentang tanggal yang diminta.
+    `start`/`end` (inklusif, tanggal) memangkas partisi bulan yang tidak relevan sebelum membaca file.
+    DataFrame hasilnya berada di heap (satu salinan kolom yang dibaca, lihat `dataset_cache._read_spill`).
+    """
+    data_dir = os.path.join(_dataset_dir(fingerprint, store_dir), "data")
+    dataset = ds.dataset(data_dir, format="ipc", partitioning="hive", filesystem=pafs.LocalFileSystem(use_mmap=True))
+
+    if columns is not None:
+        columns = [col for col in columns if col in dataset.schema.names]
+
+    filters = []
+    if start is not None:
+        start = pd.Timestamp(start)
+        filters += [ds.field(PARTITION_COLUMN) >= start.strftime('%Y-%m'), ds.field('date') >= start]
+    if end is not None:
+        end_exclusive = pd.Timestamp(end) + pd.Timedelta(days=1)
+        filters += [ds.field(PARTITION_COLUMN) <= pd.Timestamp(end).strftime('%Y-%m'), ds.field('date') < end_exclusive]
+
+    expression = None
+    for condition in filters:
+        expression = condition if expression is None else expression & condition
+
+    table = dataset.to_table(columns=columns, filter=expression)
+    if PARTITION_COLUMN in table.column_names:
+        table = table.drop_columns([PARTITION_COLUMN])
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def delete_dataset(fingerprint, store_dir=None):
+    """Menghapus dataset tersimpan beserta manifest-nya."""
+    shutil.rmtree(_dataset_dir(fingerprint, store_dir), ignore_errors=True)
@@ -0,0 +1,192 @@
+"""
+Generator data sintetis (ber-seed) dengan skema ekspor yang didokumentasikan di README:
+Date, Platform, Sentiment, Location, Engagements, Media Type, Influencer Brand, Post Type.
+
+Distribusinya dibuat menyerupai data nyata (platform, lokasi, dan brand yang timpang, engagement
+berekor panjang, tren naik dengan pola mingguan dan lonjakan kampanye) dan menyertakan nilai kotor
+(tanggal campuran/tidak valid, engagement kosong atau berupa teks, kategori kosong atau salah ketik).
+Data ditulis per potongan sehingga 50 juta baris pun tidak perlu dimuat sekaligus.
+
+Contoh:
+    python synthetic.py data_1m.csv --rows 1000000 --seed 42
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Jumlah baris per potongan saat membangkitkan/menulis data; bagian dari definisi seed (jangan diubah)
+GENERATE_CHUNK_ROWS = 1_000_000
+
+PLATFORMS = {"Instagram": 0.34, "TikTok": 0.24, "Twitter": 0.16, "Facebook": 0.12, "YouTube": 0.08, "LinkedIn": 0.04, "Threads": 0.02}
+SENTIMENTS = {"Positive": 0.46, "Neutral": 0.34, "Negative": 0.20}
+MEDIA_TYPES = {"Image": 0.38, "Video": 0.32, "Text": 0.16, "Carousel": 0.10, "Link": 0.04}
+POST_TYPES = {"Feed": 0.55, "Story": 0.20, "Reels": 0.15, "Live": 0.05, "Ads": 0.05}
+LOCATIONS = [
+    "Jakarta", "Surabaya", "Bandung", "Medan", "Semarang", "Makassar", "Palembang", "Tangerang", "Depok", "Bekasi",
+    "Yogyakarta", "Denpasar", "Malang", "Bogor", "Batam", "Pekanbaru", "Padang", "Balikpapan", "Banjarmasin", "Pontianak",
+    "Manado", "Samarinda", "Jambi", "Cirebon", "Solo", "Mataram", "Kupang", "Ambon", "Jayapura", "Aceh",
+]
+BRANDS = [f"Brand {chr(65 + i // 26)}{chr(65 + i % 26)}" for i in range(60)]
+
+# Pengali engagement rata-rata per platform (video pendek lebih tinggi)
+PLATFORM_ENGAGEMENT = {"Instagram": 1.0, "TikTok": 1.8, "Twitter": 0.5, "Facebook": 0.7, "YouTube": 1.4, "LinkedIn": 0.3, "Threads": 0.4}
+
+# Format tanggal pada data ekspor (format strftime, peluang); sebagian besar sesuai DATE_FORMATS di cleaning.py
+DATE_STYLES = [("%Y-%m-%d", 0.55), ("%d/%m/%Y", 0.25), ("%d/%m/%Y %H:%M", 0.12), ("%Y-%m-%dT%H:%M:%S", 0.08)]
+
+# Peluang nilai kotor per kolom
+DIRTY_RATES = {
+    "bad_date": 0.003,          # tanggal kosong / tidak valid (dibuang saat pembersihan)
+    "missing_engagement": 0.01, # engagement kosong (menjadi 0)
+    "text_engagement": 0.002,   # engagement berupa teks seperti 'N/A' (menjadi 0)
+    "missing_category": 0.01,   # kategori kosong (menjadi 'Unknown')
+    "messy_category": 0.005,    # spasi/kapitalisasi tidak konsisten pada platform dan lokasi
+}
+BAD_DATES = ["", "N/A", "31/02/2023", "tanggal", "2023-13-45"]
+TEXT_ENGAGEMENTS = ["N/A", "-", "n/a", "unknown"]
+
+
+def zipf_weights(n, exponent=1.1):
+    """Bobot berekor panjang (Zipf) untuk n nilai, dinormalisasi."""
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def day_weights(days, seed):
+    """Bobot harian: tren naik, pola mingguan (akhir pekan lebih ramai), dan beberapa lonjakan kampanye."""
+    rng = np.random.default_rng(seed)
+    position = np.arange(days) / max(days - 1, 1)
+    weights = (1.0 + 1.5 * position) * np.where(np.arange(days) % 7 >= 5, 1.3, 1.0)
+    spikes = rng.choice(days, size=max(1, days // 60), replace=False)
+    weights[spikes] *= rng.uniform(3, 8, size=len(spikes))
+    return weights / weights.sum()
+
+
+def _choice(rng, values, size):
+    if isinstance(values, dict):
+        return rng.choice(np.array(list(values), dtype=object), size=size, p=np.array(list(values.values())) / sum(values.values()))
+    return rng.choice(np.array(values, dtype=object), size=size, p=zipf_weights(len(values)))
+
+
+def _format_dates(rng, day_index, start, days):
+    """Tanggal sebagai teks dengan format campuran, dibentuk dari tabel (hari x format) agar cepat."""
+    calendar = pd.date_range(start, periods=days, freq="D")
+    styles = np.array([style for style, _ in DATE_STYLES], dtype=object)
+    style_index = rng.choice(len(styles), size=len(day_index), p=[p for _, p in DATE_STYLES])
+    # Jam acak per 15 menit; format tanpa jam mengabaikannya
+    times = calendar.normalize()[day_index] + pd.to_timedelta(rng.integers(0, 96, size=len(day_index)) * 15, unit="min")
+
+    dates = np.empty(len(day_index), dtype=object)
+    for position, style in enumerate(styles):
+        selected = np.flatnonzero(style_index == position)
+        if not len(selected):
+            continue
+        if "%H" in style:
+            codes, uniques = pd.factorize(times[selected])
+            dates[selected] = uniques.strftime(style).to_numpy(dtype=object)[codes]
+        else:
+            dates[selected] = calendar.strftime(style).to_numpy(dtype=object)[day_index[selected]]
+    return dates
+
+
+def _dirty(rng, values, rate, replacements):
+    """Mengganti sebagian nilai dengan pilihan acak dari `replacements` (np.nan untuk nilai kosong)."""
+    mask = rng.random(len(values)) < rate
+    if mask.any():
+        values = values.copy()
+        values[mask] = rng.choice(np.array(replacements, dtype=object), size=int(mask.sum()))
+    return values
+
+
+def _messy(rng, values, rate):
+    """Variasi penulisan kategori (spasi di ujung, huruf besar/kecil) seperti hasil input manual."""
+    mask = np.flatnonzero(rng.random(len(values)) < rate)
+    if len(mask):
+        values = values.copy()
+        variants = [lambda s: s.upper(), lambda s: s.lower(), lambda s: f" {s}", lambda s: f"{s} "]
+        picks = rng.integers(0, len(variants), size=len(mask))
+        values[mask] = [variants[pick](value) for pick, value in zip(picks, values[mask])]
+    return values
+
+
+def _generate_chunk(rows, seed_sequence, start, days, weights, dirty):
+    rng = np.random.default_rng(seed_sequence)
+    day_index = rng.choice(days, size=rows, p=weights)
+    platform = _choice(rng, PLATFORMS, rows)
+
+    multiplier = pd.Series(platform).map(PLATFORM_ENGAGEMENT).to_numpy(dtype=float)
+    engagements = np.round(rng.lognormal(mean=4.0, sigma=1.4, size=rows) * multiplier).astype(np.int64)
+
+    frame = {
+        "Date": _format_dates(rng, day_index, start, days),
+        "Platform": platform,
+        "Sentiment": _choice(rng, SENTIMENTS, rows),
+        "Location": _choice(rng, LOCATIONS, rows),
+        "Engagements": engagements.astype(object) if dirty else engagements,
+        "Media Type": _choice(rng, MEDIA_TYPES, rows),
+        "Influencer Brand": _choice(rng, BRANDS, rows),
+        "Post Type": _choice(rng, POST_TYPES, rows),
+    }
+    if dirty:
+        frame["Date"] = _dirty(rng, frame["Date"], DIRTY_RATES["bad_date"], BAD_DATES)
+        frame["Engagements"] = _dirty(rng, frame["Engagements"], DIRTY_RATES["missing_engagement"], [np.nan])
+        frame["Engagements"] = _dirty(rng, frame["Engagements"], DIRTY_RATES["text_engagement"], TEXT_ENGAGEMENTS)
+        for column in ["Platform", "Location"]:
+            frame[column] = _messy(rng, frame[column], DIRTY_RATES["messy_category"])
+        for column in ["Sentiment", "Location", "Media Type", "Influencer Brand", "Post Type"]:
+            frame[column] = _dirty(rng, frame[column], DIRTY_RATES["missing_category"], [np.nan])
+    return pd.DataFrame(frame)
+
+
+def iter_frames(rows, seed=0, start="2023-01-01", days=365, dirty=True, chunk_rows=GENERATE_CHUNK_ROWS):
+    """Membangkitkan `rows` baris sintetis per potongan (DataFrame mentah, belum dibersihkan)."""
+    root = np.random.SeedSequence(seed)
+    weights = day_weights(days, root.generate_state(1)[0])
+    chunks = -(-rows // chunk_rows) if rows else 0
+    for index, chunk_seed in enumerate(root.spawn(chunks)):
+        size = min(chunk_rows, rows - index * chunk_rows)
+        yield _generate_chunk(size, chunk_seed, start, days, weights, dirty)
+
+
+def generate_frame(rows, seed=0, **kwargs):
+    """Seluruh data sintetis sebagai satu DataFrame mentah; seed dan argumen yang sama selalu menghasilkan data yang sama."""
+    frames = list(iter_frames(rows, seed, **kwargs))
+    if not frames:
+        return _generate_chunk(0, np.random.SeedSequence(seed), "2023-01-01", 1, np.ones(1), False)
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def write_csv(path, rows, seed=0, on_progress=None, **kwargs):
+    """Menulis data sintetis ke CSV per potongan; `on_progress(baris_tertulis)` dipanggil setiap potongan."""
+    written = 0
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8", newline="") as f:
+        for frame in iter_frames(rows, seed, **kwargs):
+            frame.to_csv(f, index=False, header=(written == 0))
+            written += len(frame)
+            if on_progress is not None:
+                on_progress(written)
+    os.replace(temp_path, path)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Membuat CSV intelijen media sintetis untuk pengujian dan benchmark.")
+    parser.add_argument("output", help="Path file CSV tujuan")
+    parser.add_argument("--rows", type=int, default=100_000, help="Jumlah baris (default: 100000)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default="2023-01-01", help="Tanggal awal data (default: 2023-01-01)")
+    parser.add_argument("--days", type=int, default=365, help="Rentang hari (default: 365)")
+    parser.add_argument("--clean", action="store_true", help="Tanpa nilai kotor")
+    args = parser.parse_args(argv)
+
+    write_csv(args.output, args.rows, args.seed, start=args.start, days=args.days, dirty=not args.clean,
+              on_progress=lambda written: print(f"{written:,} / {args.rows:,} baris", flush=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
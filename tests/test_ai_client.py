@@ -0,0 +1,210 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import ai_client
+from ai_client import CircuitBreaker, CircuitOpenError, OpenRouterClient, iter_sse_content
+
+
+class StubServer:
+    """Server HTTP lokal yang membalas setiap POST dengan respons berikutnya dari daftar skenario."""
+
+    def __init__(self):
+        self.responses = []
+        self.requests = []
+        self.release = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                stub.requests.append({"path": self.path, "headers": dict(self.headers), "json": json.loads(body or b"null")})
+                response = stub.responses.pop(0) if stub.responses else {"status": 500}
+                if response.get("delay"):
+                    # Menahan respons (timeout baca) tanpa time.sleep yang dipatch di tes
+                    stub.release.wait(response["delay"])
+                payload = response.get("body", b"")
+                if not isinstance(payload, bytes):
+                    payload = json.dumps(payload).encode("utf-8")
+                self.send_response(response.get("status", 200))
+                for name, value in response.get("headers", {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def completion(text):
+    return {"choices": [{"message": {"content": text}}], "usage": {"prompt_tokens": 3, "completion_tokens": 1}}
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Mencatat jeda backoff klien alih-alih benar-benar menunggu."""
+    recorded = []
+    monkeypatch.setattr(ai_client.time, "sleep", recorded.append)
+    return recorded
+
+
+def make_client(stub, **kwargs):
+    kwargs.setdefault("breaker", CircuitBreaker(failure_threshold=2, reset_timeout=60.0))
+    return OpenRouterClient(base_url=stub.url, **kwargs)
+
+
+def test_retries_429_and_5xx_then_succeeds(stub, sleeps):
+    stub.responses = [{"status": 429}, {"status": 502}, {"status": 503}, {"status": 200, "body": completion("ok")}]
+    client = make_client(stub, max_retries=3, backoff_factor=0.5)
+
+    assert client.chat_completion("key", "model", [{"role": "user", "content": "hi"}]) == "ok"
+    assert len(stub.requests) == 4
+    assert sleeps == [0.5, 1.0, 2.0]
+    assert stub.requests[0]["path"] == "/api/v1/chat/completions"
+    assert stub.requests[0]["headers"]["Authorization"] == "Bearer key"
+    assert client.breaker.state == "closed"
+
+
+def test_gives_up_after_max_retries(stub, sleeps):
+    stub.responses = [{"status": 500}] * 3
+    client = make_client(stub, max_retries=2)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.chat_completion("key", "model", [])
+    assert len(stub.requests) == 3
+    assert client.breaker.failures == 1
+
+
+def test_client_errors_are_not_retried(stub, sleeps):
+    stub.responses = [{"status": 401}]
+    client = make_client(stub)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.chat_completion("key", "model", [])
+    assert len(stub.requests) == 1
+    assert sleeps == []
+    # Upstream dapat dijangkau: bukan kegagalan bagi breaker
+    assert client.breaker.failures == 0
+
+
+def test_retry_after_header_is_honoured_and_capped(stub, sleeps):
+    stub.responses = [
+        {"status": 429, "headers": {"Retry-After": "2"}},
+        {"status": 503, "headers": {"Retry-After": "120"}},
+        {"status": 503, "headers": {"Retry-After": "Wed, 21 Oct 2026 07:28:00 GMT"}},
+        {"status": 200, "body": completion("ok")},
+    ]
+    client = make_client(stub, max_retries=3, backoff_factor=0.5, max_backoff=10.0)
+
+    assert client.chat_completion("key", "model", []) == "ok"
+    # Detik dipakai apa adanya, dibatasi max_backoff; format tanggal kembali ke backoff eksponensial
+    assert sleeps == [2.0, 10.0, 2.0]
+
+
+def test_read_timeout_is_not_retried(stub, sleeps):
+    stub.responses = [{"status": 200, "body": completion("late"), "delay": 5}]
+    client = make_client(stub, read_timeout=0.2, max_retries=3)
+
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        client.chat_completion("key", "model", [])
+    assert len(stub.requests) == 1
+    assert sleeps == []
+    assert client.breaker.failures == 1
+
+
+def test_breaker_opens_then_half_opens_and_closes(stub, sleeps):
+    stub.responses = [{"status": 500}, {"status": 500}]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    client = make_client(stub, max_retries=0, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.chat_completion("key", "model", [])
+    assert breaker.state == "open"
+
+    # Terbuka: ditolak tanpa menghubungi server
+    with pytest.raises(CircuitOpenError):
+        client.chat_completion("key", "model", [])
+    assert len(stub.requests) == 2
+
+    threading.Event().wait(0.25)
+    assert breaker.state == "half-open"
+    stub.responses = [{"status": 200, "body": completion("pulih")}]
+    assert client.chat_completion("key", "model", []) == "pulih"
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_half_open_allows_single_probe_and_reopens_on_failure():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.1)
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    threading.Event().wait(0.15)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    # Permintaan lain menunggu hasil percobaan
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def sse(*events):
+    lines = [": keep-alive", ""]
+    for event in events:
+        lines += [f"data: {event if isinstance(event, str) else json.dumps(event)}", ""]
+    return "\n".join(lines).encode("utf-8")
+
+
+def delta(text):
+    return {"choices": [{"delta": {"content": text}}]}
+
+
+def test_stream_chat_completion_parses_sse(stub, sleeps):
+    stub.responses = [{
+        "status": 200,
+        "headers": {"Content-Type": "text/event-stream"},
+        "body": sse(delta("Halo"), {"choices": [{"delta": {"role": "assistant"}}]}, delta(", dunia é"), "[DONE]", delta("abaikan")),
+    }]
+    client = make_client(stub)
+
+    chunks = list(client.stream_chat_completion("key", "model", []))
+    assert chunks == ["Halo", ", dunia é"]
+    assert stub.requests[0]["json"]["stream"] is True
+
+
+def test_iter_sse_content_raises_on_error_event(stub, sleeps):
+    stub.responses = [{"status": 200, "body": sse(delta("a"), {"error": {"message": "kuota habis"}})}]
+    response = make_client(stub).post("chat/completions", "key", {}, stream=True)
+
+    stream = iter_sse_content(response)
+    assert next(stream) == "a"
+    with pytest.raises(requests.exceptions.RequestException, match="kuota habis"):
+        next(stream)
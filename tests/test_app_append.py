@@ -0,0 +1,63 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "medintel.py")
+
+HEADER = "Date,Platform,Sentiment,Location,Engagements,Media Type,Influencer Brand,Post Type\n"
+STREAMED = HEADER + "".join(f"2023-03-{day:02d},Instagram,Positive,Jakarta,{day * 10},Image,A,Feed\n" for day in range(1, 21))
+# Dua baris sama dengan data streaming, satu baris duplikat di dalam batch
+BATCH = HEADER + (
+    "2023-03-01,Instagram,Positive,Jakarta,10,Image,A,Feed\n"
+    "2023-03-02,Instagram,Positive,Jakarta,20,Image,A,Feed\n"
+    "2023-03-25,Twitter,Negative,Medan,5,Video,B,Story\n"
+    "2023-03-25,Twitter,Negative,Medan,5,Video,B,Story\n"
+)
+
+
+class Upload(io.BytesIO):
+    """Pengganti UploadedFile Streamlit untuk AppTest (file_uploader belum dapat diisi di AppTest)."""
+
+    def __init__(self, text, file_id):
+        super().__init__(text.encode("utf-8"))
+        self.name = f"{file_id}.csv"
+        self.file_id = file_id
+        self.size = len(self.getvalue())
+
+
+@pytest.fixture
+def upload(monkeypatch):
+    current = {"files": None}
+    monkeypatch.setattr(st, "file_uploader", lambda *args, **kwargs: current["files"])
+    return current
+
+
+def test_append_after_streaming_starts_new_dataset(upload):
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    at.radio(key="data_input_method_radio").set_value("Unggah File CSV").run()
+    at.checkbox(key="csv_streaming_mode").check().run()
+    upload["files"] = [Upload(STREAMED, "streamed")]
+    at.run()
+    assert at.session_state.streamed_aggregates.total_entries == 20
+
+    # File dihapus dari pengunggah: agregat streaming tetap menjadi data aktif
+    upload["files"] = None
+    at.checkbox(key="csv_streaming_mode").uncheck().run()
+    at.checkbox(key="csv_append_mode").check().run()
+    assert at.session_state.streamed_aggregates is not None
+    upload["files"] = [Upload(BATCH, "batch")]
+    at.run()
+
+    assert not at.exception
+    assert any("mode streaming" in warning.value for warning in at.warning)
+    dataset = at.session_state.appended_dataset
+    # Agregat streaming tidak dicampur dengan baris batch; hanya duplikat di dalam batch yang dilewati
+    assert at.session_state.streamed_aggregates is None
+    assert dataset.last_append == (3, 1)
+    assert dataset.aggregates().total_entries == 3
+    assert isinstance(dataset.frame(), pd.DataFrame) and len(dataset.frame()) == 3
@@ -0,0 +1,73 @@
+import pandas as pd
+
+from cleaning import clean_data, date_parse_summary, parse_dates
+
+T = pd.Timestamp
+
+
+def test_parse_dates_mixed_formats():
+    values = {
+        '2023-03-05': T('2023-03-05'),
+        '2023-03-05T10:30:00': T('2023-03-05 10:30'),
+        '2023-03-05T10:30:00+07:00': T('2023-03-05 03:30'),   # Dikonversi ke UTC tanpa timezone
+        '05/03/2023': T('2023-03-05'),                        # Hari lebih dulu, bukan 3 Mei
+        '13/03/2023 08:15': T('2023-03-13 08:15'),
+        '13/03/2023 08:15:30': T('2023-03-13 08:15:30'),
+        '05-03-2023': T('2023-03-05'),
+        'March 5, 2023': T('2023-03-05'),
+        '5 Mar 2023': T('2023-03-05'),
+    }
+    stats = {}
+    parsed = parse_dates(pd.Series(list(values), name='date'), stats)
+
+    assert parsed.tolist() == list(values.values())
+    assert parsed.dtype == 'datetime64[ns]'
+    assert stats['date_formats'] == {
+        'ISO 8601': 3, 'dd/mm/yyyy': 1, 'dd/mm/yyyy hh:mm': 1, 'dd/mm/yyyy hh:mm:ss': 1, 'dd-mm-yyyy': 1, 'format lain': 2,
+    }
+
+
+def test_parse_dates_day_first_fallback():
+    stats = {}
+    parsed = parse_dates(pd.Series(['4.7.2023', '04.07.2023 18:00', '2/1/2023']), stats)
+    assert parsed.tolist() == [T('2023-07-04'), T('2023-07-04 18:00'), T('2023-01-02')]
+    assert stats['date_formats'] == {'dd/mm/yyyy': 1, 'format lain': 2}
+
+
+def test_parse_dates_unparseable_values():
+    series = pd.Series(['bukan tanggal', '', None, '2023-02-30', '31/02/2023', '2023-03-01', '2023-03-01'])
+    stats = {}
+    parsed = parse_dates(series, stats)
+    assert parsed.isna().tolist() == [True] * 5 + [False, False]
+    # Nilai yang sama hanya di-parse sekali, tetapi dihitung per baris
+    assert stats['date_formats'] == {'ISO 8601': 2}
+
+
+def test_parse_dates_datetime_input():
+    series = pd.Series(pd.to_datetime(['2023-03-05 10:00', None]).tz_localize('Asia/Jakarta'))
+    stats = {}
+    parsed = parse_dates(series, stats)
+    assert parsed.tolist()[0] == T('2023-03-05 03:00')
+    assert parsed.dt.tz is None
+    assert stats['date_formats'] == {'datetime': 1}
+
+
+def test_clean_data_reports_formats_and_dropped_rows():
+    raw = pd.DataFrame({
+        'Date': ['2023-03-05', '05/03/2023', '6 Mar 2023', 'kemarin', None, '2023-03-07'],
+        'Platform': ['Instagram'] * 6,
+        'Sentiment': ['Positive'] * 6,
+        'Location': ['Jakarta'] * 6,
+        'Engagements': [1, 2, 3, 4, 5, None],
+        'Media Type': ['Image'] * 6,
+    })
+    stats = {}
+    df = clean_data(raw, stats=stats)
+
+    assert len(df) == 4
+    assert df['date'].tolist() == [T('2023-03-05'), T('2023-03-05'), T('2023-03-06'), T('2023-03-07')]
+    assert stats['dropped_rows'] == 2
+    assert stats['date_formats'] == {'ISO 8601': 2, 'dd/mm/yyyy': 1, 'format lain': 1}
+    assert date_parse_summary(stats) == (
+        "Format tanggal terdeteksi (ISO 8601: 2, dd/mm/yyyy: 1, format lain: 1). Baris dibuang karena tanggal tidak valid: 2."
+    )
@@ -0,0 +1,76 @@
+import pandas as pd
+
+from cleaning import clean_data
+from dataset_cache import DatasetCache, frame_nbytes
+from synthetic import generate_frame
+
+
+def frames(count, rows=2_000):
+    return [clean_data(generate_frame(rows, seed=seed, days=30, dirty=False)) for seed in range(count)]
+
+
+def make_cache(tmp_path, frames, entries):
+    """Cache dengan batas memori cukup untuk `entries` dataset dan spill ke `tmp_path`."""
+    budget = max(frame_nbytes(df) for df in frames) * entries
+    return DatasetCache(max_bytes=budget, spill_dir=str(tmp_path), spill_max_bytes=1 << 30)
+
+
+def test_leased_entry_is_never_evicted(tmp_path):
+    data = frames(5)
+    cache = make_cache(tmp_path, data, entries=2)
+    lease = cache.share("a", data[0])
+
+    for index, df in enumerate(data[1:], start=1):
+        cache.put(f"b{index}", df)
+        # Entri dengan lease tetap di memori walaupun paling lama tidak dipakai
+        assert cache.stats()["leased_entries"] == 1
+        assert lease.df is data[0]
+        assert cache.get("a") is lease.entry
+
+    stats = cache.stats()
+    assert stats["spills"] == 3
+    assert stats["entries"] == 2
+
+    # Setelah lease dilepas, entri boleh dikeluarkan seperti entri lain
+    lease.release()
+    assert lease.released
+    cache.put("c", data[1])
+    cache.put("d", data[2])
+    assert "a" in cache
+    assert cache.stats()["spilled_entries"] == 5
+
+
+def test_spilled_entry_reloads_without_respill(tmp_path):
+    data = frames(3)
+    cache = make_cache(tmp_path, data, entries=1)
+    cache.put("a", data[0], messages=[("info", "bersih")], stats={"rows": len(data[0])})
+    cache.put("b", data[1])
+    assert cache.stats()["spilled_entries"] == 1
+
+    entry = cache.get("a")
+    pd.testing.assert_frame_equal(entry.df, data[0])
+    assert entry.messages == [("info", "bersih")]
+    assert entry.stats == {"rows": len(data[0])}
+    stats = cache.stats()
+    assert stats["reloads"] == 1
+    # Entri yang dimuat kembali tetap di memori; entri lain yang dikeluarkan untuk memberi tempat
+    assert stats["entries"] == 1
+    assert stats["spills"] == 2
+    assert cache.get("a") is entry
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_reload_skips_leased_entries(tmp_path):
+    data = frames(3)
+    cache = make_cache(tmp_path, data, entries=1)
+    cache.put("a", data[0])
+    lease = cache.share("b", data[1])
+    assert cache.stats()["spills"] == 1
+
+    # Memuat kembali "a" melampaui batas, tetapi "b" yang memiliki lease tidak dikeluarkan
+    reloaded = cache.get("a")
+    assert reloaded is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["spills"] == 1
+    assert lease.df is data[1]
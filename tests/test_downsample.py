@@ -0,0 +1,77 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import downsample_trend, lttb_indices, minmax_indices
+
+
+def reference_lttb(x, y, threshold):
+    """LTTB per titik sesuai deskripsi aslinya (Steinarsson, 2013), sebagai pembanding implementasi vektor."""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    previous = 0
+    for bucket in range(threshold - 2):
+        avg_start = math.floor((bucket + 1) * every) + 1
+        avg_end = min(math.floor((bucket + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1.0
+        for i in range(math.floor(bucket * every) + 1, math.floor((bucket + 1) * every) + 1):
+            area = abs((x[previous] - avg_x) * (y[i] - y[previous]) - (x[previous] - x[i]) * (avg_y - y[previous]))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        previous = best
+    selected.append(n - 1)
+    return selected
+
+
+def trend(n, seed=0):
+    rng = np.random.default_rng(seed)
+    values = np.cumsum(rng.normal(0, 10, n)) + rng.gamma(1, 50, n)
+    values[n // 3] += 10_000
+    values[2 * n // 3] -= 10_000
+    return pd.DataFrame({'date': pd.date_range('2015-01-01', periods=n, freq='D'), 'engagements': values})
+
+
+@pytest.mark.parametrize("n, threshold", [(1_000, 50), (4_000, 1_500), (10_007, 333)])
+def test_lttb_matches_reference(n, threshold):
+    frame = trend(n, seed=n)
+    x = np.arange(n, dtype=float)
+    y = frame['engagements'].to_numpy()
+    selected = lttb_indices(x, y, threshold)
+
+    assert selected.tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+    assert len(selected) == threshold
+    assert selected[0] == 0 and selected[-1] == n - 1
+    assert (np.diff(selected) > 0).all()
+
+
+def test_lttb_small_series_unchanged():
+    assert lttb_indices(np.arange(10), np.arange(10), 20).tolist() == list(range(10))
+
+
+def test_minmax_keeps_bucket_extremes():
+    y = trend(5_000, seed=2)['engagements'].to_numpy()
+    selected = minmax_indices(y, 100)
+    edges = np.linspace(0, len(y), 51).astype(int)
+    for start, end in zip(edges[:-1], edges[1:]):
+        assert start + y[start:end].argmax() in selected
+        assert start + y[start:end].argmin() in selected
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_trend_budget_and_extremes(method):
+    frame = trend(20_000, seed=4)
+    points = downsample_trend(frame, max_points=1_500, method=method)
+
+    assert len(points) <= 1_500
+    assert points['date'].is_monotonic_increasing
+    # Baris asli tanpa perubahan, puncak dan titik terendah global dipertahankan
+    pd.testing.assert_frame_equal(points, frame.loc[points.index])
+    assert points['engagements'].max() == frame['engagements'].max()
+    assert points['engagements'].min() == frame['engagements'].min()
+    assert len(downsample_trend(frame.head(1_000), max_points=1_500)) == 1_000
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from cleaning import clean_data
+from incremental import IncrementalDataset, row_keys
+from store import DASHBOARD_COLUMNS, load_dataset, save_dataset
+from synthetic import generate_frame
+
+
+def clean_frame(rows, seed):
+    return clean_data(generate_frame(rows, seed=seed, days=60, dirty=False))
+
+
+def test_duplicate_rows_are_skipped():
+    history = clean_frame(2_000, seed=1)
+    dataset = IncrementalDataset(history)
+
+    batch = clean_frame(500, seed=2)
+    overlap = pd.concat([history.head(300), batch], ignore_index=True)
+    added, duplicates = dataset.append(overlap, "batch-1")
+
+    expected_new = len(batch.drop_duplicates()) - int(batch.merge(history, how='inner').drop_duplicates().shape[0])
+    assert duplicates == len(overlap) - added
+    assert added == expected_new
+    assert dataset.rows == len(history) + added
+    assert dataset.aggregates().total_entries == dataset.rows
+
+
+def test_same_batch_is_added_once():
+    dataset = IncrementalDataset(clean_frame(1_000, seed=1))
+    batch = clean_frame(200, seed=3)
+    first = dataset.append(batch, "batch")
+    assert dataset.append(batch, "batch") == (0, 0)
+    # Konten sama dengan digest berbeda: semua baris duplikat
+    assert dataset.append(batch, "batch-copy") == (0, first[0] + first[1])
+
+
+def test_row_keys_ignore_dtype_differences():
+    frame = clean_frame(300, seed=4)
+    as_object = frame.astype({col: object for col in frame.columns if isinstance(frame[col].dtype, pd.CategoricalDtype)})
+    assert (row_keys(frame) == row_keys(as_object)).all()
+
+
+def test_append_to_reopened_saved_dataset(tmp_path):
+    history = clean_frame(2_000, seed=1)
+    save_dataset(history, "fp", "riwayat", store_dir=str(tmp_path))
+    reopened = load_dataset("fp", columns=DASHBOARD_COLUMNS, store_dir=str(tmp_path))
+    assert 'post_type' not in reopened.columns
+
+    dataset = IncrementalDataset(reopened)
+    batch = pd.concat([history.head(100), clean_frame(400, seed=5)], ignore_index=True)
+    added, duplicates = dataset.append(batch, "batch-1")
+
+    assert duplicates >= 100
+    assert added + duplicates == len(batch)
+    assert dataset.rows == len(history) + added
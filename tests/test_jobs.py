@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from jobs import JobQueue
+
+TIMEOUT = 5
+
+
+@pytest.fixture
+def queue():
+    queue = JobQueue(max_workers=2, max_finished=3)
+    yield queue
+    if queue._executor is not None:
+        queue._executor.shutdown(wait=True)
+
+
+def wait(job):
+    job._future.result(timeout=TIMEOUT)
+    return job
+
+
+def test_cancel_running_job_stops_at_next_check(queue):
+    started, proceed = threading.Event(), threading.Event()
+    reached = []
+
+    def task(job):
+        job.emit("bagian 1")
+        started.set()
+        assert proceed.wait(TIMEOUT)
+        job.emit("bagian 2")  # Titik pembatalan berikutnya
+        reached.append("setelah emit")
+        return "hasil"
+
+    job = queue.submit("ai", task, label="analisis")
+    assert started.wait(TIMEOUT)
+    assert job.status == "running"
+
+    assert queue.cancel(job.id)
+    assert job.status_label == "membatalkan"
+    proceed.set()
+    wait(job)
+
+    assert job.status == "cancelled"
+    assert job.partial_text == "bagian 1"
+    assert reached == []
+    assert job.result is None
+    assert job.finished_at is not None
+    assert not queue.cancel(job.id)
+
+
+def test_result_finished_after_cancel_is_discarded(queue):
+    started, proceed = threading.Event(), threading.Event()
+
+    def task(job):
+        started.set()
+        assert proceed.wait(TIMEOUT)
+        return "hasil"  # Tanpa titik pembatalan
+
+    job = queue.submit("pdf", task)
+    assert started.wait(TIMEOUT)
+    queue.cancel(job.id)
+    proceed.set()
+    wait(job)
+    assert job.status == "cancelled"
+    assert job.result is None
+
+
+def test_cancel_queued_job_never_runs():
+    queue = JobQueue(max_workers=1)
+    started, proceed = threading.Event(), threading.Event()
+    calls = []
+
+    def blocker(job):
+        started.set()
+        assert proceed.wait(TIMEOUT)
+
+    running = queue.submit("ai", blocker)
+    assert started.wait(TIMEOUT)
+    queued = queue.submit("ai", lambda job: calls.append(job.id))
+    assert queued.status == "queued"
+
+    assert queue.cancel(queued.id)
+    assert queued.status == "cancelled"
+    proceed.set()
+    wait(running)
+    queue._executor.shutdown(wait=True)
+    assert running.status == "done"
+    assert calls == []
+
+
+def test_failed_job_keeps_error(queue):
+    def task(job):
+        raise ValueError("kunci API tidak valid")
+
+    job = wait(queue.submit("ai", task))
+    assert job.status == "failed"
+    assert job.error == "kunci API tidak valid"
+
+
+def test_finished_jobs_beyond_limit_are_pruned(queue):
+    started, proceed = threading.Event(), threading.Event()
+
+    def blocker(job):
+        started.set()
+        assert proceed.wait(TIMEOUT)
+        return "lama"
+
+    running = queue.submit("ai", blocker, owner="sesi-a")
+    assert started.wait(TIMEOUT)
+    finished = [wait(queue.submit("ai", lambda job, n=n: n, owner="sesi-b")) for n in range(5)]
+
+    # Hanya tiga tugas selesai terbaru yang disimpan; tugas yang masih berjalan tidak ikut dibuang
+    assert [queue.get(job.id) for job in finished] == [None, None] + finished[2:]
+    assert queue.get(running.id) is running
+    assert queue.jobs() == [*reversed(finished[2:]), running]
+    assert queue.jobs(owner="sesi-a") == [running]
+    assert queue.stats()["done"] == 3
+    assert queue.stats()["running"] == 1
+
+    proceed.set()
+    wait(running)
+    # Setelah selesai, tugas lama itu menjadi yang paling awal terdaftar dan langsung dibuang
+    assert queue.get(running.id) is None
+    assert [job.result for job in queue.jobs()] == [4, 3, 2]
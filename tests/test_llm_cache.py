@@ -0,0 +1,85 @@
+import pytest
+
+from llm_cache import LLMResponseCache, cache_key
+
+
+class Clock:
+    """Jam yang dimajukan secara manual."""
+
+    def __init__(self, now=1_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def make_cache(tmp_path, clock, **kwargs):
+    return LLMResponseCache(path=str(tmp_path / "cache" / "llm.sqlite3"), clock=clock, **kwargs)
+
+
+def test_hits_and_misses_are_counted(tmp_path, clock):
+    cache = make_cache(tmp_path, clock)
+    assert cache.get("gemini", "flash", "Ringkas data ini") is None
+    cache.put("gemini", "flash", "Ringkas data ini", "jawaban")
+
+    # Spasi dan indentasi prompt tidak mengubah kunci; provider/model lain adalah kunci lain
+    assert cache.get("gemini", "flash", "  Ringkas\n    data ini ") == "jawaban"
+    assert cache.get("openrouter", "flash", "Ringkas data ini") is None
+    assert cache.get("gemini", "pro", "Ringkas data ini") is None
+    assert cache_key("gemini", "flash", "a  b") == cache_key("gemini", "flash", "a b")
+
+    assert cache.stats() == {"hits": 1, "misses": 3, "entries": 1, "bytes": len("jawaban")}
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = make_cache(tmp_path, clock, ttl_seconds=60)
+    cache.put("gemini", "flash", "lama", "respons lama")
+
+    clock.now += 60
+    assert cache.get("gemini", "flash", "lama") == "respons lama"
+    # Dipakai ulang tidak memperpanjang masa berlaku (dihitung dari waktu dibuat)
+    clock.now += 1
+    assert cache.get("gemini", "flash", "lama") is None
+
+    # Entri kedaluwarsa dihapus dari disk pada penulisan berikutnya
+    assert cache.stats()["entries"] == 1
+    cache.put("gemini", "flash", "baru", "respons baru")
+    assert cache.stats()["entries"] == 1
+    assert cache.get("gemini", "flash", "baru") == "respons baru"
+
+
+def test_size_limit_evicts_least_recently_used(tmp_path, clock):
+    cache = make_cache(tmp_path, clock, max_bytes=25)
+    for prompt in ("a", "b"):
+        clock.now += 1
+        cache.put("gemini", "flash", prompt, f"jawaban-{prompt}--")  # 11 byte
+    clock.now += 1
+    assert cache.get("gemini", "flash", "a") == "jawaban-a--"
+
+    clock.now += 1
+    cache.put("gemini", "flash", "c", "jawaban-c--")
+    # "b" paling lama tidak dipakai sehingga dihapus lebih dulu
+    assert cache.get("gemini", "flash", "b") is None
+    assert cache.get("gemini", "flash", "a") == "jawaban-a--"
+    assert cache.get("gemini", "flash", "c") == "jawaban-c--"
+    assert cache.stats()["bytes"] == 22
+
+
+def test_oversized_response_is_not_kept(tmp_path, clock):
+    cache = make_cache(tmp_path, clock, max_bytes=10)
+    cache.put("gemini", "flash", "besar", "x" * 11)
+    assert cache.get("gemini", "flash", "besar") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_clear(tmp_path, clock):
+    cache = make_cache(tmp_path, clock)
+    cache.put("gemini", "flash", "p", "r")
+    cache.clear()
+    assert cache.get("gemini", "flash", "p") is None
+    assert cache.stats()["entries"] == 0
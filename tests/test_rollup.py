@@ -0,0 +1,116 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import build_aggregates
+from cleaning import clean_data
+from rollup import ROLLUP_LEVELS, RollupCube, _cover, period_start
+from synthetic import generate_frame
+
+PERIOD_FREQ = {"week": "W", "month": "M"}
+
+
+@pytest.fixture(scope="module")
+def data():
+    df = clean_data(generate_frame(30_000, seed=21, days=200, dirty=False))
+    return df, RollupCube.from_aggregates(build_aggregates(df))
+
+
+def value_counts(series):
+    return series.astype(object).value_counts().to_dict()
+
+
+def expected(df, start, end, platforms, sentiments, brands, granularity):
+    """Hasil query yang sama langsung dari baris data dengan pandas."""
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= (df['day'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (df['day'] <= pd.Timestamp(end)).to_numpy()
+    for col, values in (('platform', platforms), ('sentiment', sentiments), ('influencer_brand', brands)):
+        if values:
+            mask &= df[col].isin(values).to_numpy()
+    rows = df[mask]
+    periods = rows['day'] if granularity == "day" else rows['day'].dt.to_period(PERIOD_FREQ[granularity]).dt.start_time
+    return rows, rows.groupby(periods)['engagements'].sum().sort_index()
+
+
+RANGES = [
+    (None, None),
+    (date(2023, 1, 11), date(2023, 5, 17)),  # Rabu sampai Rabu, melewati beberapa bulan utuh
+    (date(2023, 2, 15), date(2023, 3, 14)),  # Tengah bulan sampai tengah bulan berikutnya
+    (date(2023, 3, 8), date(2023, 3, 8)),    # Satu hari
+    (date(2023, 2, 1), date(2023, 4, 30)),   # Tepat di batas bulan
+    (date(2023, 3, 6), date(2023, 3, 19)),   # Tepat dua minggu (Senin sampai Minggu)
+    (date(2022, 12, 1), date(2023, 1, 3)),   # Dimulai sebelum data
+]
+
+FILTERS = [
+    ((), (), ()),
+    (("Instagram", "TikTok"), (), ()),
+    ((), ("Negative",), ()),
+    (("Facebook",), ("Positive", "Neutral"), ("Brand AB", "Brand CE", "Brand tidak ada")),
+]
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+@pytest.mark.parametrize("platforms, sentiments, brands", FILTERS)
+@pytest.mark.parametrize("granularity", ["day", "week", "month"])
+def test_query_matches_pandas(data, start, end, platforms, sentiments, brands, granularity):
+    df, cube = data
+    result = cube.query(start, end, platforms, sentiments, brands, granularity)
+    rows, trend = expected(df, start, end, platforms, sentiments, brands, granularity)
+
+    assert result.total_entries == len(rows)
+    assert int(result.base['count'].sum()) == len(rows)
+    assert result.sentiment_counts.to_dict() == value_counts(rows['sentiment'])
+    assert result.media_type_counts.to_dict() == value_counts(rows['media_type'])
+    assert result.location_counts.to_dict() == value_counts(rows['location'])
+    assert result.platform_engagements.to_dict() == rows.groupby('platform', observed=True)['engagements'].sum().to_dict()
+    assert result.platform_engagements.is_monotonic_decreasing
+    assert result.daily_engagements['date'].tolist() == trend.index.tolist()
+    assert result.daily_engagements['engagements'].tolist() == trend.tolist()
+
+
+@pytest.mark.parametrize("start, end, platforms", [
+    (date(2023, 9, 1), date(2023, 9, 30), ()),        # Setelah data berakhir
+    (date(2023, 3, 10), date(2023, 3, 1), ()),        # Awal setelah akhir
+    (None, None, ("Platform tidak ada",)),
+])
+def test_empty_query(data, start, end, platforms):
+    _, cube = data
+    result = cube.query(start, end, platforms)
+    assert result.total_entries == 0
+    assert result.empty
+    assert result.daily_engagements.empty
+
+
+def test_query_memo(data):
+    _, cube = data
+    first = cube.query(date(2023, 2, 1), date(2023, 2, 20), ["Instagram"], granularity="week")
+    assert cube.query(date(2023, 2, 1), date(2023, 2, 20), ["Instagram"], granularity="week") is first
+    assert cube.query(date(2023, 2, 1), date(2023, 2, 20), ["Instagram"], granularity="day") is not first
+
+
+def test_cover_partitions_range():
+    rng = np.random.default_rng(0)
+    origin = int(np.datetime64('2023-01-01', 'D').astype(np.int64))
+    for _ in range(300):
+        start = origin + int(rng.integers(0, 400))
+        stop = start + int(rng.integers(0, 200))
+        pieces = _cover(start, stop, ROLLUP_LEVELS)
+        # Potongan bersambung tanpa celah atau tumpang tindih
+        bounds = [start] + [edge for _, first, last in pieces for edge in (first, last)] + [stop]
+        assert all(left == right for left, right in zip(bounds[::2], bounds[1::2]))
+        for level, first, last in pieces:
+            assert first < last
+            if level != "day":
+                # Hanya periode utuh: awal dan akhir potongan jatuh di awal periode
+                assert int(period_start(first, level)) == first
+                assert int(period_start(last, level)) == last
+    assert _cover(10, 10, ROLLUP_LEVELS) == []
+    # Rentang tengah minggu/tengah bulan memakai ketiga tingkat
+    start, stop = (int(np.datetime64(day, 'D').astype(np.int64)) for day in ('2023-01-11', '2023-05-18'))
+    assert {level for level, _, _ in _cover(start, stop, ROLLUP_LEVELS)} == {"month", "week", "day"}
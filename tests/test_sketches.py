@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregates import build_aggregates, counts_by
+from cleaning import clean_data
+from sketches import EXACT_DIMENSIONS, HyperLogLog, QuantileSketch, SketchSummary, SpaceSaving
+from synthetic import generate_frame
+
+
+def chunks(values, size):
+    return [values[start:start + size] for start in range(0, len(values), size)]
+
+
+def zipf_labels(rows, distinct, seed):
+    """Label berdistribusi Zipf: sedikit nilai sangat sering, ekor panjang nilai jarang."""
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(1.3, size=rows * 2)
+    ranks = ranks[ranks <= distinct][:rows]
+    return pd.Series([f"kota-{rank}" for rank in ranks])
+
+
+@pytest.mark.parametrize("distinct", [50, 5_000, 200_000])
+def test_hyperloglog_within_standard_error(distinct):
+    values = pd.Series([f"nilai-{i}" for i in range(distinct)])
+    sketch = HyperLogLog()
+    for part in chunks(values.sample(frac=1, random_state=1), 10_000):
+        # Nilai yang muncul berulang tidak menambah perkiraan
+        sketch.update(pd.concat([part, part.head(100)]))
+
+    exact = values.nunique()
+    # Galat baku sekitar 0,8% (p=14); 3 galat baku sebagai batas tes
+    assert sketch.relative_error == pytest.approx(0.008, abs=0.0005)
+    assert abs(sketch.estimate() - exact) <= 3 * sketch.relative_error * exact
+
+
+def test_hyperloglog_merge_equals_single_pass():
+    values = pd.Series([f"nilai-{i}" for i in range(30_000)])
+    single = HyperLogLog()
+    single.update(values)
+    merged = HyperLogLog()
+    for part in chunks(values, 7_000):
+        other = HyperLogLog()
+        other.update(part)
+        merged.merge(other)
+    assert (merged.registers == single.registers).all()
+
+
+def exact_quantile(values, q):
+    """Statistik urutan yang dicari sketsa: nilai pada peringkat floor(q * (n - 1))."""
+    ordered = np.sort(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantile_sketch_relative_error():
+    rng = np.random.default_rng(7)
+    values = np.concatenate([np.round(rng.lognormal(4, 1.5, 200_000)), np.zeros(5_000)])
+    rng.shuffle(values)
+
+    sketch = QuantileSketch()
+    for part in chunks(values, 25_000):
+        other = QuantileSketch()
+        other.update(part)
+        sketch.merge(other)
+
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(values.mean())
+    for q in (0.0, 0.01, 0.25, 0.5, 0.9, 0.99, 0.999, 1.0):
+        exact = exact_quantile(values, q)
+        assert abs(sketch.quantile(q) - exact) <= sketch.relative_accuracy * exact + 1e-9, q
+
+
+def test_space_saving_exact_below_capacity():
+    labels = zipf_labels(20_000, distinct=100, seed=3)
+    sketch = SpaceSaving(capacity=256)
+    for part in chunks(labels, 3_000):
+        sketch.update(part)
+
+    counts, errors = sketch.top()
+    exact = labels.value_counts()
+    assert counts.to_dict() == exact.to_dict()
+    assert (errors == 0).all()
+
+
+def test_space_saving_error_bounds():
+    labels = zipf_labels(100_000, distinct=5_000, seed=5)
+    capacity = 64
+    merged = SpaceSaving(capacity)
+    for part in chunks(labels, 9_000):
+        other = SpaceSaving(capacity)
+        other.update(part)
+        merged.merge(other)
+
+    exact = labels.value_counts()
+    counts, errors = merged.top()
+    assert merged.total == len(labels)
+    assert len(counts) == capacity
+    # Nilai yang dilacak: count - error <= jumlah sebenarnya <= count
+    true_counts = exact.reindex(counts.index, fill_value=0)
+    assert (true_counts <= counts).all()
+    assert (true_counts >= counts - errors).all()
+    # Nilai yang tidak dilacak berjumlah paling banyak `floor`, dan floor <= total / kapasitas
+    untracked = exact.drop(counts.index, errors='ignore')
+    assert (untracked <= merged.floor).all()
+    assert merged.floor <= merged.total / capacity
+    # Nilai yang jumlahnya melebihi floor pasti terlacak, termasuk 10 teratas
+    assert set(exact[exact > merged.floor].index) <= set(counts.index)
+    assert set(exact.head(10).index) <= set(counts.head(10).index)
+
+
+def test_sketch_summary_matches_exact_aggregates():
+    df = clean_data(generate_frame(40_000, seed=11, days=90, dirty=False))
+    summary = SketchSummary(capacity=1_000)
+    for start in range(0, len(df), 6_000):
+        summary.add(df.iloc[start:start + 6_000])
+    approx = summary.result()
+    exact = build_aggregates(df)
+
+    # Dimensi kardinalitas kecil dan tren tetap eksak
+    assert approx.total_entries == exact.total_entries
+    for col in EXACT_DIMENSIONS:
+        assert counts_by(approx.base, col).to_dict() == counts_by(exact.base, col).to_dict()
+    assert approx.daily_engagements['engagements'].tolist() == exact.daily_engagements['engagements'].tolist()
+    # Lokasi di bawah kapasitas: jumlah eksak
+    assert approx.location_counts.to_dict() == df['location'].value_counts().to_dict()
+    assert summary.distinct_count('location') == pytest.approx(df['location'].nunique(), rel=3 * summary.distinct_error)
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trends import COMPARE_DAYS, MIN_SPIKE_PERIODS, ROLLING_DAYS, _daily_metrics, _linear_fit, analyze_trends
+
+
+def daily_matrix(n_series, n_days, seed=0):
+    rng = np.random.default_rng(seed)
+    trend = rng.normal(0, 5, (n_series, 1)) * np.arange(n_days)
+    return rng.poisson(200, (n_series, n_days)) + np.maximum(trend, -150)
+
+
+def base_table(days, seed=0, spike=None):
+    """Tabel `base` harian untuk dua platform x dua sentimen; `spike` = (hari ke-, platform, tambahan engagement)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2024-01-01", periods=days, freq="D")
+    rows = []
+    for day_index, day in enumerate(dates):
+        for platform in ("Instagram", "TikTok"):
+            for sentiment in ("Positive", "Negative"):
+                engagements = int(rng.poisson(500))
+                if spike is not None and (day_index, platform, sentiment) == (spike[0], spike[1], "Positive"):
+                    engagements += spike[2]
+                rows.append((day, platform, sentiment, engagements, 3))
+    return pd.DataFrame(rows, columns=['date', 'platform', 'sentiment', 'engagements', 'count'])
+
+
+def test_linear_fit_matches_polyfit():
+    matrix = daily_matrix(6, 45, seed=1).astype(float)
+    means, slopes, fitted = _linear_fit(matrix)
+    t = np.arange(matrix.shape[1])
+    for row, mean, slope, line in zip(matrix, means, slopes, fitted):
+        expected_slope, intercept = np.polyfit(t, row, 1)
+        assert mean == pytest.approx(row.mean())
+        assert slope == pytest.approx(expected_slope)
+        np.testing.assert_allclose(line, np.polyval([expected_slope, intercept], t))
+
+
+def test_linear_fit_single_period():
+    means, slopes, fitted = _linear_fit(np.array([[5.0], [0.0]]))
+    assert means.tolist() == [5.0, 0.0]
+    assert slopes.tolist() == [0.0, 0.0]
+    assert fitted.tolist() == [[5.0], [0.0]]
+
+
+def test_daily_metrics_rolling_and_week_over_week():
+    daily = daily_matrix(4, 30, seed=2).astype(float)
+    series, rolling = _daily_metrics(daily)
+    for row, rolled, (_, metrics) in zip(daily, rolling, series.iterrows()):
+        expected = pd.Series(row).rolling(ROLLING_DAYS).mean()
+        # Mulai hari ke-7 sama dengan rolling(7); hari-hari awal memakai jendela yang lebih pendek
+        np.testing.assert_allclose(rolled[ROLLING_DAYS - 1:], expected[ROLLING_DAYS - 1:])
+        np.testing.assert_allclose(rolled[:ROLLING_DAYS - 1], pd.Series(row).expanding().mean()[:ROLLING_DAYS - 1])
+        last, previous = row[-COMPARE_DAYS:].sum(), row[-2 * COMPARE_DAYS:-COMPARE_DAYS].sum()
+        assert metrics['rolling_last'] == pytest.approx(expected.iloc[-1])
+        assert metrics['wow_last'] == pytest.approx(last)
+        assert metrics['wow_previous'] == pytest.approx(previous)
+        assert metrics['wow_change'] == pytest.approx((last - previous) / previous)
+        assert metrics['total'] == pytest.approx(row.sum())
+
+
+def test_week_over_week_needs_two_full_weeks():
+    series, _ = _daily_metrics(daily_matrix(1, 2 * COMPARE_DAYS - 1).astype(float))
+    assert np.isnan(series['wow_change'].iloc[0])
+
+
+def test_direction_follows_slope():
+    days = np.arange(60, dtype=float)
+    series, _ = _daily_metrics(np.vstack([100 + 5 * days, 400 - 5 * days, np.full(60, 100.0)]))
+    assert series['direction'].tolist() == ["naik", "turun", "stabil"]
+
+
+def test_injected_spike_is_detected():
+    base = base_table(60, seed=3, spike=(41, "Instagram", 8_000))
+    analysis = analyze_trends(base)
+    spike_day = pd.Timestamp("2024-01-01") + pd.Timedelta(days=41)
+
+    for dimension, value in (("total", "Total"), ("platform", "Instagram"), ("sentiment", "Positive")):
+        spikes = analysis.spikes_for(dimension)
+        assert spikes['date'].tolist() == [spike_day], dimension
+        assert spikes['value'].tolist() == [value]
+        assert spikes['score'].iloc[0] > 3.5
+        assert spikes['expected'].iloc[0] < spikes['engagements'].iloc[0]
+    # Platform lain tidak terpengaruh
+    assert analysis.by("platform").set_index('value').loc["TikTok", 'spikes'] == 0
+
+
+def test_spike_in_weekly_periods():
+    base = base_table(120, seed=4, spike=(52, "TikTok", 40_000))
+    analysis = analyze_trends(base, granularity="week")
+    spikes = analysis.spikes_for("total")
+    # Penanda jatuh pada awal minggu (Senin) yang memuat hari lonjakan
+    assert spikes['date'].tolist() == [pd.Timestamp("2024-02-19")]
+
+
+@pytest.mark.parametrize("granularity, days", [("day", MIN_SPIKE_PERIODS - 1), ("week", 7 * (MIN_SPIKE_PERIODS - 1))])
+def test_short_series_report_no_spikes(granularity, days):
+    base = base_table(days, seed=5, spike=(days - 3, "Instagram", 50_000))
+    analysis = analyze_trends(base, granularity)
+    assert analysis.spikes.empty
+    assert (analysis.series['spikes'] == 0).all()
+
+
+def test_missing_days_count_as_zero():
+    base = base_table(20, seed=6)
+    base = base[base['date'] != pd.Timestamp("2024-01-10")]
+    analysis = analyze_trends(base)
+    assert len(analysis.days) == 20
+    assert analysis.overall['total'] == base['engagements'].sum()
+    assert analysis.overall['mean'] == pytest.approx(base['engagements'].sum() / 20)
@@ -0,0 +1,213 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Log JSON instrumentasi (satu baris per rerun): "stderr", path file, atau kosong (hanya logger "medintel.timings")
+TIMING_LOG = os.environ.get("MEDINTEL_TIMING_LOG", "")
+
+# Panel debug instrumentasi di sidebar dashboard aktif secara default jika bernilai "1"
+DEBUG_PANEL_DEFAULT = os.environ.get("MEDINTEL_DEBUG_PANEL", "0") == "1"
+
+logger = logging.getLogger("medintel.timings")
+
+# Waktu impor pertama per bagian di proses ini (cold start); rerun berikutnya memakai modul yang sudah dimuat
+_first_import_seconds = {}
+
+# Timer yang aktif di thread ini (satu rerun Streamlit atau satu klien batch); tahap di luar timer aktif tidak dicatat
+_active = threading.local()
+
+_log_configured = False
+_log_lock = threading.Lock()
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def rss_bytes():
+    """Memori resident proses saat ini (byte) dari /proc; None jika tidak tersedia (bukan Linux)."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def configure_timing_log(target=None):
+    """Memasang handler log JSON sesuai `target` (default MEDINTEL_TIMING_LOG); aman dipanggil berulang kali."""
+    global _log_configured
+    target = TIMING_LOG if target is None else target
+    with _log_lock:
+        if _log_configured or not target:
+            return
+        handler = logging.StreamHandler(sys.stderr) if target == "stderr" else logging.FileHandler(target, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        _log_configured = True
+
+
+class SectionTimer:
+    """
+    Mencatat waktu setiap bagian dashboard dalam satu rerun. `mark(nama)` menandai awal bagian
+    berikutnya (sekaligus mengakhiri bagian sebelumnya), dan `imports()` mengukur impor dependensi
+    berat yang dimuat saat bagian tersebut pertama kali berjalan.
+
+    Setelah `activate()`, tahap yang dibungkus `stage()` (di modul mana pun, pada thread yang sama)
+    dicatat dengan waktu dinding, waktu CPU thread, dan selisih memori resident. `finish()` menutup
+    rerun dan mengirim satu log JSON berisi semua bagian dan tahap.
+    """
+
+    def __init__(self, kind="rerun"):
+        self.kind = kind
+        self.run_id = uuid.uuid4().hex[:12]
+        self.started = time.perf_counter()
+        self.sections = {}
+        self.stages = []
+        self.finished = False
+        self._current = None
+        self._current_started = None
+        self._depth = 0
+
+    def mark(self, section):
+        self.stop()
+        self.sections.setdefault(section, {"import_s": 0.0, "render_s": 0.0})
+        self._current = section
+        self._current_started = time.perf_counter()
+
+    def stop(self):
+        if self._current is None:
+            return
+        entry = self.sections[self._current]
+        entry["render_s"] += time.perf_counter() - self._current_started
+        self._current = None
+
+    @contextmanager
+    def imports(self):
+        """Mengukur blok `import` di dalam bagian yang sedang berjalan."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            if self._current is not None:
+                self.sections[self._current]["import_s"] += elapsed
+                _first_import_seconds.setdefault(self._current, elapsed)
+
+    def activate(self):
+        """Menjadikan timer ini tujuan `stage()` untuk thread saat ini."""
+        _active.timer = self
+        return self
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        """
+        Mengukur satu tahap. Menghasilkan dict catatan tahap; atribut tambahan (misalnya ukuran respons)
+        dapat diisi di dalam blok. Tahap bersarang dicatat dengan `depth` lebih dalam.
+        """
+        record = {"stage": name, "section": self._current, "depth": self._depth, **attrs}
+        self.stages.append(record)
+        rss_before = rss_bytes()
+        cpu_started = time.thread_time()
+        started = time.perf_counter()
+        self._depth += 1
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            self._depth -= 1
+            record["wall_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            record["cpu_ms"] = round((time.thread_time() - cpu_started) * 1000, 2)
+            rss_after = rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                record["rss_delta_mb"] = round((rss_after - rss_before) / 1024**2, 2)
+
+    def record(self, name, wall_s, **attrs):
+        """Mencatat tahap yang waktunya diukur di tempat lain (misalnya permintaan AI di thread lain)."""
+        self.stages.append({"stage": name, "section": self._current, "depth": self._depth, "wall_ms": round(wall_s * 1000, 2), **attrs})
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def report(self):
+        """Tabel waktu per bagian: impor pada rerun ini, impor pertama di proses ini, dan render (tanpa impor)."""
+        self.stop()
+        rows = [
+            {
+                "Bagian": section,
+                "Impor (detik)": round(entry["import_s"], 3),
+                "Impor pertama (detik)": round(_first_import_seconds.get(section, 0.0), 3),
+                "Render (detik)": round(entry["render_s"] - entry["import_s"], 3),
+            }
+            for section, entry in self.sections.items()
+        ]
+        return pd.DataFrame(rows, columns=["Bagian", "Impor (detik)", "Impor pertama (detik)", "Render (detik)"])
+
+    def finish(self, **extra):
+        """Menutup rerun: menonaktifkan timer, mengirim log JSON, dan mengembalikan catatan rerun (dict)."""
+        self.stop()
+        self.finished = True
+        if getattr(_active, "timer", None) is self:
+            _active.timer = None
+        entry = {
+            "event": "medintel.timings",
+            "kind": self.kind,
+            "run_id": self.run_id,
+            "ts": round(time.time(), 3),
+            "total_ms": round(self.total_seconds * 1000, 2),
+            "sections": {section: {"import_ms": round(values["import_s"] * 1000, 2), "render_ms": round(values["render_s"] * 1000, 2)}
+                         for section, values in self.sections.items()},
+            "stages": self.stages,
+            **extra,
+        }
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(entry, ensure_ascii=False, default=str))
+        return entry
+
+
+@contextmanager
+def stage(name, **attrs):
+    """`SectionTimer.stage` pada timer aktif thread ini; tanpa timer aktif hanya menghasilkan dict kosong."""
+    timer = getattr(_active, "timer", None)
+    if timer is None:
+        yield {}
+        return
+    with timer.stage(name, **attrs) as record:
+        yield record
+
+
+def record_stage(name, wall_s, **attrs):
+    """`SectionTimer.record` pada timer aktif thread ini (diabaikan tanpa timer aktif)."""
+    timer = getattr(_active, "timer", None)
+    if timer is not None:
+        timer.record(name, wall_s, **attrs)
+
+
+def stages_frame(stages):
+    """Tabel tahap untuk panel debug (kolom atribut tambahan digabung menjadi satu kolom teks)."""
+    base_columns = ["stage", "section", "depth", "wall_ms", "cpu_ms", "rss_delta_mb"]
+    rows = []
+    for record in stages:
+        row = {column: record.get(column) for column in base_columns}
+        row["stage"] = "  " * (record.get("depth") or 0) + str(record.get("stage"))
+        row["detail"] = ", ".join(f"{key}={value}" for key, value in record.items() if key not in base_columns)
+        rows.append(row)
+    frame = pd.DataFrame(rows, columns=base_columns + ["detail"]).drop(columns=["depth"])
+    return frame.rename(columns={
+        "stage": "Tahap", "section": "Bagian", "wall_ms": "Waktu (ms)", "cpu_ms": "CPU (ms)",
+        "rss_delta_mb": "Δ Memori (MB)", "detail": "Detail",
+    })
@@ -0,0 +1,228 @@
+"""
+Analitik tren dan anomali engagement: kemiringan regresi linear, rata-rata bergerak 7 hari, perubahan
+7 hari terakhir dibanding 7 hari sebelumnya (week-over-week), dan deteksi lonjakan (skor-z robust berbasis
+MAD), untuk total engagement serta setiap platform dan sentimen sekaligus.
+
+Semua seri disusun menjadi satu matriks harian (seri x hari, hari tanpa data bernilai 0) dengan satu kali
+`np.bincount` atas tabel `base`, lalu setiap metrik dihitung sebagai operasi vektor pada matriks tersebut.
+Tren dan perbandingan mingguan selalu dihitung dari data harian agar tidak bias oleh minggu/bulan yang
+belum lengkap; lonjakan dideteksi pada granularitas grafik (harian, mingguan, atau bulanan) agar penandanya
+jatuh pada titik grafik. Biayanya sebanding dengan ukuran tabel `base` ditambah jumlah seri x hari, sehingga
+cukup cepat untuk dihitung ulang pada setiap perubahan filter meskipun seri berjumlah ribuan.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from timings import stage
+
+# Dimensi yang dianalisis per nilai, selain total engagement
+TREND_DIMENSIONS = ['platform', 'sentiment']
+
+# Lebar jendela rata-rata bergerak dan jendela perbandingan week-over-week (hari)
+ROLLING_DAYS = 7
+COMPARE_DAYS = 7
+
+# Perubahan garis regresi selama seluruh periode (relatif terhadap rata-rata) di bawah batas ini dianggap stabil
+STABLE_CHANGE = 0.05
+
+# Skor-z robust minimum sebuah periode dianggap lonjakan (3,5 adalah batas Iglewicz-Hoaglin)
+SPIKE_THRESHOLD = float(os.environ.get("MEDINTEL_SPIKE_THRESHOLD", "3.5"))
+
+# Jumlah periode minimum sebelum lonjakan dideteksi; seri yang aktif (engagement > 0) di kurang dari separuh
+# periodenya dilewati, karena median dan MAD seri yang jarang terisi mendekati nol
+MIN_SPIKE_PERIODS = 8
+
+# Konstanta agar MAD sebanding dengan simpangan baku pada data normal
+MAD_SCALE = 1.4826
+
+
+def period_codes(dates, granularity):
+    """Tanggal (datetime64) -> awal periode: hari, Senin awal minggu, atau tanggal 1 awal bulan (numpy datetime64)."""
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]')
+    if granularity == "week":
+        # 1970-01-01 adalah hari Kamis; (hari + 3) % 7 memberi 0 untuk Senin
+        return days - ((days.astype(np.int64) + 3) % 7).astype('timedelta64[D]')
+    if granularity == "month":
+        return days.astype('datetime64[M]').astype('datetime64[D]')
+    return days
+
+
+@dataclass(frozen=True)
+class TrendAnalysis:
+    """
+    Hasil analisis tren untuk satu potongan data:
+    - `days`: sumbu hari yang rapat dari hari pertama sampai terakhir.
+    - `series`: satu baris per seri (dimensi 'total', 'platform', atau 'sentiment' beserta nilainya) berisi
+      total, rata-rata per hari, kemiringan regresi (`slope`, engagement per hari), perubahan garis regresi
+      selama periode relatif terhadap rata-rata (`change`), arah ('naik', 'turun', 'stabil'), rata-rata
+      bergerak 7 hari terakhir, jumlah 7 hari terakhir dan 7 hari sebelumnya beserta perubahannya
+      (`wow_change`), dan jumlah lonjakan.
+    - `rolling`: matriks rata-rata bergerak 7 hari (seri x hari), urutannya sama dengan `series`.
+    - `spikes`: satu baris per lonjakan pada granularitas `granularity` (dimensi, nilai, tanggal awal periode,
+      engagement, perkiraan, skor), skor terbesar lebih dulu.
+    """
+    granularity: str
+    days: pd.DatetimeIndex
+    series: pd.DataFrame
+    rolling: np.ndarray
+    spikes: pd.DataFrame
+
+    @property
+    def empty(self):
+        return len(self.days) < 2
+
+    @property
+    def overall(self):
+        """Baris `series` untuk total engagement."""
+        return self.series.iloc[0]
+
+    def by(self, dimension):
+        """Baris `series` untuk semua nilai `dimension`."""
+        return self.series[self.series['dimension'] == dimension]
+
+    def spikes_for(self, dimension="total"):
+        return self.spikes[self.spikes['dimension'] == dimension]
+
+    def rolling_frame(self):
+        """Rata-rata bergerak total engagement sebagai DataFrame (date, engagements) untuk grafik tren."""
+        return pd.DataFrame({'date': self.days, 'engagements': self.rolling[0] if len(self.rolling) else []})
+
+
+def _series_index(base, dimensions):
+    """Label seri (dimensi, nilai) dan kode seri per baris `base` untuk setiap dimensi (-1 untuk nilai kosong)."""
+    labels = [("total", "Total")]
+    codes = [np.zeros(len(base), dtype=np.int64)]
+    for col in dimensions:
+        if col not in base.columns:
+            continue
+        col_codes, uniques = pd.factorize(base[col], sort=True)
+        codes.append(np.where(col_codes >= 0, col_codes + len(labels), -1))
+        labels.extend((col, value) for value in uniques)
+    return labels, codes
+
+
+def _linear_fit(matrix):
+    """Regresi linear y = a + b*t untuk setiap baris `matrix` sekaligus: (rata-rata, kemiringan, nilai garis regresi)."""
+    n_series, n_periods = matrix.shape
+    means = matrix.mean(axis=1) if n_periods else np.zeros(n_series)
+    centered_t = np.arange(n_periods, dtype=np.float64) - (n_periods - 1) / 2
+    denominator = float((centered_t ** 2).sum())
+    slopes = (matrix - means[:, None]) @ centered_t / denominator if denominator else np.zeros(n_series)
+    return means, slopes, means[:, None] + slopes[:, None] * centered_t[None, :]
+
+
+def analyze_trends(base, granularity="day", dimensions=TREND_DIMENSIONS):
+    """
+    Menganalisis tren total engagement dan engagement per nilai `dimensions` dari tabel `base`
+    (kolom date, dimensi, engagements); lonjakan dideteksi pada `granularity` ('day', 'week', 'month').
+    """
+    with stage("analisis_tren", granularity=granularity) as record:
+        analysis = _analyze(base, granularity, dimensions)
+        record.update(series=len(analysis.series), days=len(analysis.days), spikes=len(analysis.spikes))
+    return analysis
+
+
+def _analyze(base, granularity, dimensions):
+    labels, codes = _series_index(base, dimensions)
+    if base.empty:
+        days = np.array([], dtype='datetime64[D]')
+        daily = np.zeros((len(labels), 0))
+    else:
+        dates = period_codes(base['date'].to_numpy(), "day")
+        first = dates.min()
+        days = np.arange(first, dates.max() + np.timedelta64(1, 'D'))
+        position = (dates - first).astype(np.int64)
+        n_days = len(days)
+        # Satu pemindaian: setiap baris base menyumbang ke seri total dan ke seri setiap dimensinya
+        flat = np.concatenate([series_codes * n_days + position for series_codes in codes])
+        valid = np.concatenate([series_codes >= 0 for series_codes in codes])
+        weights = np.tile(base['engagements'].to_numpy(dtype=np.float64), len(codes))
+        daily = np.bincount(flat[valid], weights=weights[valid], minlength=len(labels) * n_days).reshape(len(labels), n_days)
+
+    series, rolling = _daily_metrics(daily)
+    if granularity == "day" or not len(days):
+        periods, matrix = days, daily
+    else:
+        # Hari dijumlahkan per minggu/bulan (kolom yang berurutan) tanpa memindai base lagi
+        buckets = period_codes(days, granularity)
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        periods, matrix = buckets[starts], np.add.reduceat(daily, starts, axis=1)
+    spikes = _detect_spikes(matrix, pd.DatetimeIndex(periods.astype('datetime64[ns]')), labels)
+    series['dimension'] = [dimension for dimension, _ in labels]
+    series['value'] = [value for _, value in labels]
+    series['spikes'] = np.bincount(spikes['series'].to_numpy(dtype=np.int64), minlength=len(labels))
+    series = series[['dimension', 'value'] + [col for col in series.columns if col not in ('dimension', 'value')]]
+    return TrendAnalysis(granularity=granularity, days=pd.DatetimeIndex(days.astype('datetime64[ns]')), series=series,
+                         rolling=rolling, spikes=spikes.drop(columns='series'))
+
+
+def _daily_metrics(daily):
+    """Metrik tren per seri dari matriks harian: regresi, rata-rata bergerak, dan perubahan week-over-week."""
+    n_series, n_days = daily.shape
+    means, slopes, _ = _linear_fit(daily)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = np.where(means > 0, slopes * max(n_days - 1, 0) / means, np.nan)
+    directions = np.where(np.abs(np.nan_to_num(changes)) < STABLE_CHANGE, "stabil", np.where(changes > 0, "naik", "turun"))
+
+    # Rata-rata bergerak dari jumlah kumulatif; hari-hari awal memakai jendela yang lebih pendek
+    cumulative = np.concatenate([np.zeros((n_series, 1)), np.cumsum(daily, axis=1)], axis=1)
+    ends = np.arange(1, n_days + 1)
+    rolling = (cumulative[:, ends] - cumulative[:, np.maximum(ends - ROLLING_DAYS, 0)]) / np.minimum(ends, ROLLING_DAYS)
+
+    if n_days >= 2 * COMPARE_DAYS:
+        last = cumulative[:, -1] - cumulative[:, -1 - COMPARE_DAYS]
+        previous = cumulative[:, -1 - COMPARE_DAYS] - cumulative[:, -1 - 2 * COMPARE_DAYS]
+    else:
+        last = previous = np.full(n_series, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        wow_changes = np.where(previous > 0, (last - previous) / previous, np.nan)
+
+    series = pd.DataFrame({
+        'total': daily.sum(axis=1),
+        'mean': means,
+        'slope': slopes,
+        'change': changes,
+        'direction': directions,
+        'rolling_last': rolling[:, -1] if n_days else np.full(n_series, np.nan),
+        'wow_last': last,
+        'wow_previous': previous,
+        'wow_change': wow_changes,
+    })
+    return series, rolling
+
+
+def _detect_spikes(matrix, periods, labels):
+    """
+    Lonjakan: periode yang residunya terhadap garis regresi jauh di atas median residu seri tersebut.
+    Skala memakai MAD (tahan terhadap lonjakan itu sendiri); seri dengan MAD nol memakai simpangan baku.
+    """
+    columns = ['series', 'dimension', 'value', 'date', 'engagements', 'expected', 'score']
+    if matrix.shape[1] < MIN_SPIKE_PERIODS:
+        return pd.DataFrame(columns=columns)
+
+    _, _, fitted = _linear_fit(matrix)
+    residuals = matrix - fitted
+    medians = np.median(residuals, axis=1)
+    deviations = residuals - medians[:, None]
+    scale = np.median(np.abs(deviations), axis=1) * MAD_SCALE
+    scale = np.where(scale > 0, scale, residuals.std(axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(scale[:, None] > 0, deviations / scale[:, None], 0.0)
+
+    active = (matrix > 0).sum(axis=1) * 2 >= matrix.shape[1]
+    series_idx, period_idx = np.nonzero((scores > SPIKE_THRESHOLD) & (matrix > 0) & active[:, None])
+    order = np.argsort(-scores[series_idx, period_idx], kind='stable')
+    series_idx, period_idx = series_idx[order], period_idx[order]
+    dimensions, values = (np.array(items, dtype=object) for items in zip(*labels))
+    return pd.DataFrame({
+        'series': series_idx,
+        'dimension': dimensions[series_idx],
+        'value': values[series_idx],
+        'date': periods[period_idx],
+        'engagements': matrix[series_idx, period_idx],
+        'expected': np.maximum(fitted[series_idx, period_idx] + medians[series_idx], 0.0),
+        'score': scores[series_idx, period_idx],
+    }, columns=columns)